@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks of schema building, rendering, validation and I/O.
+
+Each benchmark is a function decorated with `benchmark`, which gets a
+temporary working directory and a data size (number of rows, or a schema size
+for the rendering benchmarks), and returns a callable that performs the
+measured work. The callable may return a `Throughput` to report the number of
+rows and bytes it processed. The results of a run are stored as JSON, and two
+results files can be compared with `compare`, for instance to check a new
+release against a saved baseline:
+
+.. code-block:: console
+
+    vodf-benchmark run -o baseline.json
+    # ... install new version ...
+    vodf-benchmark run -o new.json
+    vodf-benchmark compare baseline.json new.json
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import __version__
+from .fits_template import fits_template
+from .plantuml import plantuml
+from .schema import (
+    Column,
+    ColumnGroup,
+    DataType,
+    FITSFile,
+    Header,
+    HeaderGroup,
+    TableExtension,
+)
+
+__all__ = [
+    "Throughput",
+    "BenchmarkResult",
+    "benchmark",
+    "make_large_schema",
+    "run_benchmarks",
+    "save_results",
+    "load_results",
+    "compare",
+]
+
+#: default data sizes (number of rows) of the I/O benchmarks
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+#: default sizes (number of extensions) of the rendering benchmarks
+DEFAULT_SCHEMA_SIZES = (1, 100)
+
+
+@dataclass
+class Throughput:
+    """Amount of data processed by one call of a benchmark."""
+
+    rows: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing of one benchmark at one size."""
+
+    name: str
+    size: int
+    repeat: int
+    best: float  #: fastest time, in seconds
+    median: float  #: median time, in seconds
+    rows_per_second: float | None = None
+    megabytes_per_second: float | None = None
+
+    @property
+    def key(self) -> str:
+        """Identifier used to match results between runs."""
+        return f"{self.name}[{self.size}]"
+
+
+@dataclass
+class _Benchmark:
+    name: str
+    setup: Callable
+    sizes: str | None  # which size list to use: "rows", "schema" or None
+
+
+_BENCHMARKS: dict[str, _Benchmark] = {}
+
+
+def benchmark(name: str, sizes: str | None = "rows"):
+    """Register a benchmark.
+
+    The decorated function is called as ``setup(workdir, size)`` and must
+    return the callable to time. sizes selects whether the benchmark is run
+    for each of the data sizes ("rows"), each of the schema sizes ("schema"),
+    or only once (None).
+    """
+
+    def register(setup):
+        _BENCHMARKS[name] = _Benchmark(name=name, setup=setup, sizes=sizes)
+        return setup
+
+    return register
+
+
+def make_large_schema(num_extensions: int, num_headers=20, num_columns=20) -> FITSFile:
+    """Return a synthetic FITSFile schema of the given size."""
+    headers = HeaderGroup(
+        name="headers",
+        description="synthetic headers",
+        headers=[
+            Header(
+                name=f"header_{ii}",
+                fits_key=f"HDR{ii}",
+                description=f"synthetic header {ii}",
+                dtype=DataType.float64,
+                unit="deg",
+            )
+            for ii in range(num_headers)
+        ],
+    )
+    columns = ColumnGroup(
+        name="columns",
+        description="synthetic columns",
+        columns=[
+            Column(
+                name=f"COL{ii}",
+                description=f"synthetic column {ii}",
+                dtype=DataType.float32,
+                unit="TeV",
+                ucd="phys.energy",
+            )
+            for ii in range(num_columns)
+        ],
+    )
+    return FITSFile(
+        name="large",
+        description="synthetic schema",
+        extensions=[
+            TableExtension(
+                name=f"HDU{ii}",
+                description=f"synthetic HDU {ii}",
+                class_hierarchy=["VODF", "TEST", f"HDU{ii}"],
+                headers=[headers],
+                columns=[columns],
+            )
+            for ii in range(num_extensions)
+        ],
+    )
+
+
+def _events_schema():
+    from .models.level1 import event_list_hdu, soi_hdu
+
+    columns = [
+        Column(name="EVENT_ID", description="id", dtype=DataType.int64, ucd="meta.id"),
+        Column(
+            name="TIME",
+            description="time",
+            dtype=DataType.float64,
+            unit="s",
+            ucd="time.epoch",
+        ),
+        Column(
+            name="ENERGY",
+            description="energy",
+            dtype=DataType.float32,
+            unit="TeV",
+            ucd="phys.energy",
+        ),
+        Column(name="RA", description="ra", dtype=DataType.float32, ucd="pos.eq.ra"),
+        Column(name="DEC", description="dec", dtype=DataType.float32, ucd="pos.eq.dec"),
+    ]
+    events = event_list_hdu.model_copy(update=dict(columns=columns))
+    return FITSFile(name="events", description="events", extensions=[events, soi_hdu])
+
+
+def _event_file(workdir: Path, size: int) -> Path:
+    from .synthetic import generate_file
+
+    path = workdir / f"events_{size}.fits"
+    if not path.exists():
+        generate_file(_events_schema(), path, num_rows={"EVENTS": size, "SOI": 10})
+    return path
+
+
+@benchmark("import_models", sizes=None)
+def _(workdir, size):
+    code = "import vodftools.models.level1"
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    return run
+
+
+@benchmark("render_fits_template", sizes="schema")
+def _(workdir, size):
+    schema = make_large_schema(size)
+    return lambda: sum(1 for _ in fits_template(schema))
+
+
+@benchmark("render_plantuml", sizes="schema")
+def _(workdir, size):
+    schema = make_large_schema(size)
+    return lambda: sum(1 for ext in schema.extensions for _ in plantuml(ext))
+
+
+@benchmark("visitor_dispatch", sizes="schema")
+def _(workdir, size):
+    headers = make_large_schema(1, num_headers=size * 10).extensions[0].headers[0]
+
+    def run():
+        for header in headers.headers:
+            for _ in fits_template(header):
+                pass
+
+    return run
+
+
+@benchmark("read_chunks")
+def _(workdir, size):
+    from .io.bintable import find_hdu, iter_chunks
+
+    path = _event_file(workdir, size)
+
+    def run():
+        with open(path, "rb") as infile:
+            hdu = find_hdu(infile, "EVENTS")
+            for _ in iter_chunks(infile, hdu):
+                pass
+        return Throughput(rows=hdu.num_rows, bytes=hdu.data_size)
+
+    return run
+
+
+@benchmark("validate_file")
+def _(workdir, size):
+    from .validation import validate_file
+
+    schema = _events_schema()
+    path = _event_file(workdir, size)
+
+    def run():
+        validate_file(path, schema)
+        return Throughput(rows=size, bytes=path.stat().st_size)
+
+    return run
+
+
+@benchmark("validate_data")
+def _(workdir, size):
+    from .data_validation import validate_file_data
+
+    schema = _events_schema()
+    path = _event_file(workdir, size)
+
+    def run():
+        validate_file_data(path, schema)
+        return Throughput(rows=size, bytes=path.stat().st_size)
+
+    return run
+
+
+@benchmark("parse_isotime")
+def _(workdir, size):
+    import numpy as np
+
+    from .times import isot_to_met
+
+    seconds = np.arange(size, dtype=np.int64) * 10**9
+    dates = (np.datetime64("2024-01-01", "ns") + seconds.astype("m8[ns]")).astype("S29")
+
+    def run():
+        isot_to_met(dates, 51910, 7.428703703703703e-4, "TT")
+        return Throughput(rows=size, bytes=dates.nbytes)
+
+    return run
+
+
+@benchmark("write_parquet")
+def _(workdir, size):
+    from .io.arrow import write_parquet
+
+    schema = _events_schema()
+    path = _event_file(workdir, size)
+
+    def run():
+        write_parquet(path, workdir / "events.parquet", schema.extensions[0])
+        return Throughput(rows=size, bytes=path.stat().st_size)
+
+    return run
+
+
+def _time(func: Callable, repeat: int) -> tuple[list[float], Throughput | None]:
+    timings, throughput = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        throughput = func()
+        timings.append(time.perf_counter() - start)
+    return timings, throughput if isinstance(throughput, Throughput) else None
+
+
+def run_benchmarks(
+    names: Iterable[str] | None = None,
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    schema_sizes: Iterable[int] = DEFAULT_SCHEMA_SIZES,
+    repeat: int = 3,
+    workdir: str | Path | None = None,
+) -> list[BenchmarkResult]:
+    """Run the benchmarks and return their results.
+
+    Parameters
+    ----------
+    names: Iterable[str] | None
+        benchmarks to run, by default all of them
+    sizes: Iterable[int]
+        number of rows of the I/O benchmarks
+    schema_sizes: Iterable[int]
+        number of extensions of the rendering benchmarks
+    repeat: int
+        number of times each benchmark is run
+    workdir: str | Path | None
+        directory for generated data, by default a temporary directory
+    """
+    names = list(names) if names else list(_BENCHMARKS)
+    unknown = set(names) - set(_BENCHMARKS)
+    if unknown:
+        raise KeyError(f"unknown benchmarks: {sorted(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(workdir or tmpdir)
+        for name in names:
+            bench = _BENCHMARKS[name]
+            bench_sizes = dict(rows=sizes, schema=schema_sizes).get(bench.sizes, [0])
+            for size in bench_sizes:
+                timings, throughput = _time(bench.setup(workdir, size), repeat)
+                best = min(timings)
+                result = BenchmarkResult(
+                    name=name,
+                    size=size,
+                    repeat=repeat,
+                    best=best,
+                    median=statistics.median(timings),
+                )
+                if throughput is not None and best > 0:
+                    result.rows_per_second = throughput.rows / best
+                    result.megabytes_per_second = throughput.bytes / best / 1e6
+                results.append(result)
+    return results
+
+
+def save_results(results: list[BenchmarkResult], path: str | Path):
+    """Save results, together with a description of the environment, as JSON."""
+    import numpy as np
+
+    document = dict(
+        metadata=dict(
+            vodftools=__version__,
+            numpy=np.__version__,
+            python=platform.python_version(),
+            platform=platform.platform(),
+            machine=platform.machine(),
+            date=datetime.now(timezone.utc).isoformat(),
+        ),
+        results=[asdict(result) for result in results],
+    )
+    Path(path).write_text(json.dumps(document, indent=2))
+
+
+def load_results(path: str | Path) -> list[BenchmarkResult]:
+    """Load results saved with `save_results`."""
+    document = json.loads(Path(path).read_text())
+    return [BenchmarkResult(**result) for result in document["results"]]
+
+
+def compare(
+    baseline: list[BenchmarkResult],
+    results: list[BenchmarkResult],
+    threshold: float = 0.1,
+) -> list[tuple[str, float, bool]]:
+    """Compare results to a baseline, using the best time of each benchmark.
+
+    Returns
+    -------
+    list[tuple[str, float, bool]]:
+        for each benchmark present in both, its key, the ratio of the new time
+        to the baseline time, and whether it is slower by more than threshold
+    """
+    reference = {result.key: result for result in baseline}
+    comparison = []
+    for result in results:
+        if result.key not in reference:
+            continue
+        ratio = result.best / reference[result.key].best
+        comparison.append((result.key, ratio, ratio > 1 + threshold))
+    return comparison
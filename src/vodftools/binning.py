@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+"""
+Binning of event lists into counts histograms matching an IRF.
+
+The energy and offset bins are taken exactly from the ``ENERGY_LO/HI`` and
+``OFFSET_LO/HI`` columns of the EFFECTIVE_AREA HDU of an IRF file (see
+`irf_edges`), so the counts can be combined with the effective area without
+any interpolation. Events are streamed chunk by chunk: the bin of each event
+is found with `numpy.searchsorted`, and the counts of a chunk are accumulated
+with one `numpy.bincount` over the flattened (energy, offset) bin number.
+
+As in `vodftools.data_validation`, the work is split into tasks of one range
+of rows of one file, which are run by a pool of worker processes. Workers map
+plain files into memory, so only the location of the rows is sent to them, and
+return one partial histogram per task; these are summed into the result.
+Compressed and remote files are read in one task per file. Scaled-integer
+columns are decoded before binning (see `vodftools.io.encoding`).
+
+The offset of each event is read from an offset column, or else computed from
+its RA and DEC columns and the pointing direction given by the RA_PNT and
+DEC_PNT keywords of the table.
+
+.. code-block:: python
+
+    from vodftools.binning import bin_events, irf_edges
+
+    cube = bin_events(event_paths, irf_edges("irfs.fits"), workers=8)
+    cube.counts  # shape (energy bins, offset bins)
+"""
+
+import multiprocessing
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .io.bintable import find_hdu, iter_chunks, read_rows, table_dtype
+from .io.compressed import is_compressed
+from .io.encoding import decode_chunk, encoding_plan
+from .io.index import read_sidecar
+from .io.memory import chunk_rows_for
+from .io.remote import is_remote, open_file
+from .io.units import conversion_factor
+from .validation import _column_cards
+
+__all__ = [
+    "BinEdges",
+    "CountsCube",
+    "irf_edges",
+    "bin_events",
+]
+
+
+@dataclass
+class BinEdges:
+    """Energy and offset bin edges, as n + 1 increasing values for n bins."""
+
+    energy: np.ndarray
+    offset: np.ndarray
+    energy_unit: str = "TeV"
+    offset_unit: str = "deg"
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Number of energy and offset bins."""
+        return len(self.energy) - 1, len(self.offset) - 1
+
+
+@dataclass
+class CountsCube:
+    """Number of events in each energy and offset bin."""
+
+    edges: BinEdges
+    counts: np.ndarray  #: integer array of shape ``edges.shape``
+    num_events: int = 0  #: number of events read, including those out of the bins
+
+    @property
+    def total(self) -> int:
+        """Number of events in the bins."""
+        return int(self.counts.sum())
+
+
+def _contiguous_edges(low: np.ndarray, high: np.ndarray, name: str) -> np.ndarray:
+    low = np.asarray(low, dtype=np.float64).ravel()
+    high = np.asarray(high, dtype=np.float64).ravel()
+    if len(low) == 0 or len(low) != len(high):
+        raise ValueError(f"{name}_LO and {name}_HI must have the same, non-zero size")
+    if np.any(low >= high) or not np.array_equal(low[1:], high[:-1]):
+        raise ValueError(f"{name} bins must be increasing and contiguous")
+    return np.append(low, high[-1])
+
+
+def irf_edges(
+    path: str | Path, hdu: str = "EFFECTIVE_AREA", version: int | None = None
+) -> BinEdges:
+    """Return the energy and offset bin edges of an effective area HDU.
+
+    Parameters
+    ----------
+    path: str | Path
+        IRF file, local, remote or compressed. Its index sidecar is used to
+        find the HDU if there is one (see `vodftools.io.index`).
+    hdu: str
+        EXTNAME of the HDU
+    version: int | None
+        EXTVER of the HDU, by default the first one
+
+    Raises
+    ------
+    ValueError:
+        if the bins are not contiguous
+    """
+    with open_file(path) as fileobj:
+        info = find_hdu(fileobj, hdu, version=version, index=read_sidecar(path))
+        row = read_rows(fileobj, info, 0, 1)[0]
+    units = {
+        name: str(info.header.get(f"TUNIT{index}", "")).strip()
+        for name, index in _column_cards(info.header).items()
+    }
+    return BinEdges(
+        energy=_contiguous_edges(row["ENERGY_LO"], row["ENERGY_HI"], "ENERGY"),
+        offset=_contiguous_edges(row["OFFSET_LO"], row["OFFSET_HI"], "OFFSET"),
+        energy_unit=units.get("ENERGY_LO") or "TeV",
+        offset_unit=units.get("OFFSET_LO") or "deg",
+    )
+
+
+@dataclass
+class _Task:
+    path: str
+    hdu: str
+    data_offset: int
+    num_rows: int
+    descr: list  #: dtype of a row, as dtype.descr (avoids pickling dtypes)
+    start: int
+    stop: int
+    edges: BinEdges
+    energy_column: str
+    energy_factor: float
+    offset_column: str | None  #: None to compute the offset from RA and DEC
+    offset_factor: float
+    pointing: tuple[float, float] | None = None  #: RA_PNT, DEC_PNT in degrees
+    chunk_rows: int | None = None
+    direct: bool = True  #: whether the file can be mapped into memory
+    #: TSCAL and TZERO of scaled-integer columns, see `vodftools.io.encoding`
+    encoding: dict[str, tuple[float, float]] | None = None
+
+
+def _separation(ra, dec, ra0: float, dec0: float) -> np.ndarray:
+    """Return the angular distances (deg) of directions to (ra0, dec0)."""
+    ra, dec = np.radians(ra), np.radians(dec)
+    ra0, dec0 = np.radians(ra0), np.radians(dec0)
+    # haversine formula, accurate at small distances
+    term = np.sin((dec - dec0) / 2) ** 2
+    term += np.cos(dec) * np.cos(dec0) * np.sin((ra - ra0) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(term, 0, 1))))
+
+
+def _bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Return the bin of each value, with bins [edges[i], edges[i + 1])."""
+    # values out of range (or NaN) get -1 or len(edges) - 1
+    return np.searchsorted(edges, values, side="right") - 1
+
+
+def _histogram(rows: np.ndarray, task: _Task) -> np.ndarray:
+    energy = rows[task.energy_column].astype(np.float64) * task.energy_factor
+    if task.offset_column is not None:
+        offset = rows[task.offset_column].astype(np.float64) * task.offset_factor
+    else:
+        offset = _separation(rows["RA"], rows["DEC"], *task.pointing)
+        offset *= task.offset_factor
+
+    num_energy, num_offset = task.edges.shape
+    energy_bin = _bin_index(energy, task.edges.energy)
+    offset_bin = _bin_index(offset, task.edges.offset)
+    inside = (energy_bin >= 0) & (energy_bin < num_energy)
+    inside &= (offset_bin >= 0) & (offset_bin < num_offset)
+    flat = energy_bin[inside] * num_offset + offset_bin[inside]
+    return np.bincount(flat, minlength=num_energy * num_offset)
+
+
+def _chunks(task: _Task):
+    dtype = np.dtype(task.descr)
+    chunk_rows = task.chunk_rows or chunk_rows_for(dtype.itemsize)
+    if task.direct:
+        data = np.memmap(
+            task.path,
+            dtype=dtype,
+            mode="r",
+            offset=task.data_offset,
+            shape=(task.num_rows,),
+        )
+        for start in range(task.start, task.stop, chunk_rows):
+            yield data[start : min(start + chunk_rows, task.stop)]
+        return
+    with open_file(task.path) as fileobj:
+        hdu = find_hdu(fileobj, task.hdu)
+        yield from iter_chunks(
+            fileobj, hdu, chunk_rows=chunk_rows, start=task.start, stop=task.stop
+        )
+
+
+def _run_task(task: _Task) -> np.ndarray:
+    counts = np.zeros(task.edges.shape[0] * task.edges.shape[1], dtype=np.int64)
+    for rows in _chunks(task):
+        counts += _histogram(decode_chunk(rows, task.encoding or {}), task)
+    return counts
+
+
+def _tasks(
+    path: str,
+    hdu: str,
+    edges: BinEdges,
+    energy_column: str,
+    offset_column: str,
+    chunk_rows: int | None,
+    task_rows: int,
+):
+    with open_file(path) as fileobj:
+        info = find_hdu(fileobj, hdu, index=read_sidecar(path))
+        direct = not is_remote(path) and not is_compressed(fileobj)
+    header = info.header
+    dtype = table_dtype(header)
+    units = {
+        name: str(header.get(f"TUNIT{index}", "")).strip()
+        for name, index in _column_cards(header).items()
+    }
+
+    def factor(column: str, unit: str) -> float:
+        if column not in dtype.names:
+            raise KeyError(f"no column {column} in HDU '{hdu}' of {path}")
+        return conversion_factor(units.get(column) or unit, unit)
+
+    energy_factor = factor(energy_column, edges.energy_unit)
+    offset_factor, pointing = 1.0, None
+    if offset_column in dtype.names:
+        offset_factor = factor(offset_column, edges.offset_unit)
+    elif {"RA", "DEC"} <= set(dtype.names) and "RA_PNT" in header:
+        pointing = (float(header["RA_PNT"]), float(header["DEC_PNT"]))
+        offset_factor = conversion_factor("deg", edges.offset_unit)
+        offset_column = None
+    else:
+        raise KeyError(
+            f"no column {offset_column}, nor RA, DEC and RA_PNT, DEC_PNT"
+            f" in HDU '{hdu}' of {path}"
+        )
+
+    # compressed and remote files are read from the start, so in one task
+    step = task_rows if direct else max(info.num_rows, 1)
+    for start in range(0, info.num_rows, step):
+        yield _Task(
+            path=path,
+            hdu=hdu,
+            data_offset=info.data_offset,
+            num_rows=info.num_rows,
+            descr=dtype.descr,
+            start=start,
+            stop=min(start + step, info.num_rows),
+            edges=edges,
+            energy_column=energy_column,
+            energy_factor=energy_factor,
+            offset_column=offset_column,
+            offset_factor=offset_factor,
+            pointing=pointing,
+            chunk_rows=chunk_rows,
+            direct=direct,
+            encoding=encoding_plan(header),
+        )
+
+
+def bin_events(
+    paths: Iterable[str | Path],
+    edges: BinEdges,
+    workers: int | None = None,
+    chunk_rows: int | None = None,
+    task_rows: int = 4_000_000,
+    hdu: str = "EVENTS",
+    energy_column: str = "ENERGY",
+    offset_column: str = "OFFSET",
+) -> CountsCube:
+    """Count the events of files in energy and offset bins.
+
+    Parameters
+    ----------
+    paths: Iterable[str | Path]
+        event files, local, remote or compressed
+    edges: BinEdges
+        the bins, usually from `irf_edges`. Events outside of them, or with a
+        NaN energy or offset, are not counted.
+    workers: int | None
+        number of worker processes, by default the number of CPUs. With 1,
+        everything runs in the current process.
+    chunk_rows: int | None
+        number of rows binned at once, by default as many as fit in the
+        memory budget (see `vodftools.io.memory`)
+    task_rows: int
+        number of rows of a file given to a worker at once
+    hdu: str
+        EXTNAME of the event table
+    energy_column, offset_column: str
+        columns of the reconstructed energy and offset, converted to the units
+        of the edges. Without an offset column, the offset is computed from
+        the RA and DEC columns (in degrees) and the RA_PNT and DEC_PNT keywords.
+    """
+    tasks = []
+    for path in paths:
+        tasks.extend(
+            _tasks(
+                str(path),
+                hdu,
+                edges,
+                energy_column,
+                offset_column,
+                chunk_rows,
+                task_rows,
+            )
+        )
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        partials = [_run_task(task) for task in tasks]
+    else:
+        # fork is not safe in multithreaded programs, such as the validation service
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            partials = list(pool.map(_run_task, tasks))
+
+    counts = np.zeros(edges.shape[0] * edges.shape[1], dtype=np.int64)
+    for partial in partials:
+        counts += partial
+    return CountsCube(
+        edges=edges,
+        counts=counts.reshape(edges.shape),
+        num_events=sum(task.stop - task.start for task in tasks),
+    )
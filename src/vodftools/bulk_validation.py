@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+"""
+Header validation of many files at once.
+
+Instead of checking each keyword of each file in turn (as
+`~vodftools.validation.validate_file` does), the headers of one HDU type are
+first collected from all files into a `HeaderTable`, with one column per
+keyword. Each rule of the schema is then checked for all files with one
+vectorized operation: presence masks, string comparisons and `numpy.isin`
+for fixed and allowed values, type checks on the column of value types,
+bulk ISO time parsing, and unit checks done once per distinct unit string.
+The result is a `ViolationMatrix` of files by rules.
+
+.. code-block:: python
+
+    from vodftools.bulk_validation import collect_headers, validate_headers
+    from vodftools.models.level1 import event_list_hdu
+
+    table = collect_headers(paths, event_list_hdu, workers=16)
+    matrix = validate_headers(table, event_list_hdu)
+    print(matrix.counts())
+"""
+
+import re
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from astropy import units as u
+from astropy.table import Table
+
+from .io.bintable import scan_hdus
+from .io.remote import open_file
+from .io.units import conversion_factor
+from .schema import (
+    DataType,
+    Extension,
+    Header,
+    TableExtension,
+    iter_columns,
+    iter_headers,
+)
+from .times import parse_isot
+from .validation import (
+    Finding,
+    Severity,
+    _column_cards,
+    _extension_matches,
+    _is_uuid,
+)
+
+__all__ = [
+    "HeaderTable",
+    "Rule",
+    "ViolationMatrix",
+    "collect_headers",
+    "validate_headers",
+]
+
+_UNIT_COMMENT = re.compile(r"^\s*\[([^\]]*)\]")
+
+
+@dataclass
+class HeaderTable:
+    """Header keywords of one HDU type in many files, one array per keyword.
+
+    Values are object arrays, with None where a file has no such keyword (or
+    no such HDU, see ``found``).
+    """
+
+    paths: list[str]
+    found: np.ndarray  #: whether each file has the HDU
+    values: dict[str, np.ndarray]  #: keyword values, by keyword
+    comments: dict[str, np.ndarray]  #: keyword comments, by keyword
+    column_units: dict[str, np.ndarray]  #: TUNITn of each column, by column name
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.paths)
+
+    def present(self, key: str) -> np.ndarray:
+        """Return a mask of the files having keyword key."""
+        values = self.values.get(key)
+        if values is None:
+            return np.zeros(len(self), dtype=bool)
+        return values != None  # noqa: E711, elementwise comparison
+
+
+def _read_header(path: str, extension: Extension, keys: list[str]):
+    with open_file(path) as fileobj:
+        for hdu in scan_hdus(fileobj):
+            header = hdu.header
+            if hdu.index == 0 or not _extension_matches(
+                extension, header.get("EXTNAME"), header.get("EXTVER", 1)
+            ):
+                continue
+            values = {key: header[key] for key in keys if key in header}
+            comments = {key: header.comments[key] for key in values}
+            units = {}
+            for name, index in _column_cards(header).items():
+                if f"TUNIT{index}" in header:
+                    units[name] = str(header[f"TUNIT{index}"]).strip()
+            return values, comments, units
+    return None
+
+
+def collect_headers(
+    paths: Iterable[str | Path],
+    extension: Extension,
+    workers: int | None = None,
+) -> HeaderTable:
+    """Read the header of the HDU described by extension in each file.
+
+    Only the keywords and columns of the extension are kept. Headers are
+    read in parallel threads; files can be local, remote or compressed.
+    """
+    paths = [str(path) for path in paths]
+    keys = list(dict.fromkeys(h.fits_key.upper() for h in iter_headers(extension)))
+    columns = []
+    if isinstance(extension, TableExtension):
+        columns = [column.name for column in iter_columns(extension)]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        headers = list(
+            pool.map(lambda path: _read_header(path, extension, keys), paths)
+        )
+
+    def column(parts: list[dict], key: str) -> np.ndarray:
+        array = np.empty(len(parts), dtype=object)
+        array[:] = [part.get(key) for part in parts]
+        return array
+
+    empty = ({}, {}, {})
+    values, comments, units = zip(*(h or empty for h in headers)) if paths else [()] * 3
+    return HeaderTable(
+        paths=paths,
+        found=np.array([h is not None for h in headers], dtype=bool),
+        values={key: column(values, key) for key in keys},
+        comments={key: column(comments, key) for key in keys},
+        column_units={name: column(units, name) for name in columns},
+    )
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One check of the schema, e.g. that a keyword has an allowed value."""
+
+    element: str  #: FITS keyword or column name
+    kind: str  #: "required", "value", "allowed", "dtype" or "unit"
+    message: str
+    severity: Severity = Severity.error
+
+    @property
+    def name(self) -> str:
+        """Identifier of the rule, used as column name."""
+        return f"{self.element}:{self.kind}"
+
+
+@dataclass
+class ViolationMatrix:
+    """Result of `validate_headers`: which file violates which rule."""
+
+    extension: str
+    paths: list[str]
+    rules: list[Rule]
+    violations: np.ndarray  #: boolean array of shape (num_files, num_rules)
+
+    @property
+    def ok(self) -> np.ndarray:
+        """Mask of the files without errors."""
+        errors = [rule.severity == Severity.error for rule in self.rules]
+        return ~self.violations[:, errors].any(axis=1)
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of files violating each rule, if not zero."""
+        totals = self.violations.sum(axis=0)
+        return {
+            rule.name: int(total) for rule, total in zip(self.rules, totals) if total
+        }
+
+    def findings(self, index: int) -> list[Finding]:
+        """Return the violations of one file as findings."""
+        return [
+            Finding(self.extension, rule.element, rule.message, rule.severity)
+            for rule, violated in zip(self.rules, self.violations[index])
+            if violated
+        ]
+
+    def to_table(self) -> Table:
+        """Return the matrix as a table, with a path column and one column per rule."""
+        table = Table()
+        table["path"] = self.paths
+        for rule, violated in zip(self.rules, self.violations.T):
+            table[rule.name] = violated
+        return table
+
+
+def _per_unique(strings: np.ndarray, check: Callable[[str], bool]) -> np.ndarray:
+    """Apply check once per distinct string."""
+    unique, inverse = np.unique(strings, return_inverse=True)
+    return np.array([check(string) for string in unique], dtype=bool)[inverse]
+
+
+def _type_mask(values: np.ndarray, dtype: DataType) -> np.ndarray:
+    """Return a mask of values (all present) having the given data type."""
+    # exact type names, so that booleans are not taken for integers
+    types = np.frompyfunc(lambda value: type(value).__name__, 1, 1)(values)
+    types = types.astype(str)
+    if dtype in (DataType.float64, DataType.float32):
+        return np.isin(types, ["int", "float"])
+    if dtype in (DataType.int64, DataType.int32, DataType.int16):
+        return types == "int"
+    if dtype == DataType.uint32:
+        valid = types == "int"
+        valid[valid] = values[valid] >= 0
+        return valid
+    if dtype == DataType.char:
+        return types == "str"
+    if dtype == DataType.isotime:
+        return ~np.isnat(parse_isot(values.astype(str)))
+    if dtype == DataType.uuid:
+        return _per_unique(values.astype(str), _is_uuid)
+    return np.ones(len(values), dtype=bool)
+
+
+def _convertible(unit: str) -> Callable[[str], bool]:
+    def check(string: str) -> bool:
+        try:
+            conversion_factor(string, unit)
+        except (ValueError, u.UnitsError):
+            return False
+        return True
+
+    return check
+
+
+def _header_rules(table: HeaderTable, header: Header) -> list[tuple[Rule, np.ndarray]]:
+    key = header.fits_key.upper()
+    present = table.present(key)
+    rules = []
+    if header.required:
+        missing = table.found & ~present
+        rules.append((Rule(key, "required", "required keyword is missing"), missing))
+
+    values = table.values[key][present]
+    strings = values.astype(str)
+
+    def violation(mask: np.ndarray) -> np.ndarray:
+        result = np.zeros(len(table), dtype=bool)
+        result[present] = ~mask
+        return result
+
+    if header.value is not None:
+        message = f"value should be '{header.value}'"
+        rules.append((Rule(key, "value", message), violation(strings == header.value)))
+    if header.allowed_values:
+        message = f"value is not one of {header.allowed_values}"
+        allowed = np.isin(strings, header.allowed_values)
+        rules.append((Rule(key, "allowed", message), violation(allowed)))
+    if header.dtype and header.dtype != DataType.none:
+        message = f"value is not of type {header.dtype.name}"
+        valid = _type_mask(values, header.dtype)
+        rules.append((Rule(key, "dtype", message), violation(valid)))
+    if header.unit:
+        # the unit of a keyword may be given in brackets at the start of its comment
+        comments = table.comments[key][present].astype(str)
+        units = np.array(
+            [m[1] if (m := _UNIT_COMMENT.match(c)) else "" for c in comments]
+        )
+        has_unit = units != ""
+        valid = np.ones(len(units), dtype=bool)
+        valid[has_unit] = _per_unique(units[has_unit], _convertible(header.unit))
+        message = f"unit is not convertible to '{header.unit}'"
+        rules.append((Rule(key, "unit", message, Severity.warning), violation(valid)))
+    return rules
+
+
+def _column_rules(table: HeaderTable, extension: TableExtension):
+    rules = []
+    for column in iter_columns(extension):
+        units = table.column_units[column.name]
+        present = units != None  # noqa: E711, elementwise comparison
+        if column.unit is None or not present.any():
+            continue
+        violated = np.zeros(len(table), dtype=bool)
+        valid = _per_unique(units[present].astype(str), _convertible(column.unit))
+        violated[present] = ~valid
+        message = f"unit is not convertible to '{column.unit}'"
+        rules.append((Rule(column.name, "unit", message), violated))
+    return rules
+
+
+def validate_headers(table: HeaderTable, extension: Extension) -> ViolationMatrix:
+    """Check all files of a HeaderTable against the rules of an Extension.
+
+    The rules are the header checks of `~vodftools.validation.validate_header`,
+    plus the units of keywords given in their comments and the units of the
+    table columns. Rules are only evaluated for files having the keyword, and
+    the "required" rules only for files having the HDU. Files missing the HDU
+    violate the "EXTNAME:required" rule if the extension is required.
+    """
+    results = []
+    if extension.required:
+        rule = Rule("EXTNAME", "required", "required HDU is missing")
+        results.append((rule, ~table.found))
+    seen = set()
+    for header in iter_headers(extension):
+        if header.fits_key.upper() not in seen:
+            seen.add(header.fits_key.upper())
+            results.extend(_header_rules(table, header))
+    if isinstance(extension, TableExtension):
+        results.extend(_column_rules(table, extension))
+
+    rules = [rule for rule, _ in results]
+    if results:
+        violations = np.column_stack([violated for _, violated in results])
+    else:
+        violations = np.zeros((len(table), 0), dtype=bool)
+    return ViolationMatrix(
+        extension=extension.name,
+        paths=table.paths,
+        rules=rules,
+        violations=violations,
+    )
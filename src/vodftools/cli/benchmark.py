@@ -0,0 +1,78 @@
+"""Runs the vodftools benchmarks, or compares results to a baseline."""
+
+import sys
+from argparse import ArgumentParser
+
+from vodftools import __version__
+from vodftools.benchmark import (
+    DEFAULT_SCHEMA_SIZES,
+    DEFAULT_SIZES,
+    compare,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+
+parser = ArgumentParser("vodf-benchmark", description=__doc__)
+parser.add_argument("--version", action="version", version=__version__)
+commands = parser.add_subparsers(dest="command", required=True)
+
+run_parser = commands.add_parser("run", help="run benchmarks")
+run_parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+run_parser.add_argument("-o", "--output", type=str, help="output JSON file")
+run_parser.add_argument(
+    "--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of rows"
+)
+run_parser.add_argument(
+    "--schema-sizes",
+    type=int,
+    nargs="+",
+    default=DEFAULT_SCHEMA_SIZES,
+    help="numbers of extensions of synthetic schemas",
+)
+run_parser.add_argument("-r", "--repeat", type=int, default=3)
+run_parser.add_argument("--workdir", type=str, help="directory for generated data")
+
+compare_parser = commands.add_parser("compare", help="compare results to a baseline")
+compare_parser.add_argument("baseline", type=str, help="baseline JSON file")
+compare_parser.add_argument("results", type=str, help="new JSON file")
+compare_parser.add_argument(
+    "-t", "--threshold", type=float, default=0.1, help="tolerated slowdown fraction"
+)
+
+
+def main():
+    """Run or compare benchmarks."""
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(
+            args.names,
+            sizes=args.sizes,
+            schema_sizes=args.schema_sizes,
+            repeat=args.repeat,
+            workdir=args.workdir,
+        )
+        for result in results:
+            rate = (
+                f" {result.rows_per_second:12.0f} rows/s"
+                f" {result.megabytes_per_second:8.1f} MB/s"
+                if result.rows_per_second
+                else ""
+            )
+            print(f"{result.key:40s} {result.best:10.4f} s{rate}")
+        if args.output:
+            save_results(results, args.output)
+        return
+
+    comparison = compare(
+        load_results(args.baseline), load_results(args.results), args.threshold
+    )
+    for key, ratio, slower in comparison:
+        print(f"{key:40s} {ratio:6.2f}x {'SLOWER' if slower else ''}")
+    if any(slower for _, _, slower in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from argparse import ArgumentParser
 
 from vodftools import __version__
 from vodftools.fits_template import fits_template, write_fits_template
-from vodftools.models.level1 import event_file, irf_file
+from vodftools.models.level1 import event_file, irf_file, monitoring_file
 
 parser = ArgumentParser("vodf-make-templates", description=__doc__)
 parser.add_argument(
@@ -17,7 +17,7 @@ def main():
     """Generate templates."""
     args = parser.parse_args()
 
-    for schema in [event_file, irf_file]:
+    for schema in [event_file, irf_file, monitoring_file]:
         if args.output:
             write_fits_template(schema, args.output)
         else:
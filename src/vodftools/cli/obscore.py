@@ -0,0 +1,39 @@
+"""Writes an IVOA ObsCore table describing many VODF files, from their headers."""
+
+from argparse import ArgumentParser
+
+from vodftools import __version__
+from vodftools.obscore import write_obscore
+
+parser = ArgumentParser("vodf-obscore", description=__doc__)
+parser.add_argument("inputs", type=str, nargs="+", help="input files or URLs")
+parser.add_argument(
+    "-o",
+    "--output",
+    type=str,
+    required=True,
+    help="output table (.parquet, .xml, .vot, .csv or .ecsv)",
+)
+parser.add_argument("-c", "--collection", type=str, help="value of obs_collection")
+parser.add_argument(
+    "-j", "--workers", type=int, default=None, help="number of parallel readers"
+)
+parser.add_argument("--overwrite", action="store_true", help="replace the output")
+parser.add_argument("--version", action="version", version=__version__)
+
+
+def main():
+    """Write the table."""
+    args = parser.parse_args()
+    table = write_obscore(
+        args.inputs,
+        args.output,
+        overwrite=args.overwrite,
+        workers=args.workers,
+        collection=args.collection,
+    )
+    print(f"{args.output}: {len(table)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Runs the VODF validation service, keeping the schemas loaded between requests."""
+
+import asyncio
+import logging
+from argparse import ArgumentParser
+
+from vodftools import __version__
+from vodftools.service import ValidationService
+
+parser = ArgumentParser("vodf-serve", description=__doc__)
+parser.add_argument("-s", "--socket", type=str, help="path of the Unix socket")
+parser.add_argument(
+    "-p", "--port", type=int, help="port for HTTP requests on localhost"
+)
+parser.add_argument(
+    "--host", type=str, default="127.0.0.1", help="interface for HTTP requests"
+)
+parser.add_argument(
+    "-j", "--workers", type=int, default=None, help="number of worker processes"
+)
+parser.add_argument("--version", action="version", version=__version__)
+
+
+async def serve(args):
+    """Start the service and run until interrupted."""
+    service = ValidationService(workers=args.workers)
+    service.warm_up()
+    if args.socket:
+        await service.start_unix(args.socket)
+    if args.port is not None:
+        await service.start_http(args.host, args.port)
+    await service.serve_forever()
+
+
+def main():
+    """Run the service."""
+    args = parser.parse_args()
+    if args.socket is None and args.port is None:
+        parser.error("at least one of --socket or --port is required")
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Splits a VODF event file into files covering consecutive time ranges."""
+
+from argparse import ArgumentParser
+
+from vodftools import __version__
+from vodftools.io.stacking import split_by_time
+
+parser = ArgumentParser("vodf-split-events", description=__doc__)
+parser.add_argument("input", type=str, help="input event file")
+parser.add_argument(
+    "-d", "--duration", type=float, required=True, help="shard length in seconds"
+)
+parser.add_argument(
+    "-o", "--output-dir", type=str, default=".", help="directory for the shards"
+)
+parser.add_argument("--version", action="version", version=__version__)
+
+
+def main():
+    """Split the file."""
+    args = parser.parse_args()
+    for path in split_by_time(args.input, args.output_dir, args.duration):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
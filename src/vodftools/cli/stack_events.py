@@ -0,0 +1,21 @@
+"""Stacks the events of many VODF event files into a single file."""
+
+from argparse import ArgumentParser
+
+from vodftools import __version__
+from vodftools.io.stacking import stack_event_files
+
+parser = ArgumentParser("vodf-stack-events", description=__doc__)
+parser.add_argument("inputs", type=str, nargs="+", help="input event files")
+parser.add_argument("-o", "--output", type=str, required=True, help="output file")
+parser.add_argument("--version", action="version", version=__version__)
+
+
+def main():
+    """Stack the files."""
+    args = parser.parse_args()
+    stack_event_files(args.inputs, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Common test fixtures."""
+
+import uuid
+
+import numpy as np
+import pytest
+from astropy.io import fits
+from astropy.time import Time, TimeDelta
+
+MJDREFI = 51910
+MJDREFF = 7.428703703703703e-4
+
+
+def _common_cards(**extra):
+    header = fits.Header()
+    header["ORIGIN"] = "VODF"
+    header["CREATOR"] = "vodftools tests"
+    header["DATE"] = "2024-01-01T00:00:00"
+    header["DATAID"] = str(uuid.uuid4())
+    header["AUTHOR"] = "Tester <test@example.com>"
+    header["MJDREFI"] = MJDREFI
+    header["MJDREFF"] = MJDREFF
+    header["TIMESYS"] = "TT"
+    header["TIMEUNIT"] = "s"
+    header.update(extra)
+    return header
+
+
+def _iso(met):
+    reference = Time(MJDREFI, MJDREFF, format="mjd", scale="tt")
+    return (reference + TimeDelta(met, format="sec")).isot
+
+
+@pytest.fixture()
+def make_event_file(tmp_path):
+    """Return a function that writes a small, valid VODF event file."""
+
+    def make(
+        name="events.fits",
+        n_events=1000,
+        obs_id=1,
+        tstart=1000.0,
+        duration=1800.0,
+        seed=0,
+        soi_intervals=None,
+    ):
+        rng = np.random.default_rng(seed)
+        time = np.sort(rng.uniform(tstart, tstart + duration, n_events))
+        energy = rng.lognormal(0.0, 1.0, n_events).astype(np.float32)
+        tstop = tstart + duration
+
+        events = fits.BinTableHDU.from_columns(
+            [
+                fits.Column("EVENT_ID", "K", array=np.arange(n_events)),
+                fits.Column("TIME", "D", unit="s", array=time),
+                fits.Column("ENERGY", "E", unit="TeV", array=energy),
+            ],
+            name="EVENTS",
+        )
+        events.header.update(
+            _common_cards(
+                HDUCLASS="OGIP",
+                HDUCLAS1="EVENTS",
+                EQUINOX=2000.0,
+                RADECSYS="ICRS",
+                OBS_ID=obs_id,
+                TSTART=tstart,
+                TSTOP=tstop,
+                GEOLON=-17.89,
+                GEOLAT=28.76,
+                ALTITUDE=2200.0,
+            )
+        )
+        events.header["DATE-BEG"] = _iso(tstart)
+        events.header["DATE-END"] = _iso(tstop)
+
+        if soi_intervals is None:
+            half = tstart + duration / 2
+            soi_intervals = [(tstart, half, "IRF_A"), (half, tstop, "IRF_B")]
+        start, stop, irf = zip(*soi_intervals)
+        soi = fits.BinTableHDU.from_columns(
+            [
+                fits.Column("START", "E", unit="s", array=np.array(start)),
+                fits.Column("STOP", "E", unit="s", array=np.array(stop)),
+                fits.Column("IRF", "16A", array=np.array(irf)),
+            ],
+            name="SOI",
+        )
+        soi.header.update(_common_cards(HDUCLASS="VODF", HDUCLAS1="SOI"))
+
+        path = tmp_path / name
+        fits.HDUList([fits.PrimaryHDU(), events, soi]).writeto(path)
+        return path
+
+    return make
+
+
+@pytest.fixture()
+def event_file_path(make_event_file):
+    """Path to a small, valid VODF event file."""
+    return make_event_file()
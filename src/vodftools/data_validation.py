@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+
+"""
+Validation of the values stored in the columns of a FITS file.
+
+Unlike the header checks of `vodftools.validation`, these checks read the
+data, which for a large stacked event list is the dominant cost. The work is
+therefore split into tasks of one column and one range of rows, which are run
+by a pool of worker processes. Each worker maps the file into memory with
+`numpy.memmap`, so only the location of the data is sent to the workers and
+never the data itself: all processes share the same pages of the operating
+system's file cache. The workers return small per-task summaries, which are
+merged into one list of `Finding`.
+
+Gzip-compressed files cannot be mapped, and are read through
+`vodftools.io.compressed` instead: BGZF files are still checked in parallel,
+as each worker can decompress just the blocks of its rows, but plain gzip
+files can only be decompressed in order, so they are checked in one pass in
+the current process.
+
+The checks applied to a column depend on its schema definition:
+
+- floating point columns must be finite,
+- energy columns (UCD ``*.energy``) must be positive,
+- scalar time columns (UCD ``time.*``) should be sorted in increasing order,
+- ``isotime`` columns must contain valid ISO 8601 times.
+"""
+
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from .io.bintable import HDUInfo, scan_hdus, table_dtype
+from .io.compressed import detect_compression, open_compressed
+from .io.encoding import decode_values, encoding_plan
+from .io.memory import chunk_rows_for
+from .schema import Column, DataType, FITSFile, TableExtension, iter_columns
+from .times import parse_isot
+from .validation import Finding, Severity, ValidationReport, find_extension
+
+__all__ = [
+    "column_checks",
+    "validate_table_data",
+    "validate_file_data",
+]
+
+_FLOAT_TYPES = (DataType.float32, DataType.float64)
+
+
+def column_checks(column: Column) -> list[str]:
+    """Return the names of the value checks that apply to a column."""
+    checks = []
+    ucd = column.ucd or ""
+    if column.dtype in _FLOAT_TYPES:
+        checks.append("finite")
+    if ucd.endswith("energy"):
+        checks.append("positive")
+    if ucd.startswith("time") and column.ndims == 0 and column.dtype in _FLOAT_TYPES:
+        checks.append("sorted")
+    if column.dtype == DataType.isotime:
+        checks.append("isotime")
+    return checks
+
+
+@dataclass
+class _Task:
+    path: str
+    data_offset: int
+    num_rows: int
+    descr: list  #: dtype of a row, as dtype.descr (avoids pickling dtypes)
+    column: str
+    checks: list[str]
+    start: int
+    stop: int
+    compression: str | None = None
+    #: TSCAL and TZERO if the column stores scaled integers
+    encoding: tuple[float, float] | None = None
+
+
+@dataclass
+class _Summary:
+    column: str
+    start: int
+    stop: int
+    bad: dict[str, tuple[int, int]]  #: check -> (number of bad rows, first one)
+    first: float | None = None  #: first value, for the order across tasks
+    last: float | None = None  #: last value, for the order across tasks
+
+
+def _bad_rows(check: str, values: np.ndarray) -> np.ndarray:
+    """Return a boolean mask of the rows failing a check."""
+    if check == "finite":
+        bad = ~np.isfinite(values)
+    elif check == "positive":
+        bad = ~(values > 0)
+    elif check == "isotime":
+        bad = np.isnat(parse_isot(values))
+    elif check == "sorted":
+        bad = np.zeros(len(values), dtype=bool)
+        bad[1:] = values[1:] < values[:-1]
+        return bad
+    else:
+        raise ValueError(f"unknown check: {check}")
+    return bad.reshape(len(values), -1).any(axis=1)
+
+
+_MAX_OPEN_FILES = 4
+
+# compressed files and the last rows read from them, by path, modification
+# time and size, so that a file rewritten in place is never read from a stale
+# handle
+_open_files: OrderedDict[tuple[str, int, int], BinaryIO] = OrderedDict()
+_last_rows = {}
+
+
+def _file_key(path: str) -> tuple[str, int, int]:
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def _open_compressed(key: tuple[str, int, int]) -> BinaryIO:
+    # kept open between tasks, so that the index of a BGZF file is built once
+    # per worker
+    if key in _open_files:
+        _open_files.move_to_end(key)
+    else:
+        if len(_open_files) >= _MAX_OPEN_FILES:
+            _open_files.popitem(last=False)[1].close()
+        _open_files[key] = open_compressed(open(key[0], "rb"), workers=1)
+    return _open_files[key]
+
+
+def _clear_caches():
+    """Forget the last rows and close the compressed files kept open."""
+    _last_rows.clear()
+    while _open_files:
+        _open_files.popitem()[1].close()
+
+
+def _read_values(task: _Task) -> np.ndarray:
+    dtype = np.dtype(task.descr)
+    if task.compression is None:
+        data = np.memmap(
+            task.path,
+            dtype=dtype,
+            mode="r",
+            offset=task.data_offset,
+            shape=(task.num_rows,),
+        )
+        return data[task.column][task.start : task.stop]
+
+    # the tasks of the other columns of the same rows are usually next, so
+    # keep the last rows that were decompressed
+    file_key = _file_key(task.path)
+    key = (file_key, task.data_offset, task.start, task.stop)
+    if key not in _last_rows:
+        _last_rows.clear()
+        fileobj = _open_compressed(file_key)
+        fileobj.seek(task.data_offset + task.start * dtype.itemsize)
+        data = fileobj.read((task.stop - task.start) * dtype.itemsize)
+        _last_rows[key] = np.frombuffer(data, dtype=dtype)
+    return _last_rows[key][task.column]
+
+
+def _run_task(task: _Task) -> _Summary:
+    values = _read_values(task)
+    if task.encoding is not None:
+        values = decode_values(values, *task.encoding)
+    summary = _Summary(task.column, task.start, task.stop, bad={})
+    for check in task.checks:
+        bad = _bad_rows(check, values)
+        count = int(np.count_nonzero(bad))
+        if count:
+            summary.bad[check] = (count, task.start + int(np.argmax(bad)))
+    if "sorted" in task.checks and len(values):
+        summary.first, summary.last = float(values[0]), float(values[-1])
+    return summary
+
+
+_MESSAGES = {
+    "finite": ("{count} rows with non-finite values", Severity.error),
+    "positive": ("{count} rows with non-positive values", Severity.error),
+    "sorted": ("{count} rows are not in increasing order", Severity.warning),
+    "isotime": ("{count} rows with invalid ISO times", Severity.error),
+}
+
+
+def _merge(name: str, summaries: list[_Summary]) -> list[Finding]:
+    """Combine the summaries of all tasks into one finding per column and check."""
+    totals: dict[tuple[str, str], list[int]] = {}
+    previous: dict[str, _Summary] = {}
+    for summary in sorted(summaries, key=lambda s: (s.column, s.start)):
+        for check, (count, first_bad) in summary.bad.items():
+            total = totals.setdefault((summary.column, check), [0, first_bad])
+            total[0] += count
+            total[1] = min(total[1], first_bad)
+
+        # rows at the boundary between two tasks are only seen by the merge
+        before = previous.get(summary.column)
+        if summary.first is not None:
+            if before is not None and summary.first < before.last:
+                total = totals.setdefault(
+                    (summary.column, "sorted"), [0, summary.start]
+                )
+                total[0] += 1
+                total[1] = min(total[1], summary.start)
+            previous[summary.column] = summary
+
+    findings = []
+    for (column, check), (count, first_bad) in sorted(totals.items()):
+        message, severity = _MESSAGES[check]
+        findings.append(
+            Finding(
+                name,
+                column,
+                message.format(count=count) + f" (first: row {first_bad})",
+                severity,
+            )
+        )
+    return findings
+
+
+def _tasks(path, hdu: HDUInfo, extension: TableExtension, chunk_rows: int, compression):
+    dtype = table_dtype(hdu.header)
+    encoding = encoding_plan(hdu.header)
+    for column in iter_columns(extension):
+        checks = column_checks(column)
+        if not checks or column.name not in dtype.names:
+            continue
+        for start in range(0, hdu.num_rows, chunk_rows):
+            yield _Task(
+                path=str(path),
+                data_offset=hdu.data_offset,
+                num_rows=hdu.num_rows,
+                descr=dtype.descr,
+                column=column.name,
+                checks=checks,
+                start=start,
+                stop=min(start + chunk_rows, hdu.num_rows),
+                compression=compression,
+                encoding=encoding.get(column.name),
+            )
+
+
+def _run(tasks: list[_Task], workers: int) -> list[_Summary]:
+    try:
+        if any(task.compression == "gzip" for task in tasks):
+            # read each range of rows once, in the order of the file
+            order = sorted(
+                range(len(tasks)), key=lambda i: (tasks[i].data_offset, tasks[i].start)
+            )
+            summaries = [None] * len(tasks)
+            for index in order:
+                summaries[index] = _run_task(tasks[index])
+            return summaries
+        if workers == 1 or len(tasks) <= 1:
+            return [_run_task(task) for task in tasks]
+        # fork is not safe in multithreaded programs, such as the validation service
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            return list(pool.map(_run_task, tasks))
+    finally:
+        # tasks run in this process keep files open, which may change by the next run
+        _clear_caches()
+
+
+def validate_table_data(
+    path: str | Path,
+    hdu: HDUInfo,
+    extension: TableExtension,
+    workers: int | None = None,
+    chunk_rows: int | None = None,
+) -> list[Finding]:
+    """Check the values of the columns of one BINTABLE.
+
+    Parameters
+    ----------
+    path: str | Path
+        FITS file containing the table, possibly gzip-compressed
+    hdu: HDUInfo
+        location of the table in the file, see `vodftools.io.bintable.scan_hdus`
+    extension: TableExtension
+        schema of the table
+    workers: int | None
+        number of worker processes, by default the number of CPUs. With 1,
+        everything runs in the current process.
+    chunk_rows: int | None
+        number of rows checked by each task, by default as many as fit in
+        the memory budget shared by all workers
+    """
+    workers = workers or os.cpu_count()
+    chunk_rows = chunk_rows or chunk_rows_for(hdu.row_size, workers=workers)
+    with open(path, "rb") as infile:
+        compression = detect_compression(infile)
+    tasks = list(_tasks(path, hdu, extension, chunk_rows, compression))
+    return _merge(extension.name, _run(tasks, workers))
+
+
+def validate_file_data(
+    path: str | Path,
+    schema: FITSFile,
+    workers: int | None = None,
+    chunk_rows: int | None = None,
+) -> ValidationReport:
+    """Check the column values of all tables of a file described by a schema.
+
+    The tasks of all tables share one pool of worker processes. Header checks
+    are not included, see `vodftools.validation.validate_file`.
+
+    Parameters
+    ----------
+    path: str | Path
+        FITS file to check, possibly gzip-compressed
+    schema: FITSFile
+        schema the file should follow
+    workers: int | None
+        number of worker processes, by default the number of CPUs
+    chunk_rows: int | None
+        number of rows checked by each task
+    """
+    workers = workers or os.cpu_count()
+    report = ValidationReport(path=str(path), schema=schema.name)
+
+    tables = []
+    with open(path, "rb") as infile:
+        compression = detect_compression(infile)
+    with open_compressed(open(path, "rb")) as infile:
+        for hdu in scan_hdus(infile):
+            extension = find_extension(schema, hdu.header)
+            if extension is not None and hdu.num_rows:
+                tables.append((hdu, extension))
+
+    groups = [
+        list(
+            _tasks(
+                path,
+                hdu,
+                extension,
+                chunk_rows or chunk_rows_for(hdu.row_size, workers=workers),
+                compression,
+            )
+        )
+        for hdu, extension in tables
+    ]
+    summaries = iter(_run([task for group in groups for task in group], workers))
+    for (_, extension), group in zip(tables, groups):
+        group_summaries = [next(summaries) for _ in group]
+        report.findings.extend(_merge(extension.name, group_summaries))
+    return report
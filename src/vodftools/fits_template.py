@@ -10,6 +10,9 @@ The results can be printed as follows, assuming schema is an object from schema.
 
     print("\n".join(fits_template(schema)))
 
+Headers, columns and their groups are rendered once per distinct content (see
+`~vodftools.schema.fingerprint`), and the lines are reused wherever the same
+fragment appears again, e.g. the common header groups of every extension.
 """
 
 import textwrap
@@ -28,6 +31,7 @@ from .schema import (
     HeaderGroup,
     SchemaElement,
     TableExtension,
+    fingerprint,
 )
 from .visitor import Visitor
 
@@ -105,7 +109,7 @@ def write_fits_template(schema: SchemaElement, output_file: Path, **kwargs) -> N
 
 
 #!/usr/bin/env python3
-@fits_template.generator(Header)
+@fits_template.generator(Header, key=fingerprint)
 def _(hdr: Header, opts):
     extra = ""
     if hdr.unit:
@@ -122,7 +126,7 @@ def _(hdr: Header, opts):
         yield f"HIERARCH {hdr.fits_key.upper()} = /{extra} {hdr.description+optional:50s}"
 
 
-@fits_template.generator(HeaderGroup)
+@fits_template.generator(HeaderGroup, key=fingerprint)
 def _(grp, opts):
     yield ""
     yield "/ " + "=" * 78
@@ -162,11 +166,22 @@ def _(hdu, opts):
         yield from fits_template(header, opts)
 
 
-@fits_template.generator(Column)
+@fits_template.generator(Column, key=fingerprint)
 def _(col, opts):
     optional = " (OPTIONAL) " if col.required is False else ""
     yield f"TTYPE# = {col.name:20s} / {col.description+optional:.70s}"
-    yield f"TFORM# = {_TYPE_TO_FITS[col.dtype]:20s} / {col.dtype.name}"
+    if col.encoding:
+        encoding = col.encoding
+        tform = _TYPE_TO_FITS[encoding.storage]
+        yield f"TFORM# = {tform:20s} / {col.dtype.name}, as {encoding.storage.name}"
+        yield f"TSCAL# = {encoding.scale!r:20s} / value = TZERO + TSCAL * stored value"
+        if encoding.reference:
+            reference = encoding.reference.upper()
+            yield f"TZERO# = {0.0!r:20s} / set to the value of {reference}"
+        else:
+            yield f"TZERO# = {encoding.zero!r:20s}"
+    else:
+        yield f"TFORM# = {_TYPE_TO_FITS[col.dtype]:20s} / {col.dtype.name}"
     if col.unit:
         yield (
             f"TUNIT# = {u.Unit(col.unit).to_string('fits'):20s}"
@@ -181,7 +196,7 @@ def _(col, opts):
     yield ""  # spacer
 
 
-@fits_template.generator(ColumnGroup)
+@fits_template.generator(ColumnGroup, key=fingerprint)
 def _(grp, opts):
     yield ""
     yield "/ " + "-" * 60
@@ -0,0 +1,2 @@
+#!/usr/bin/env python3
+"""Reading and writing of VODF data files."""
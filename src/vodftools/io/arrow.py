@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+"""
+Conversion of VODF tables to Apache Arrow and Parquet.
+
+Tables are converted one chunk at a time into Arrow record batches, which are
+written as Parquet row groups, so memory use is bounded by the chunk size. The
+column metadata of the schema (unit, UCD, description and VODF data type) is
+stored as Arrow field metadata, and the complete FITS header is stored in the
+schema metadata, so that no information is lost and the Parquet file can be
+checked with the same validator as the original FITS file (see
+`validate_parquet`).
+
+This module requires the optional ``pyarrow`` dependency.
+"""
+
+import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from astropy.io import fits
+
+from ..schema import TableExtension, iter_columns
+from ..validation import Finding, validate_hdu_header
+from .bintable import HDUInfo, find_hdu, iter_chunks, table_dtype, table_header
+from .encoding import decode_chunk, encoding_plan
+from .memory import chunk_rows_for
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as err:
+    raise ImportError(
+        "vodftools.io.arrow requires pyarrow, install it with "
+        "'pip install vodftools[arrow]'"
+    ) from err
+
+__all__ = [
+    "arrow_schema",
+    "to_record_batch",
+    "iter_record_batches",
+    "write_parquet",
+    "parquet_header",
+    "validate_parquet",
+]
+
+
+def _field_metadata(column, unit) -> dict[bytes, bytes]:
+    metadata = {}
+    if unit:
+        metadata[b"unit"] = str(unit).encode()
+    if column is not None:
+        metadata[b"description"] = column.description.encode()
+        metadata[b"dtype"] = column.dtype.value.encode()
+        if column.ucd:
+            metadata[b"ucd"] = column.ucd.encode()
+    return metadata
+
+
+def _arrow_type(field: np.dtype) -> pa.DataType:
+    base = field.base
+    if base.kind == "S":
+        value_type = pa.string()
+    else:
+        value_type = pa.from_numpy_dtype(base.newbyteorder("="))
+    if field.shape:
+        return pa.list_(value_type, int(np.prod(field.shape)))
+    return value_type
+
+
+def arrow_schema(
+    header: fits.Header, extension: TableExtension | None = None
+) -> pa.Schema:
+    """Return the Arrow schema for a BINTABLE, with the VODF column metadata.
+
+    Scaled-integer columns (see `vodftools.io.encoding`) have the type of
+    their decoded values.
+
+    Parameters
+    ----------
+    header: fits.Header
+        header of the BINTABLE
+    extension: TableExtension | None
+        schema of the table, used to add descriptions and UCDs of columns
+    """
+    empty = np.empty(0, dtype=table_dtype(header))
+    dtype = decode_chunk(empty, encoding_plan(header)).dtype
+    columns = {col.name: col for col in iter_columns(extension)} if extension else {}
+
+    fields = []
+    for index, name in enumerate(dtype.names, start=1):
+        field = dtype[name]
+        unit = header.get(f"TUNIT{index}")
+        metadata = _field_metadata(columns.get(name), unit)
+        if field.ndim:
+            metadata[b"shape"] = ",".join(str(dim) for dim in field.shape).encode()
+        if field.base.kind == "S":
+            # Arrow strings have no fixed width, unlike FITS character columns
+            metadata[b"width"] = str(field.base.itemsize).encode()
+        fields.append(pa.field(name, _arrow_type(field), metadata=metadata))
+
+    metadata = {b"fits_header": header.tostring().encode("ascii")}
+    if extension is not None:
+        metadata[b"vodf_extension"] = extension.name.encode()
+    return pa.schema(fields, metadata=metadata)
+
+
+def _to_array(values: np.ndarray, field: pa.Field) -> pa.Array:
+    if values.dtype.kind == "S":
+        strings = np.char.rstrip(np.char.decode(values, "ascii"), " \0")
+        return pa.array(strings, type=pa.string())
+    values = np.ascontiguousarray(values, dtype=values.dtype.base.newbyteorder("="))
+    if values.ndim > 1:
+        flat = pa.array(values.reshape(-1))
+        return pa.FixedSizeListArray.from_arrays(flat, field.type.list_size)
+    return pa.array(values)
+
+
+def to_record_batch(
+    chunk: np.ndarray, schema: pa.Schema, pool: ThreadPoolExecutor | None = None
+) -> pa.RecordBatch:
+    """Convert a chunk of rows (a structured array) to an Arrow record batch.
+
+    If a thread pool is given, columns are converted in parallel.
+    """
+    mapper = pool.map if pool is not None else map
+    arrays = mapper(lambda field: _to_array(chunk[field.name], field), schema)
+    return pa.RecordBatch.from_arrays(list(arrays), schema=schema)
+
+
+def iter_record_batches(
+    fileobj,
+    hdu: HDUInfo,
+    extension: TableExtension | None = None,
+    chunk_rows: int | None = None,
+    max_workers: int | None = None,
+) -> Iterator[pa.RecordBatch]:
+    """Yield the rows of a BINTABLE as Arrow record batches.
+
+    The next chunk is read from disk while the current one is being converted,
+    and columns are converted in parallel using max_workers threads.
+    """
+    schema = arrow_schema(hdu.header, extension)
+    encoding = encoding_plan(hdu.header)
+    max_workers = max_workers or os.cpu_count()
+    # the chunk being read, the one being converted, its Arrow arrays and
+    # their encoded form are in memory at the same time
+    chunk_rows = chunk_rows or chunk_rows_for(hdu.row_size, copies=4)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            chunks = iter_chunks(fileobj, hdu, chunk_rows=chunk_rows)
+            pending = reader.submit(next, chunks, None)
+            while (chunk := pending.result()) is not None:
+                pending = reader.submit(next, chunks, None)
+                yield to_record_batch(decode_chunk(chunk, encoding), schema, pool)
+
+
+def write_parquet(
+    path: str | Path,
+    output: str | Path,
+    extension: TableExtension | None = None,
+    hdu: str = "EVENTS",
+    chunk_rows: int | None = None,
+    compression: str = "zstd",
+    max_workers: int | None = None,
+) -> Path:
+    """Convert a table of a FITS file to Parquet, one row group per chunk.
+
+    Parameters
+    ----------
+    path: str | Path
+        input FITS file
+    output: str | Path
+        output Parquet file
+    extension: TableExtension | None
+        schema of the table. Its column descriptions and UCDs are stored in
+        the field metadata.
+    hdu: str
+        EXTNAME of the table to convert
+    chunk_rows: int | None
+        number of rows per row group
+    compression: str
+        Parquet compression codec
+    max_workers: int | None
+        number of threads used to convert columns. This does not change the
+        global thread pool of pyarrow.
+    """
+    with open(path, "rb") as infile:
+        info = find_hdu(infile, hdu)
+        schema = arrow_schema(info.header, extension)
+        with pq.ParquetWriter(output, schema, compression=compression) as writer:
+            for batch in iter_record_batches(
+                infile, info, extension, chunk_rows, max_workers
+            ):
+                writer.write_batch(batch, row_group_size=batch.num_rows)
+    return Path(output)
+
+
+def _numpy_dtype(field: pa.Field) -> np.dtype | tuple:
+    value_type = field.type
+    shape = ()
+    if pa.types.is_fixed_size_list(value_type):
+        shape = tuple(int(dim) for dim in field.metadata[b"shape"].split(b","))
+        value_type = value_type.value_type
+    if pa.types.is_string(value_type):
+        width = (field.metadata or {}).get(b"width", b"1")
+        base = np.dtype(f"S{int(width)}")
+    else:
+        base = np.dtype(value_type.to_pandas_dtype())
+    return (base, shape) if shape else base
+
+
+def parquet_header(path: str | Path) -> fits.Header:
+    """Rebuild the FITS header of a table converted with `write_parquet`.
+
+    The structural keywords (TFORMn, ...) are derived from the Arrow types of
+    the Parquet file, and the units from the field metadata, so that changes
+    made to the Parquet file are reflected.
+    """
+    schema = pq.read_schema(path)
+    original = fits.Header.fromstring(schema.metadata[b"fits_header"].decode("ascii"))
+    dtype = np.dtype([(field.name, _numpy_dtype(field)) for field in schema])
+    header = table_header(dtype, original, num_rows=pq.read_metadata(path).num_rows)
+
+    for index, field in enumerate(schema, start=1):
+        # values are stored decoded
+        header.remove(f"TSCAL{index}", ignore_missing=True)
+        header.remove(f"TZERO{index}", ignore_missing=True)
+        header.remove(f"TUNIT{index}", ignore_missing=True)
+        if field.metadata and b"unit" in field.metadata:
+            header[f"TUNIT{index}"] = field.metadata[b"unit"].decode()
+    return header
+
+
+def validate_parquet(path: str | Path, extension: TableExtension) -> list[Finding]:
+    """Check a Parquet file converted by `write_parquet` against an Extension."""
+    return validate_hdu_header(parquet_header(path), extension)
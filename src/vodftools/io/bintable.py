@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+
+"""
+Low-level, streaming access to FITS binary tables.
+
+Unlike `astropy.io.fits`, which reads or memory-maps whole tables, the
+functions here only ever hold one chunk of rows in memory. Headers are parsed
+by `scan_hdus`, which reads just the header blocks of each HDU and skips over
+the data sections, and rows are read with `iter_chunks` and written with
+`BinTableWriter`. All functions work on plain binary file objects.
+
+Variable-length array columns (TFORM ``P`` and ``Q``) are not supported.
+"""
+
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+from astropy.io import fits
+
+from .memory import chunk_rows_for
+
+__all__ = [
+    "BLOCK_SIZE",
+    "HDUInfo",
+    "scan_hdus",
+    "read_header_blocks",
+    "read_hdu",
+    "find_hdu",
+    "table_dtype",
+    "table_header",
+    "iter_chunks",
+    "read_rows",
+    "read_columns",
+    "write_primary",
+    "BinTableWriter",
+]
+
+#: size of a FITS block in bytes
+BLOCK_SIZE = 2880
+
+_CARD_SIZE = 80
+_END_CARD = b"END" + b" " * 77
+
+_TFORM_REGEXP = re.compile(r"^\s*(\d*)([LXBIJKAEDCMPQ])")
+
+_TFORM_TO_NUMPY = {
+    "L": "i1",
+    "B": "u1",
+    "I": ">i2",
+    "J": ">i4",
+    "K": ">i8",
+    "E": ">f4",
+    "D": ">f8",
+    "C": ">c8",
+    "M": ">c16",
+}
+
+_NUMPY_TO_TFORM = {
+    ("b", 1): "L",
+    ("i", 1): "L",
+    ("u", 1): "B",
+    ("i", 2): "I",
+    ("i", 4): "J",
+    ("i", 8): "K",
+    ("f", 4): "E",
+    ("f", 8): "D",
+    ("c", 8): "C",
+    ("c", 16): "M",
+}
+
+
+def _padded(size: int) -> int:
+    return -(-size // BLOCK_SIZE) * BLOCK_SIZE
+
+
+@dataclass
+class HDUInfo:
+    """Location of an HDU in a FITS file."""
+
+    index: int  #: position of the HDU in the file (0 is the primary HDU)
+    header: fits.Header
+    header_offset: int  #: byte offset of the start of the header
+    data_offset: int  #: byte offset of the start of the data
+    data_size: int  #: size of the data in bytes, without padding
+
+    @property
+    def name(self) -> str:
+        """EXTNAME of the HDU, or PRIMARY."""
+        return self.header.get("EXTNAME", "PRIMARY" if self.index == 0 else "")
+
+    @property
+    def version(self) -> int:
+        """EXTVER of the HDU."""
+        return self.header.get("EXTVER", 1)
+
+    @property
+    def end_offset(self) -> int:
+        """Byte offset just after the (padded) data of this HDU."""
+        return self.data_offset + _padded(self.data_size)
+
+    @property
+    def num_rows(self) -> int:
+        """Number of rows, for tables."""
+        return self.header.get("NAXIS2", 0)
+
+    @property
+    def row_size(self) -> int:
+        """Size of one row in bytes, for tables."""
+        return self.header.get("NAXIS1", 0)
+
+
+def _data_size(header: fits.Header) -> int:
+    naxis = header.get("NAXIS", 0)
+    if naxis == 0:
+        return 0
+    size = 1
+    for axis in range(1, naxis + 1):
+        size *= header[f"NAXIS{axis}"]
+    size += header.get("PCOUNT", 0)
+    return abs(header["BITPIX"]) // 8 * header.get("GCOUNT", 1) * size
+
+
+def read_header_blocks(fileobj: BinaryIO) -> bytes | None:
+    """Read header blocks up to and including the one containing END.
+
+    Returns None at the end of the file.
+    """
+    blocks = []
+    while True:
+        block = fileobj.read(BLOCK_SIZE)
+        if not block:
+            return None
+        if len(block) < BLOCK_SIZE:
+            raise OSError("truncated FITS header")
+        blocks.append(block)
+        cards = range(0, BLOCK_SIZE, _CARD_SIZE)
+        if any(block[ii : ii + _CARD_SIZE] == _END_CARD for ii in cards):
+            return b"".join(blocks)
+
+
+def scan_hdus(fileobj: BinaryIO, start: int = 0) -> Iterator[HDUInfo]:
+    """Yield the header and location of every HDU, without reading any data.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        binary file object, which must support ``seek``
+    start: int
+        byte offset at which to start scanning
+    """
+    offset = start
+    index = 0
+    while True:
+        fileobj.seek(offset)
+        raw = read_header_blocks(fileobj)
+        if raw is None:
+            return
+        header = fits.Header.fromstring(raw.decode("ascii"))
+        info = HDUInfo(
+            index=index,
+            header=header,
+            header_offset=offset,
+            data_offset=offset + len(raw),
+            data_size=_data_size(header),
+        )
+        yield info
+        offset = info.end_offset
+        index += 1
+
+
+def read_hdu(fileobj: BinaryIO, header_offset: int, index: int = 0) -> HDUInfo:
+    """Read the header of the HDU starting at header_offset, and nothing else.
+
+    index is the position of the HDU in the file, as recorded in an index
+    (see `vodftools.io.index`).
+    """
+    info = next(scan_hdus(fileobj, start=header_offset), None)
+    if info is None:
+        raise OSError(f"no HDU at offset {header_offset}")
+    info.index = index
+    return info
+
+
+def find_hdu(
+    fileobj: BinaryIO, name: str, version: int | None = None, index=None
+) -> HDUInfo:
+    """Return the first HDU with the given EXTNAME (and EXTVER if given).
+
+    If index (a `~vodftools.io.index.FileIndex` of the file) is given, the
+    header of the HDU is read directly at its offset, instead of walking
+    through all the HDUs before it.
+
+    Raises
+    ------
+    KeyError:
+        if there is no such HDU
+    """
+    if index is not None:
+        entry = index.find(name, version)
+        return read_hdu(fileobj, entry.header_offset, entry.index)
+    for info in scan_hdus(fileobj):
+        if info.name == name and (version is None or info.version == version):
+            return info
+    raise KeyError(f"HDU '{name}' (version {version}) not found")
+
+
+def table_dtype(header: fits.Header) -> np.dtype:
+    """Return the (big-endian) numpy dtype of one row of a BINTABLE."""
+    names, formats = [], []
+    for index in range(1, header["TFIELDS"] + 1):
+        tform = header[f"TFORM{index}"]
+        match = _TFORM_REGEXP.match(tform)
+        if match is None:
+            raise ValueError(f"invalid TFORM{index} = '{tform}'")
+        repeat = int(match.group(1) or 1)
+        code = match.group(2)
+
+        if code in "PQ":
+            raise NotImplementedError("variable-length arrays are not supported")
+        if code == "A":
+            base, shape = f"S{repeat}", ()
+        elif code == "X":
+            base, shape = "u1", ((repeat + 7) // 8,)
+        else:
+            base = _TFORM_TO_NUMPY[code]
+            shape = (repeat,) if repeat != 1 else ()
+            if f"TDIM{index}" in header and shape:
+                dims = header[f"TDIM{index}"].strip("() ").split(",")
+                shape = tuple(int(dim) for dim in reversed(dims))
+
+        names.append(header.get(f"TTYPE{index}", f"col{index}").strip())
+        formats.append((base, shape) if shape else base)
+
+    dtype = np.dtype(dict(names=names, formats=formats))
+    if "NAXIS1" in header and dtype.itemsize != header["NAXIS1"]:
+        raise ValueError(
+            f"row size {dtype.itemsize} does not match NAXIS1={header['NAXIS1']}"
+        )
+    return dtype
+
+
+def _tform(field: np.dtype) -> str:
+    base, shape = field.base, field.shape
+    repeat = int(np.prod(shape)) if shape else 1
+    if base.kind == "S":
+        return f"{base.itemsize * repeat}A"
+    code = _NUMPY_TO_TFORM[(base.kind, base.itemsize)]
+    return f"{repeat}{code}" if repeat != 1 else code
+
+
+def table_header(
+    dtype: np.dtype, template: fits.Header | None = None, num_rows: int = 0
+) -> fits.Header:
+    """Return a BINTABLE header describing rows of the given dtype.
+
+    The structural keywords (NAXISn, TFIELDS, TTYPEn, TFORMn, TDIMn) are derived
+    from the dtype, all other keywords (including TUNITn) are copied from the
+    template.
+    """
+    header = fits.Header()
+    header["XTENSION"] = "BINTABLE"
+    header["BITPIX"] = 8
+    header["NAXIS"] = 2
+    header["NAXIS1"] = dtype.itemsize
+    header["NAXIS2"] = num_rows
+    header["PCOUNT"] = 0
+    header["GCOUNT"] = 1
+    header["TFIELDS"] = len(dtype.names)
+
+    for index, name in enumerate(dtype.names, start=1):
+        field = dtype[name]
+        header[f"TTYPE{index}"] = name
+        header[f"TFORM{index}"] = _tform(field)
+        if field.ndim > 1:
+            dims = ",".join(str(dim) for dim in reversed(field.shape))
+            header[f"TDIM{index}"] = f"({dims})"
+
+    if template is not None:
+        for card in template.cards:
+            if card.keyword not in header and not re.match(
+                r"^T(TYPE|FORM|DIM)\d+$|^(NAXIS\d*|TFIELDS)$", card.keyword
+            ):
+                header.append(card)
+    return header
+
+
+def iter_chunks(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    columns: list[str] | None = None,
+    chunk_rows: int | None = None,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[np.ndarray]:
+    """Yield the rows of a BINTABLE as structured arrays of at most chunk_rows.
+
+    The arrays are writable, and keep the big-endian FITS layout.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        file containing the table
+    hdu: HDUInfo
+        location of the table, from `scan_hdus`
+    columns: list[str] | None
+        only return these columns. Note that complete rows are still read,
+        except from remote files (see `read_columns`) and from the column
+        cache if there is one (see `vodftools.io.colcache`).
+    chunk_rows: int | None
+        number of rows per chunk, by default as many as fit in the memory
+        budget (see `vodftools.io.memory`)
+    start, stop: int
+        range of rows to read
+    """
+    dtype = table_dtype(hdu.header)
+    stop = hdu.num_rows if stop is None else min(stop, hdu.num_rows)
+    cached = _cached_columns(fileobj, hdu, columns)
+    if cached is not None:
+        subset = _subset_dtype(dtype, columns)
+        chunk_rows = chunk_rows or chunk_rows_for(subset.itemsize)
+        for first in range(start, stop, chunk_rows):
+            yield _gather(cached, subset, first, min(chunk_rows, stop - first))
+        return
+
+    chunk_rows = chunk_rows or chunk_rows_for(dtype.itemsize)
+    for first in range(start, stop, chunk_rows):
+        num = min(chunk_rows, stop - first)
+        if columns and hasattr(fileobj, "read_ranges"):
+            yield read_columns(fileobj, hdu, columns, first, num, dtype)
+        else:
+            yield read_rows(fileobj, hdu, first, num, dtype)[
+                columns or list(dtype.names)
+            ]
+
+
+def _cached_columns(
+    fileobj: BinaryIO, hdu: HDUInfo, columns: list[str] | None
+) -> dict[str, np.ndarray] | None:
+    """Return columns from the column cache, or None if they are not cached."""
+    if not columns or "DATASUM" not in hdu.header:
+        return None
+    from .colcache import get_column_cache
+
+    cache = get_column_cache()
+    return cache.columns(fileobj, hdu, columns) if cache is not None else None
+
+
+def _subset_dtype(dtype: np.dtype, columns: list[str]) -> np.dtype:
+    return np.dtype([(name, dtype.fields[name][0]) for name in columns])
+
+
+def _gather(
+    arrays: dict[str, np.ndarray], dtype: np.dtype, first: int, num: int
+) -> np.ndarray:
+    """Copy num rows of cached columns starting at row first into a chunk."""
+    rows = np.empty(num, dtype=dtype)
+    for name in dtype.names:
+        rows[name] = arrays[name][first : first + num]
+    return rows
+
+
+def read_rows(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    first: int,
+    num: int,
+    dtype: np.dtype | None = None,
+) -> np.ndarray:
+    """Read num rows of a BINTABLE starting at row first."""
+    dtype = table_dtype(hdu.header) if dtype is None else dtype
+    buffer = bytearray(num * dtype.itemsize)
+    fileobj.seek(hdu.data_offset + first * dtype.itemsize)
+    if fileobj.readinto(buffer) != len(buffer):
+        raise OSError(f"truncated table data in HDU '{hdu.name}'")
+    return np.frombuffer(buffer, dtype=dtype)
+
+
+def _row_segments(
+    fields: Iterable[tuple[np.dtype, int]], max_gap: int
+) -> list[tuple[int, int]]:
+    """Return the byte ranges of fields within a row, merged if closer than max_gap."""
+    segments = []
+    for field, offset in sorted(fields, key=lambda field: field[1]):
+        stop = offset + field.itemsize
+        if segments and offset - segments[-1][1] <= max_gap:
+            segments[-1] = (segments[-1][0], max(segments[-1][1], stop))
+        else:
+            segments.append((offset, stop))
+    return segments
+
+
+def read_columns(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    columns: list[str],
+    first: int,
+    num: int,
+    dtype: np.dtype | None = None,
+) -> np.ndarray:
+    """Read some columns of num rows of a BINTABLE starting at row first.
+
+    The columns come from the column cache if there is one (see
+    `vodftools.io.colcache`). Otherwise, if the file object has a
+    ``read_ranges`` method, like the remote files of `vodftools.io.remote`,
+    only the bytes of these columns are requested, and else complete rows
+    are read.
+    """
+    dtype = table_dtype(hdu.header) if dtype is None else dtype
+    cached = _cached_columns(fileobj, hdu, columns)
+    if cached is not None:
+        return _gather(cached, _subset_dtype(dtype, columns), first, num)
+    if not hasattr(fileobj, "read_ranges"):
+        return read_rows(fileobj, hdu, first, num, dtype)[columns]
+
+    result = np.empty(num, dtype=_subset_dtype(dtype, columns))
+    if num == 0:
+        return result
+    max_gap = getattr(fileobj, "max_gap", 0)
+    fields = {name: dtype.fields[name][:2] for name in columns}
+    segments = _row_segments(fields.values(), max_gap)
+    low, high = segments[0][0], segments[-1][1]
+    base = hdu.data_offset + first * dtype.itemsize
+    if len(segments) == 1 and dtype.itemsize - (high - low) <= max_gap:
+        # the rows would be coalesced anyway: one range, viewed with the row stride
+        [data] = fileobj.read_ranges(
+            [(base + low, base + (num - 1) * dtype.itemsize + high)], max_gap
+        )
+        record = np.dtype(
+            {
+                "names": columns,
+                "formats": [field for field, _ in fields.values()],
+                "offsets": [offset - low for _, offset in fields.values()],
+                "itemsize": high - low,
+            }
+        )
+        rows = np.ndarray(num, dtype=record, buffer=data, strides=(dtype.itemsize,))
+    else:
+        # one range per segment of each row, packed one after the other
+        starts = np.array([start for start, _ in segments])
+        sizes = np.array([stop - start for start, stop in segments])
+        packed = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        offsets = base + np.arange(num)[:, None] * dtype.itemsize + starts
+        data = fileobj.read_ranges(
+            zip(offsets.ravel().tolist(), (offsets + sizes).ravel().tolist()),
+            max_gap,
+        )
+        segment = [
+            int(np.searchsorted(starts, offset, side="right")) - 1
+            for _, offset in fields.values()
+        ]
+        record = np.dtype(
+            {
+                "names": columns,
+                "formats": [field for field, _ in fields.values()],
+                "offsets": [
+                    int(packed[index] + offset - starts[index])
+                    for index, (_, offset) in zip(segment, fields.values())
+                ],
+                "itemsize": int(sizes.sum()),
+            }
+        )
+        rows = np.frombuffer(b"".join(data), dtype=record)
+    for name in columns:
+        result[name] = rows[name]
+    return result
+
+
+def write_primary(fileobj: BinaryIO, header: fits.Header | None = None):
+    """Write an empty primary HDU."""
+    primary = fits.PrimaryHDU(header=header)
+    fileobj.write(primary.header.tostring().encode("ascii"))
+
+
+class BinTableWriter:
+    """Write a BINTABLE HDU chunk by chunk, without knowing the row count upfront.
+
+    The header is written first with a placeholder row count and is rewritten
+    when the writer is closed, so the file object must be seekable. Header
+    values can be changed in ``writer.header`` until then, as long as this does
+    not change the number of header blocks. A DATASUM keyword in the header is
+    set to the checksum of the rows written, and CHECKSUM is removed.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        output file, positioned at the start of the new HDU
+    header: fits.Header
+        BINTABLE header describing the rows (see `table_header`)
+    zone_columns: list[str] | None
+        columns whose per-chunk minimum and maximum are computed while
+        writing, available as `zone_map` (see `vodftools.io.zonemap`)
+    zone_rows: int | None
+        number of rows per zone
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        header: fits.Header,
+        zone_columns: list[str] | None = None,
+        zone_rows: int | None = None,
+    ):
+        self.fileobj = fileobj
+        self.header = header.copy()
+        # a DATASUM is updated to match the rows written (the column cache
+        # relies on it), but CHECKSUM, which also covers the header, is not
+        self.header.remove("CHECKSUM", ignore_missing=True)
+        self._datasum = 0 if "DATASUM" in self.header else None
+        self._datasum_tail = b""
+        self.dtype = table_dtype(header)
+        self.num_rows = 0
+        self.header_offset = fileobj.tell()
+        self._header_size = self._write_header()
+        self._encoding = {}
+        if any(key.startswith(("TSCAL", "TZERO")) for key in header):
+            from .encoding import encoding_plan
+
+            self._encoding = encoding_plan(header)
+        self._zones = None
+        if zone_columns:
+            from .zonemap import DEFAULT_ZONE_ROWS, ZoneMapBuilder
+
+            self._zones = ZoneMapBuilder(zone_columns, zone_rows or DEFAULT_ZONE_ROWS)
+
+    @property
+    def zone_map(self):
+        """`~vodftools.io.zonemap.ZoneMap` of the rows written, or None."""
+        return self._zones.finish() if self._zones is not None else None
+
+    def _write_header(self) -> int:
+        self.header["NAXIS2"] = self.num_rows
+        raw = self.header.tostring().encode("ascii")
+        self.fileobj.write(raw)
+        return len(raw)
+
+    def write(self, rows: np.ndarray):
+        """Append rows, which are converted to the table dtype by field name.
+
+        Float values of scaled-integer columns (with TSCALn or TZEROn, see
+        `vodftools.io.encoding`) are encoded; integer values are stored as is.
+        """
+        if self._encoding:
+            from .encoding import encode_rows
+
+            rows = encode_rows(rows, self._encoding, self.dtype)
+        elif rows.dtype != self.dtype:
+            converted = np.empty(len(rows), dtype=self.dtype)
+            for name in self.dtype.names:
+                converted[name] = rows[name]
+            rows = converted
+        if self._zones is not None:
+            if self._encoding:
+                from .encoding import decode_chunk
+
+                # zone maps hold decoded values, as compared by selections
+                self._zones.update(decode_chunk(rows, self._encoding))
+            else:
+                self._zones.update(rows)
+        data = rows.tobytes()
+        if self._datasum is not None:
+            self._update_datasum(data)
+        self.fileobj.write(data)
+        self.num_rows += len(rows)
+
+    def _update_datasum(self, data: bytes):
+        """Add data to the sum of the 32-bit big-endian words of the table."""
+        view = memoryview(data)
+        if self._datasum_tail:
+            head = 4 - len(self._datasum_tail)
+            self._datasum_tail += bytes(view[:head])
+            view = view[head:]
+            if len(self._datasum_tail) < 4:
+                return
+            self._datasum += int.from_bytes(self._datasum_tail, "big")
+        size = len(view) // 4 * 4
+        words = np.frombuffer(view[:size], dtype=">u4")
+        self._datasum += int(words.sum(dtype=np.uint64))
+        self._datasum_tail = bytes(view[size:])
+
+    def close(self):
+        """Pad the data and write the final header."""
+        data_size = self.num_rows * self.dtype.itemsize
+        self.fileobj.write(b"\0" * (_padded(data_size) - data_size))
+        end = self.fileobj.tell()
+
+        if self._datasum is not None:
+            # the padding is zeros, and the sum wraps around (ones' complement)
+            tail = self._datasum_tail.ljust(4, b"\0")
+            total = self._datasum + int.from_bytes(tail, "big")
+            while total >> 32:
+                total = (total & 0xFFFFFFFF) + (total >> 32)
+            self.header["DATASUM"] = str(total)
+        self.fileobj.seek(self.header_offset)
+        if self._write_header() != self._header_size:
+            raise ValueError("header size changed after data was written")
+        self.fileobj.seek(end)
+
+    def __enter__(self):  # noqa: D105
+        return self
+
+    def __exit__(self, exc_type, *args):  # noqa: D105
+        if exc_type is None:
+            self.close()
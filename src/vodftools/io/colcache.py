@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+"""
+On-disk columnar cache of binary tables.
+
+A FITS table stores its rows one after the other, so reading one column means
+reading every row. The column cache keeps a copy of the columns of a table as
+contiguous arrays, one ``.npy`` file per column with the dtype of the column
+in the table (see `~vodftools.io.bintable.table_dtype`), which are memory
+mapped: reading a column then only touches the bytes of that column.
+
+A table is identified by its DATASUM keyword (the checksum of its data, see
+`vodftools.models.metadata`) together with its row count and column layout,
+not by the path of its file. A table whose data changes gets a new DATASUM,
+and so new cache entries; the old ones are never used again and are evicted
+eventually. Tables without DATASUM are never cached. Note that this assumes
+DATASUM is kept up to date by whoever writes the table, as
+`~vodftools.io.bintable.BinTableWriter` does.
+
+When a cache is configured, `~vodftools.io.bintable.iter_chunks` and
+`~vodftools.io.bintable.read_columns` use it automatically for reads of some
+columns: missing columns are built on first use, in one pass over the table,
+and later reads of these columns come from the cache. The total size of the
+cache is bounded; when a new entry does not fit, the least recently used
+columns are removed.
+
+The cache is configured, in order of priority, with `set_column_cache` (or the
+`column_cache` context manager), or with the ``VODF_COLUMN_CACHE`` environment
+variable (a directory) and ``VODF_COLUMN_CACHE_SIZE`` (e.g. ``20GB``). There is
+no cache by default.
+
+.. code-block:: python
+
+    with column_cache("/scratch/vodf-cache", "20GB"):
+        for chunk in iter_chunks(infile, events, columns=["TIME", "ENERGY"]):
+            ...
+"""
+
+import hashlib
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from .bintable import HDUInfo, iter_chunks, table_dtype
+from .memory import parse_size
+
+__all__ = [
+    "DEFAULT_CACHE_SIZE",
+    "ColumnCache",
+    "table_key",
+    "get_column_cache",
+    "set_column_cache",
+    "column_cache",
+]
+
+#: size bound of a cache if none is given (4 GB)
+DEFAULT_CACHE_SIZE = 4 * 1024**3
+
+_SUFFIX = ".npy"
+
+#: size of the header of a .npy file of one column
+_NPY_HEADER_SIZE = 128
+
+_cache: "ColumnCache | None" = None
+
+
+def table_key(header) -> str | None:
+    """Return the cache key of a table, or None if it has no DATASUM."""
+    datasum = str(header.get("DATASUM", "")).strip()
+    if not datasum.isdigit():
+        return None
+    layout = repr((datasum, header.get("NAXIS2", 0), table_dtype(header).descr))
+    return hashlib.sha1(layout.encode()).hexdigest()[:24]
+
+
+class ColumnCache:
+    """Columns of tables stored as memory-mapped arrays in a directory.
+
+    Parameters
+    ----------
+    directory: str | Path
+        directory of the cache, created if needed. It can be shared by
+        processes, as entries are written to temporary files and renamed.
+    max_size: int | str
+        bound of the total size of the cache in bytes, or as a string like
+        ``20GB``. Tables with columns larger than this are not cached.
+    """
+
+    def __init__(self, directory: str | Path, max_size: int | str = DEFAULT_CACHE_SIZE):
+        self.directory = Path(directory)
+        self.max_size = parse_size(max_size)
+        self._lock = threading.Lock()
+
+    def __repr__(self):  # noqa: D105
+        return f"ColumnCache('{self.directory}', max_size={self.max_size})"
+
+    def _path(self, key: str, index: int) -> Path:
+        # columns are stored by position, which is part of the key
+        return self.directory / key / f"{index:04d}{_SUFFIX}"
+
+    def _entries(self) -> Iterator[tuple[Path, os.stat_result]]:
+        for path in self.directory.glob(f"*/*{_SUFFIX}"):
+            try:
+                yield path, path.stat()
+            except FileNotFoundError:  # evicted by another process
+                continue
+
+    def size(self) -> int:
+        """Return the total size of the cache in bytes."""
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def clear(self):
+        """Remove all entries."""
+        for path, _ in self._entries():
+            path.unlink(missing_ok=True)
+        self._remove_empty_directories()
+
+    def _remove_empty_directories(self):
+        for path in self.directory.glob("*/"):
+            try:
+                path.rmdir()
+            except OSError:  # not empty
+                continue
+
+    def _evict(self, needed: int, keep: set[Path]):
+        """Remove the least recently used columns until needed bytes fit."""
+        entries = sorted(
+            ((stat.st_mtime_ns, path, stat.st_size) for path, stat in self._entries()),
+            key=lambda entry: entry[0],
+        )
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total + needed <= self.max_size:
+                break
+            if path not in keep:
+                path.unlink(missing_ok=True)
+                total -= size
+        self._remove_empty_directories()
+
+    def _build(self, fileobj: BinaryIO, hdu: HDUInfo, paths: dict[str, Path]):
+        """Write the columns in paths, in one pass over the table."""
+        dtype = table_dtype(hdu.header)
+        suffix = f".tmp{os.getpid()}-{threading.get_ident()}"
+        arrays = {}
+        for name, path in paths.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            field = dtype.fields[name][0]
+            arrays[name] = np.lib.format.open_memmap(
+                path.with_name(path.name + suffix),
+                mode="w+",
+                dtype=field.base,
+                shape=(hdu.num_rows, *field.shape),
+            )
+        try:
+            first = 0
+            # complete rows, so this never reads from the cache
+            for chunk in iter_chunks(fileobj, hdu):
+                for name, array in arrays.items():
+                    array[first : first + len(chunk)] = chunk[name]
+                first += len(chunk)
+            for name, array in arrays.items():
+                array.flush()
+                os.replace(array.filename, paths[name])
+        finally:
+            arrays.clear()
+            for path in paths.values():
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+    def columns(
+        self, fileobj: BinaryIO, hdu: HDUInfo, columns: list[str]
+    ) -> dict[str, np.ndarray] | None:
+        """Return some columns of a table as read-only memory-mapped arrays.
+
+        Columns that are not in the cache yet are built first, reading the
+        whole table from fileobj. Returns None if the table cannot be cached
+        (it has no DATASUM, or the columns do not fit in the cache).
+        """
+        key = table_key(hdu.header)
+        dtype = table_dtype(hdu.header)
+        if key is None or hdu.num_rows == 0 or not set(columns) <= set(dtype.names):
+            return None
+        paths = {name: self._path(key, dtype.names.index(name)) for name in columns}
+
+        with self._lock:
+            missing = {name: path for name, path in paths.items() if not path.exists()}
+            if missing:
+                needed = sum(
+                    hdu.num_rows * dtype.fields[name][0].itemsize + _NPY_HEADER_SIZE
+                    for name in missing
+                )
+                if needed > self.max_size:
+                    return None
+                self._evict(needed, keep=set(paths.values()))
+                self._build(fileobj, hdu, missing)
+
+            arrays = {}
+            for name, path in paths.items():
+                try:
+                    arrays[name] = np.load(path, mmap_mode="r")
+                    os.utime(path)  # the modification time marks the last use
+                except FileNotFoundError:  # evicted by another process
+                    return None
+        return arrays
+
+
+@cache
+def _environment_cache(directory: str, max_size: str) -> ColumnCache:
+    return ColumnCache(directory, max_size)
+
+
+def get_column_cache() -> ColumnCache | None:
+    """Return the current column cache, or None if there is none."""
+    if _cache is not None:
+        return _cache
+    if os.environ.get("VODF_COLUMN_CACHE"):
+        return _environment_cache(
+            os.environ["VODF_COLUMN_CACHE"],
+            os.environ.get("VODF_COLUMN_CACHE_SIZE", str(DEFAULT_CACHE_SIZE)),
+        )
+    return None
+
+
+def set_column_cache(
+    directory: str | Path | None, max_size: int | str = DEFAULT_CACHE_SIZE
+):
+    """Set the global column cache. None restores the default."""
+    global _cache
+    _cache = ColumnCache(directory, max_size) if directory is not None else None
+
+
+@contextmanager
+def column_cache(
+    directory: str | Path | None, max_size: int | str = DEFAULT_CACHE_SIZE
+):
+    """Temporarily set the global column cache."""
+    global _cache
+    previous = _cache
+    set_column_cache(directory, max_size)
+    try:
+        yield get_column_cache()
+    finally:
+        _cache = previous
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+"""
+Reading gzip-compressed FITS files without decompressing them to disk.
+
+`open_compressed` wraps a binary file object, and returns it unchanged if it
+is not compressed. Plain gzip files are decompressed as a stream: seeking
+forward (as `~vodftools.io.bintable.scan_hdus` does to skip data sections)
+decompresses and discards the data, and seeking backward restarts from the
+beginning, so they are best read once, in order.
+
+Files in the blocked gzip format (BGZF, as written by ``bgzip`` or
+`compress_bgzf`) are a series of independent gzip members of at most 64 KiB
+of data each, whose compressed sizes are stored in their headers. They are
+still valid gzip files, but `BGZFFile` can index them, seek anywhere, and
+decompress the blocks needed for a large read in parallel threads.
+"""
+
+import gzip
+import io
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+__all__ = [
+    "detect_compression",
+    "open_compressed",
+    "is_compressed",
+    "BGZFFile",
+    "compress_bgzf",
+]
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+#: maximum amount of uncompressed data in one BGZF block
+BGZF_BLOCK_SIZE = 65280
+
+# ID1, ID2, CM, FLG, MTIME, XFL, OS, XLEN, SI1, SI2, SLEN, BSIZE
+_BGZF_HEADER = struct.Struct("<BBBBIBBHBBHH")
+
+#: the empty block marking the end of a BGZF file
+_BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+def detect_compression(fileobj: BinaryIO) -> str | None:
+    """Return "bgzf", "gzip" or None, without moving the file position."""
+    position = fileobj.tell()
+    head = fileobj.read(_BGZF_HEADER.size)
+    fileobj.seek(position)
+    if not head.startswith(_GZIP_MAGIC):
+        return None
+    if len(head) == _BGZF_HEADER.size:
+        fields = _BGZF_HEADER.unpack(head)
+        flags, si1, si2 = fields[3], fields[8], fields[9]
+        if flags & 4 and (si1, si2) == (66, 67):
+            return "bgzf"
+    return "gzip"
+
+
+class _GzipFile(gzip.GzipFile):
+    """GzipFile that also closes the file object it reads from."""
+
+    def close(self):
+        fileobj = self.fileobj
+        super().close()
+        if fileobj is not None:
+            fileobj.close()
+
+
+def open_compressed(fileobj: BinaryIO, workers: int | None = None) -> BinaryIO:
+    """Return a file object reading the decompressed data of fileobj.
+
+    fileobj is returned unchanged if it is not compressed. Closing the result
+    also closes fileobj.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        seekable binary file object
+    workers: int | None
+        number of threads decompressing BGZF blocks
+    """
+    compression = detect_compression(fileobj)
+    if compression == "bgzf":
+        return BGZFFile(fileobj, workers=workers)
+    if compression == "gzip":
+        return _GzipFile(fileobj=fileobj, mode="rb")
+    return fileobj
+
+
+def is_compressed(fileobj: BinaryIO) -> bool:
+    """Return True if fileobj was returned by `open_compressed` for gzip data."""
+    return isinstance(fileobj, gzip.GzipFile | BGZFFile)
+
+
+def _inflate(data: bytes) -> bytes:
+    return zlib.decompress(data, -zlib.MAX_WBITS)
+
+
+class BGZFFile(io.RawIOBase):
+    """Seekable reader of BGZF files, decompressing blocks in parallel.
+
+    The position and size of every block are read from the block headers
+    when the file is opened, which only reads a few bytes per block.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        seekable binary file object containing BGZF data
+    workers: int | None
+        number of threads decompressing the blocks of large reads, by
+        default the number of CPUs
+    cache_blocks: int
+        number of decompressed blocks kept for small reads
+    """
+
+    def __init__(
+        self, fileobj: BinaryIO, workers: int | None = None, cache_blocks: int = 16
+    ):
+        self.fileobj = fileobj
+        self.workers = workers or os.cpu_count()
+        self.cache_blocks = cache_blocks
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._position = 0
+        self._pool = None
+        self._build_index()
+
+    def _build_index(self):
+        offsets, sizes, header_sizes, data_sizes = [], [], [], []
+        offset = 0
+        while True:
+            self.fileobj.seek(offset)
+            head = self.fileobj.read(_BGZF_HEADER.size)
+            if len(head) < _BGZF_HEADER.size:
+                break
+            fields = _BGZF_HEADER.unpack(head)
+            if head[:2] != _GZIP_MAGIC or fields[8:10] != (66, 67):
+                raise OSError(f"invalid BGZF block at offset {offset}")
+            size = fields[-1] + 1
+            self.fileobj.seek(offset + size - 4)
+            (data_size,) = struct.unpack("<I", self.fileobj.read(4))
+            if data_size:
+                offsets.append(offset)
+                sizes.append(size)
+                header_sizes.append(12 + fields[7])  # fixed part and XLEN
+                data_sizes.append(data_size)
+            offset += size
+
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._sizes = np.array(sizes, dtype=np.int64)
+        self._header_sizes = np.array(header_sizes, dtype=np.int64)
+        self._starts = np.concatenate([[0], np.cumsum(data_sizes, dtype=np.int64)])
+        self._size = int(self._starts[-1])
+
+    @property
+    def num_blocks(self) -> int:
+        """Number of (non-empty) blocks."""
+        return len(self._offsets)
+
+    def readable(self) -> bool:  # noqa: D102
+        return True
+
+    def seekable(self) -> bool:  # noqa: D102
+        return True
+
+    def tell(self) -> int:  # noqa: D102
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:  # noqa: D102
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}
+        self._position = max(base[whence] + offset, 0)
+        return self._position
+
+    def _decompress(self, first: int, last: int) -> list[bytes]:
+        """Return the data of blocks first to last (inclusive)."""
+        missing = [b for b in range(first, last + 1) if b not in self._cache]
+        if missing:
+            # blocks are stored in order, so read the whole span at once
+            start = int(self._offsets[missing[0]])
+            stop = int(self._offsets[missing[-1]] + self._sizes[missing[-1]])
+            self.fileobj.seek(start)
+            compressed = self.fileobj.read(stop - start)
+            members = []
+            for block in missing:
+                offset = int(self._offsets[block]) - start
+                size = int(self._sizes[block])
+                # skip the header, and the CRC32 and ISIZE trailer
+                header_size = int(self._header_sizes[block])
+                members.append(compressed[offset + header_size : offset + size - 8])
+
+            if len(members) > 1 and self.workers > 1:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers)
+                decompressed = list(self._pool.map(_inflate, members))
+            else:
+                decompressed = [_inflate(member) for member in members]
+            for block, data in zip(missing, decompressed):
+                self._cache[block] = data
+
+        blocks = []
+        for block in range(first, last + 1):
+            self._cache.move_to_end(block)
+            blocks.append(self._cache[block])
+        while len(self._cache) > max(self.cache_blocks, last - first + 1):
+            self._cache.popitem(last=False)
+        return blocks
+
+    def readinto(self, buffer) -> int:  # noqa: D102
+        view = memoryview(buffer).cast("B")
+        stop = min(self._position + len(view), self._size)
+        if stop <= self._position:
+            return 0
+        first = int(np.searchsorted(self._starts, self._position, side="right")) - 1
+        last = int(np.searchsorted(self._starts, stop, side="left")) - 1
+
+        written = 0
+        offset = self._position - int(self._starts[first])
+        for data in self._decompress(first, last):
+            part = data[offset : offset + stop - self._position - written]
+            view[written : written + len(part)] = part
+            written += len(part)
+            offset = 0
+        self._position = stop
+        return written
+
+    def close(self):  # noqa: D102
+        if not self.closed:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self.fileobj.close()
+        super().close()
+
+
+def _bgzf_block(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(data) + compressor.flush()
+    size = _BGZF_HEADER.size + len(deflated) + 8
+    header = _BGZF_HEADER.pack(31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, size - 1)
+    trailer = struct.pack("<II", zlib.crc32(data), len(data))
+    return header + deflated + trailer
+
+
+def compress_bgzf(
+    path: str | Path,
+    output: str | Path,
+    level: int = 6,
+    workers: int | None = None,
+) -> Path:
+    """Compress a file to BGZF, compressing blocks in parallel threads.
+
+    The result can be read by any gzip tool, and in parallel by `BGZFFile`.
+    """
+    workers = workers or os.cpu_count()
+    batch = 64 * workers
+
+    with open(path, "rb") as infile, open(output, "wb") as outfile:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                blocks = [infile.read(BGZF_BLOCK_SIZE) for _ in range(batch)]
+                blocks = [block for block in blocks if block]
+                if not blocks:
+                    break
+                for block in pool.map(lambda data: _bgzf_block(data, level), blocks):
+                    outfile.write(block)
+        outfile.write(_BGZF_EOF)
+    return Path(output)
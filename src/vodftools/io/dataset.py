@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+"""
+A collection of event files seen as a single, lazily-loaded table.
+
+When an `EventDataset` is created, only the EVENTS header of each file is read,
+which is enough to know the number of rows, the time range and the observation
+metadata of every file. Selections on time and on header keywords are first
+applied to these headers, so files that cannot contain any matching rows are
+never opened again. Column data are only read when iterating over the dataset,
+one chunk at a time.
+
+.. code-block:: python
+
+    dataset = EventDataset.from_directory("/archive/2024")
+    selected = dataset.select(time=(1e8, 2e8), TELESCOP="CTAO", OBS_ID=[1, 2])
+    for chunk in selected.iter_chunks(columns=["TIME", "ENERGY"]):
+        ...
+"""
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .bintable import HDUInfo, find_hdu
+from .index import read_sidecar
+from .zonemap import ZoneMap, col, iter_select
+
+__all__ = ["EventFileInfo", "EventDataset"]
+
+
+@dataclass(frozen=True)
+class EventFileInfo:
+    """What is known about an event file from its EVENTS header."""
+
+    path: Path
+    hdu: HDUInfo
+    zone_map: ZoneMap | None = None  #: statistics of the event columns, if known
+
+    @property
+    def num_rows(self) -> int:
+        """Number of events."""
+        return self.hdu.num_rows
+
+    @property
+    def tstart(self) -> float:
+        """Start of the observation (TSTART)."""
+        return self.hdu.header["TSTART"]
+
+    @property
+    def tstop(self) -> float:
+        """End of the observation (TSTOP)."""
+        return self.hdu.header["TSTOP"]
+
+    @classmethod
+    def from_path(cls, path: str | Path, hdu: str = "EVENTS") -> "EventFileInfo":
+        """Read the header of the event table of a file.
+
+        If the file has a current index sidecar, the header is read directly
+        at its offset, and the zone map of the table is taken from it.
+        """
+        index = read_sidecar(path)
+        zone_map = index.zones.get(hdu) if index is not None else None
+        with open(path, "rb") as infile:
+            info = find_hdu(infile, hdu, index=index)
+        return cls(path=Path(path), hdu=info, zone_map=zone_map)
+
+
+def _read_info(path: str | Path) -> EventFileInfo | None:
+    """Return the info of an event file, or None if it has no EVENTS table."""
+    try:
+        return EventFileInfo.from_path(path)
+    except KeyError:
+        return None
+
+
+def _matches(header, key, wanted) -> bool:
+    if key not in header:
+        return False
+    if isinstance(wanted, str) or not isinstance(wanted, Iterable):
+        return header[key] == wanted
+    return header[key] in wanted
+
+
+class EventDataset:
+    """Many event files, presented as one logical table.
+
+    Parameters
+    ----------
+    files: Iterable[EventFileInfo]
+        the files in this dataset
+    time: tuple[float, float] | None
+        only rows with time in [start, stop) are returned
+    time_column: str
+        name of the event time column
+    """
+
+    def __init__(
+        self,
+        files: Iterable[EventFileInfo],
+        time: tuple[float, float] | None = None,
+        time_column: str = "TIME",
+    ):
+        self.files = list(files)
+        self.time = time
+        self.time_column = time_column
+
+    @classmethod
+    def from_paths(
+        cls,
+        paths: Iterable[str | Path],
+        max_workers: int | None = None,
+        skip_missing: bool = False,
+        **kwargs,
+    ) -> "EventDataset":
+        """Create a dataset by reading the headers of the given files.
+
+        Headers are read with a pool of threads, as this is dominated by I/O
+        latency for large archives. Files without an EVENTS table raise a
+        KeyError, or are left out with skip_missing.
+        """
+        read = _read_info if skip_missing else EventFileInfo.from_path
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            infos = pool.map(read, paths)
+            return cls((info for info in infos if info is not None), **kwargs)
+
+    @classmethod
+    def from_directory(
+        cls, directory: str | Path, pattern: str = "*.fits", **kwargs
+    ) -> "EventDataset":
+        """Create a dataset from all event files matching a pattern in a directory.
+
+        Matching files without an EVENTS table, such as IRF files, are skipped.
+        """
+        paths = sorted(Path(directory).rglob(pattern))
+        return cls.from_paths(paths, skip_missing=True, **kwargs)
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self.files)
+
+    @property
+    def num_rows(self) -> int:
+        """Total number of rows in all files, ignoring any time selection."""
+        return sum(info.num_rows for info in self.files)
+
+    @property
+    def time_range(self) -> tuple[float, float] | None:
+        """Earliest TSTART and latest TSTOP of all files."""
+        if not self.files:
+            return None
+        return (
+            min(info.tstart for info in self.files),
+            max(info.tstop for info in self.files),
+        )
+
+    def select(
+        self, time: tuple[float, float] | None = None, **header_values
+    ) -> "EventDataset":
+        """Return a new dataset restricted to a time range and header values.
+
+        Files are pruned using their headers only: a file is kept if its
+        [TSTART, TSTOP] range overlaps with the requested time range, and if
+        each given header keyword is equal to the requested value (or one of
+        the values, if a list is given).
+
+        Parameters
+        ----------
+        time: tuple[float, float] | None
+            time range [start, stop) in the time system of the files
+        **header_values:
+            values of header keywords, e.g. ``OBS_ID=[1, 2]`` or
+            ``TELESCOP="CTAO"``
+        """
+        if time is not None and self.time is not None:
+            time = (max(time[0], self.time[0]), min(time[1], self.time[1]))
+        time = time if time is not None else self.time
+
+        files = []
+        for info in self.files:
+            if time is not None and (info.tstop < time[0] or info.tstart >= time[1]):
+                continue
+            header = info.hdu.header
+            if all(
+                _matches(header, key, value) for key, value in header_values.items()
+            ):
+                files.append(info)
+
+        return EventDataset(files, time=time, time_column=self.time_column)
+
+    def iter_chunks(
+        self, columns: list[str] | None = None, chunk_rows: int | None = None
+    ) -> Iterator[np.ndarray]:
+        """Yield the selected rows of all files, one chunk at a time.
+
+        Each file is opened only when its rows are needed. Chunks in which no
+        row passes the time selection are not yielded, and if a file has a
+        zone map, the chunks outside of the time range are not even read.
+        """
+        predicates = []
+        if self.time is not None:
+            predicates.append(col(self.time_column).between(*self.time))
+        for info in self.files:
+            with open(info.path, "rb") as infile:
+                yield from iter_select(
+                    infile,
+                    info.hdu,
+                    predicates,
+                    zone_map=info.zone_map,
+                    columns=columns,
+                    chunk_rows=chunk_rows,
+                )
+
+    def read(self, columns: list[str] | None = None) -> np.ndarray:
+        """Read all selected rows into memory."""
+        chunks = list(self.iter_chunks(columns=columns))
+        if not chunks:
+            raise ValueError("no rows selected")
+        return np.concatenate(chunks)
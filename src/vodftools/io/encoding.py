@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+"""
+Scaled-integer storage of table columns (TSCALn and TZEROn).
+
+A column may store integers s that represent the values ``TZERO + TSCAL * s``
+(FITS standard, section 7.3.2). An event time in seconds stored as an int64
+offset from TSTART with a resolution of a nanosecond, or an energy stored as
+an int32 with a relative precision of 1e-6, takes half the space of a float64
+without losing the precision that matters.
+
+The encoding of a column is declared in the schema (see
+`~vodftools.schema.ColumnEncoding`) and written to the header with
+`apply_encoding`. `~vodftools.io.bintable.BinTableWriter` then encodes float
+values of these columns as they are written, and `iter_decoded_chunks` (or
+`~vodftools.io.units.iter_converted_chunks`) decodes them chunk by chunk. Both
+are done with a few vectorized operations per column and chunk.
+
+.. code-block:: python
+
+    dtype = storage_dtype(extension, events.dtype)
+    header = apply_encoding(table_header(dtype, template), extension)
+    with BinTableWriter(outfile, header) as writer:
+        writer.write(events)  # float times and energies
+"""
+
+from collections.abc import Iterator, Mapping
+from typing import BinaryIO
+
+import numpy as np
+from astropy.io import fits
+
+from ..schema import TableExtension, iter_columns
+from .bintable import HDUInfo, iter_chunks
+
+__all__ = [
+    "storage_dtype",
+    "apply_encoding",
+    "encoding_plan",
+    "encode_values",
+    "encode_rows",
+    "decode_values",
+    "decode_chunk",
+    "iter_decoded_chunks",
+]
+
+_STORAGE_TYPES = {"int16": ">i2", "int32": ">i4", "int64": ">i8"}
+
+
+def storage_dtype(extension: TableExtension, dtype: np.dtype) -> np.dtype:
+    """Return dtype with the encoded columns of extension replaced by integers."""
+    encodings = {
+        column.name: column.encoding
+        for column in iter_columns(extension)
+        if column.encoding is not None
+    }
+    fields = []
+    for name in dtype.names:
+        field = dtype[name]
+        if name in encodings:
+            base = np.dtype(_STORAGE_TYPES[encodings[name].storage.name])
+            field = np.dtype((base, field.shape)) if field.shape else base
+        fields.append((name, field))
+    return np.dtype(fields)
+
+
+def apply_encoding(header: fits.Header, extension: TableExtension) -> fits.Header:
+    """Set TSCALn and TZEROn of the encoded columns of extension, in place.
+
+    The zero of an encoding with a reference is the value of the reference
+    keyword, which must already be in the header.
+
+    Raises
+    ------
+    KeyError:
+        if a reference keyword is missing
+    """
+    indices = {
+        str(header[f"TTYPE{index}"]).strip(): index
+        for index in range(1, header.get("TFIELDS", 0) + 1)
+    }
+    for column in iter_columns(extension):
+        encoding, index = column.encoding, indices.get(column.name)
+        if encoding is None or index is None:
+            continue
+        zero = encoding.zero
+        if encoding.reference is not None:
+            if encoding.reference not in header:
+                raise KeyError(
+                    f"{encoding.reference} is needed to encode column {column.name}"
+                )
+            zero = float(header[encoding.reference])
+        header[f"TSCAL{index}"] = encoding.scale
+        header[f"TZERO{index}"] = zero
+    return header
+
+
+def encoding_plan(header: Mapping) -> dict[str, tuple[float, float]]:
+    """Return the (TSCAL, TZERO) of the columns of a table with integer storage.
+
+    Only columns with a non-trivial scale or zero are included.
+    """
+    plan = {}
+    for index in range(1, header.get("TFIELDS", 0) + 1):
+        scale = float(header.get(f"TSCAL{index}", 1.0))
+        zero = float(header.get(f"TZERO{index}", 0.0))
+        tform = str(header.get(f"TFORM{index}", "")).strip().lstrip("0123456789")
+        if (scale, zero) != (1.0, 0.0) and tform[:1] in ("B", "I", "J", "K"):
+            plan[str(header[f"TTYPE{index}"]).strip()] = (scale, zero)
+    return plan
+
+
+def _unsigned(field: np.dtype, scale: float, zero: float) -> bool:
+    """Return True for the FITS convention for unsigned integers."""
+    return scale == 1.0 and field.kind == "i" and zero == 2 ** (8 * field.itemsize - 1)
+
+
+def encode_values(
+    values: np.ndarray, scale: float, zero: float, dtype: np.dtype
+) -> np.ndarray:
+    """Return the integers of dtype representing values, rounded to the nearest.
+
+    Raises
+    ------
+    ValueError:
+        if a value is not finite or is out of the range of dtype
+    """
+    dtype = np.dtype(dtype)
+    stored = np.subtract(values, zero, dtype=np.float64)
+    stored /= scale
+    np.rint(stored, out=stored)
+    info = np.iinfo(dtype)
+    # the float bounds of int64 round up, so compare strictly below 2**63
+    valid = (stored >= info.min) & (stored < -float(info.min))
+    if not valid.all():
+        bad = stored[~valid][0]
+        raise ValueError(
+            f"value {bad * scale + zero} cannot be stored as {dtype.name} "
+            f"with TSCAL={scale} and TZERO={zero}"
+        )
+    return stored.astype(dtype)
+
+
+def encode_rows(
+    rows: np.ndarray, plan: Mapping[str, tuple[float, float]], dtype: np.dtype
+) -> np.ndarray:
+    """Return rows converted to dtype, encoding the float fields in plan."""
+    if rows.dtype == dtype:
+        return rows
+    converted = np.empty(len(rows), dtype=dtype)
+    for name in dtype.names:
+        values = rows[name]
+        if name in plan and values.dtype.kind == "f":
+            scale, zero = plan[name]
+            values = encode_values(values, scale, zero, dtype[name].base)
+        converted[name] = values
+    return converted
+
+
+def decode_values(values: np.ndarray, scale: float, zero: float) -> np.ndarray:
+    """Return the values represented by the integers of a scaled column.
+
+    The result is float64, except for the FITS convention for unsigned
+    integers, which gives unsigned integers.
+    """
+    if _unsigned(values.dtype.base, scale, zero):
+        # flipping the sign bit adds 2**(bits - 1) without overflow
+        native = values.astype(values.dtype.base.newbyteorder("="))
+        unsigned = np.dtype(f"u{native.itemsize}")
+        return native.view(unsigned) ^ unsigned.type(1 << (8 * unsigned.itemsize - 1))
+    decoded = np.multiply(values, scale, dtype=np.float64)
+    decoded += zero
+    return decoded
+
+
+def decode_chunk(
+    chunk: np.ndarray, plan: Mapping[str, tuple[float, float]]
+) -> np.ndarray:
+    """Return a chunk with the integer columns in plan decoded (see `decode_values`).
+
+    Chunks without such columns are returned as they are.
+    """
+    names = [name for name in plan if name in (chunk.dtype.names or ())]
+    if not names:
+        return chunk
+    columns = {name: decode_values(chunk[name], *plan[name]) for name in names}
+    fields = []
+    for name in chunk.dtype.names:
+        field = chunk.dtype[name]
+        if name in columns:
+            base = columns[name].dtype
+            field = np.dtype((base, field.shape)) if field.shape else base
+        fields.append((name, field))
+
+    decoded = np.empty(len(chunk), dtype=fields)
+    for name in chunk.dtype.names:
+        decoded[name] = columns.get(name, chunk[name])
+    return decoded
+
+
+def iter_decoded_chunks(
+    fileobj: BinaryIO, hdu: HDUInfo, **kwargs
+) -> Iterator[np.ndarray]:
+    """Like `iter_chunks`, but with scaled-integer columns decoded."""
+    plan = encoding_plan(hdu.header)
+    for chunk in iter_chunks(fileobj, hdu, **kwargs):
+        yield decode_chunk(chunk, plan)
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+"""
+Indexes of the location of every HDU in FITS files.
+
+A `FileIndex` records, for each HDU of a file, its EXTNAME, EXTVER and class
+hierarchy (HDUCLASS, HDUCLASn), and the byte offsets and sizes of its header
+and data. With it, `~vodftools.io.bintable.find_hdu` reads the header of the
+wanted HDU directly, instead of walking through all the headers before it,
+which matters for IRF files with many HDUs that are opened again and again.
+
+Indexes are stored either next to each file, as a small JSON sidecar (see
+`write_sidecar` and `load_index`), or for many files in one shared SQLite
+`IndexDatabase`. Both record the size and modification time of the file, and
+an index is ignored once the file has changed. Sidecars may also hold zone
+maps of some tables, for `vodftools.io.zonemap.select`.
+
+.. code-block:: python
+
+    index = load_index("irfs.fits", write=True)  # builds the sidecar once
+    with open("irfs.fits", "rb") as infile:
+        aeff = find_hdu(infile, "EFFECTIVE_AREA", version=1, index=index)
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ..registry import class_hierarchy
+from .bintable import scan_hdus
+from .remote import is_remote, open_file
+from .zonemap import DEFAULT_ZONE_ROWS, ZoneMap, build_zone_map
+
+__all__ = [
+    "SIDECAR_SUFFIX",
+    "HDUEntry",
+    "FileIndex",
+    "build_index",
+    "sidecar_path",
+    "write_sidecar",
+    "read_sidecar",
+    "load_index",
+    "IndexDatabase",
+]
+
+#: suffix appended to the name of a file for its index sidecar
+SIDECAR_SUFFIX = ".hduidx"
+
+_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class HDUEntry:
+    """Location and identification of one HDU."""
+
+    index: int  #: position of the HDU in the file (0 is the primary HDU)
+    name: str  #: EXTNAME
+    version: int  #: EXTVER
+    hduclass: tuple[str, ...]  #: HDUCLASS, HDUCLAS1, ...
+    header_offset: int
+    data_offset: int
+    data_size: int  #: size of the data in bytes, without padding
+
+    def to_list(self) -> list:
+        """Return the entry as a list, for compact storage."""
+        return [
+            self.index,
+            self.name,
+            self.version,
+            "/".join(self.hduclass),
+            self.header_offset,
+            self.data_offset,
+            self.data_size,
+        ]
+
+    @classmethod
+    def from_list(cls, values: list) -> "HDUEntry":
+        """Create an entry from the output of `to_list`."""
+        index, name, version, hduclass, header_offset, data_offset, data_size = values
+        return cls(
+            index=index,
+            name=name,
+            version=version,
+            hduclass=tuple(hduclass.split("/")) if hduclass else (),
+            header_offset=header_offset,
+            data_offset=data_offset,
+            data_size=data_size,
+        )
+
+
+def _stat(path: str | Path) -> tuple[int, int]:
+    """Return the size and modification time (ns) of a local file."""
+    if is_remote(path):
+        return -1, -1
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class FileIndex:
+    """Index of all HDUs of one file."""
+
+    path: str
+    size: int  #: size of the file when it was indexed
+    mtime_ns: int  #: modification time of the file when it was indexed
+    hdus: list[HDUEntry] = field(default_factory=list)
+    #: column statistics of some tables, by EXTNAME (see `vodftools.io.zonemap`)
+    zones: dict[str, ZoneMap] = field(default_factory=dict)
+
+    def is_current(self) -> bool:
+        """Return True if the file did not change since it was indexed.
+
+        Remote files are assumed not to change.
+        """
+        try:
+            return _stat(self.path) == (self.size, self.mtime_ns)
+        except OSError:
+            return False
+
+    def find(self, name: str, version: int | None = None) -> HDUEntry:
+        """Return the first HDU with the given EXTNAME (and EXTVER if given).
+
+        Raises
+        ------
+        KeyError:
+            if there is no such HDU
+        """
+        for entry in self.hdus:
+            if entry.name == name and (version is None or entry.version == version):
+                return entry
+        raise KeyError(f"HDU '{name}' (version {version}) not found in {self.path}")
+
+    def with_class(self, *hierarchy: str) -> list[HDUEntry]:
+        """Return the HDUs whose class hierarchy starts with hierarchy."""
+        return [
+            entry
+            for entry in self.hdus
+            if entry.hduclass[: len(hierarchy)] == tuple(hierarchy)
+        ]
+
+    def to_dict(self) -> dict:
+        """Return the index as a JSON-serializable dict."""
+        return dict(
+            format=_FORMAT_VERSION,
+            path=self.path,
+            size=self.size,
+            mtime_ns=self.mtime_ns,
+            hdus=[entry.to_list() for entry in self.hdus],
+            zones={name: zone_map.to_dict() for name, zone_map in self.zones.items()},
+        )
+
+    @classmethod
+    def from_dict(cls, document: dict) -> "FileIndex":
+        """Create an index from the output of `to_dict`."""
+        if document.get("format") != _FORMAT_VERSION:
+            raise ValueError(f"unsupported index format {document.get('format')}")
+        return cls(
+            path=document["path"],
+            size=document["size"],
+            mtime_ns=document["mtime_ns"],
+            hdus=[HDUEntry.from_list(values) for values in document["hdus"]],
+            zones={
+                name: ZoneMap.from_dict(zone_map)
+                for name, zone_map in document.get("zones", {}).items()
+            },
+        )
+
+
+def build_index(
+    path: str | Path,
+    zone_columns: dict[str, list[str]] | None = None,
+    zone_rows: int = DEFAULT_ZONE_ROWS,
+) -> FileIndex:
+    """Scan the headers of a file (local, remote or compressed) and index them.
+
+    For compressed files, offsets refer to the decompressed data.
+
+    Parameters
+    ----------
+    path: str | Path
+        file to index
+    zone_columns: dict[str, list[str]] | None
+        columns to compute zone maps of, by EXTNAME, e.g.
+        ``{"EVENTS": ["TIME", "ENERGY"]}``. This reads these tables.
+    zone_rows: int
+        number of rows per zone
+    """
+    zone_columns = zone_columns or {}
+    size, mtime_ns = _stat(path)
+    index = FileIndex(path=str(path), size=size, mtime_ns=mtime_ns)
+    with open_file(path) as fileobj:
+        for hdu in scan_hdus(fileobj):
+            if hdu.name in zone_columns and hdu.name not in index.zones:
+                position = fileobj.tell()
+                index.zones[hdu.name] = build_zone_map(
+                    fileobj, hdu, zone_columns[hdu.name], zone_rows
+                )
+                fileobj.seek(position)
+            index.hdus.append(
+                HDUEntry(
+                    index=hdu.index,
+                    name=hdu.name,
+                    version=hdu.version,
+                    hduclass=tuple(class_hierarchy(hdu.header)),
+                    header_offset=hdu.header_offset,
+                    data_offset=hdu.data_offset,
+                    data_size=hdu.data_size,
+                )
+            )
+    return index
+
+
+def sidecar_path(path: str | Path) -> Path:
+    """Return the path of the index sidecar of a file."""
+    path = Path(path)
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def write_sidecar(index: FileIndex, output: str | Path | None = None) -> Path:
+    """Write an index as JSON, by default to the sidecar of its file."""
+    output = Path(output) if output else sidecar_path(index.path)
+    output.write_text(json.dumps(index.to_dict(), separators=(",", ":")))
+    return output
+
+
+def read_sidecar(path: str | Path) -> FileIndex | None:
+    """Return the index in the sidecar of a file, if it exists and is current."""
+    if is_remote(path):
+        return None
+    try:
+        document = json.loads(sidecar_path(path).read_text())
+        index = FileIndex.from_dict(document)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # the sidecar may have been moved together with the file
+    index.path = str(path)
+    return index if index.is_current() else None
+
+
+def load_index(
+    path: str | Path,
+    database: "IndexDatabase | None" = None,
+    write: bool = False,
+) -> FileIndex:
+    """Return the index of a file, from its sidecar, a database or by scanning it.
+
+    Parameters
+    ----------
+    path: str | Path
+        file to index
+    database: IndexDatabase | None
+        shared index to look up, and to update if the file is scanned
+    write: bool
+        if True, and the file is scanned, write its sidecar
+    """
+    index = read_sidecar(path)
+    if index is None and database is not None:
+        index = database.get(path)
+    if index is None:
+        index = build_index(path)
+        if database is not None:
+            database.put(index)
+        if write:
+            write_sidecar(index)
+    return index
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hdus (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    hduclass TEXT NOT NULL,
+    header_offset INTEGER NOT NULL,
+    data_offset INTEGER NOT NULL,
+    data_size INTEGER NOT NULL,
+    PRIMARY KEY (path, idx)
+);
+CREATE INDEX IF NOT EXISTS hdus_by_name ON hdus (name, version);
+"""
+
+
+class IndexDatabase:
+    """HDU indexes of many files in one SQLite database.
+
+    Parameters
+    ----------
+    path: str | Path
+        database file, created if needed (":memory:" for a temporary one)
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):  # noqa: D105
+        return self
+
+    def __exit__(self, *args):  # noqa: D105
+        self.close()
+
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+
+    def put(self, index: FileIndex):
+        """Store or replace the index of a file."""
+        with self._connection:
+            self._connection.execute("DELETE FROM files WHERE path = ?", (index.path,))
+            self._connection.execute(
+                "INSERT INTO files VALUES (?, ?, ?)",
+                (index.path, index.size, index.mtime_ns),
+            )
+            self._connection.executemany(
+                "INSERT INTO hdus VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((index.path, *entry.to_list()) for entry in index.hdus),
+            )
+
+    def add(self, paths: Iterable[str | Path], workers: int | None = None) -> int:
+        """Index the files that are new or changed, in parallel threads.
+
+        Returns the number of files that were (re-)indexed.
+        """
+        stale = [str(path) for path in paths if self.get(path) is None]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for index in pool.map(build_index, stale):
+                self.put(index)
+        return len(stale)
+
+    def get(self, path: str | Path) -> FileIndex | None:
+        """Return the index of a file, if it is in the database and current."""
+        row = self._connection.execute(
+            "SELECT size, mtime_ns FROM files WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row is None:
+            return None
+        rows = self._connection.execute(
+            "SELECT idx, name, version, hduclass, header_offset, data_offset, "
+            "data_size FROM hdus WHERE path = ? ORDER BY idx",
+            (str(path),),
+        )
+        index = FileIndex(
+            path=str(path),
+            size=row[0],
+            mtime_ns=row[1],
+            hdus=[HDUEntry.from_list(list(values)) for values in rows],
+        )
+        return index if index.is_current() else None
+
+    def find(
+        self, name: str, version: int | None = None
+    ) -> Iterator[tuple[str, HDUEntry]]:
+        """Yield the path and entry of every indexed HDU with this EXTNAME."""
+        query = (
+            "SELECT path, idx, name, version, hduclass, header_offset, data_offset, "
+            "data_size FROM hdus WHERE name = ?"
+        )
+        parameters = [name]
+        if version is not None:
+            query += " AND version = ?"
+            parameters.append(version)
+        for path, *values in self._connection.execute(query, parameters):
+            yield path, HDUEntry.from_list(values)
+
+    def __len__(self) -> int:  # noqa: D105
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM files").fetchone()
+        return count
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+"""
+Memory budget for chunked processing.
+
+Readers, validators and converters process tables in chunks of rows. Instead
+of a fixed number of rows, the chunk size is derived from the size of one row
+and a global memory budget, so that narrow event tables are read in large
+chunks and wide IRF tables in small ones, and both stay within the budget.
+
+The budget is taken, in order of priority, from `set_memory_budget` (or the
+`memory_budget` context manager), from the ``VODF_MEMORY_BUDGET`` environment
+variable (e.g. ``512MB``), or from a fraction of the cgroup memory limit of the
+process if there is one. `MemoryTracker` reports the peak memory actually used.
+"""
+
+import os
+import re
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from ..schema import DataType, TableExtension, iter_columns
+
+__all__ = [
+    "DEFAULT_MEMORY_BUDGET",
+    "parse_size",
+    "cgroup_memory_limit",
+    "get_memory_budget",
+    "set_memory_budget",
+    "memory_budget",
+    "row_width",
+    "chunk_rows_for",
+    "MemoryTracker",
+]
+
+#: budget used if nothing else is configured (256 MB)
+DEFAULT_MEMORY_BUDGET = 256 * 1024**2
+
+#: fraction of the cgroup memory limit used as budget
+CGROUP_FRACTION = 0.25
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+_ITEM_SIZE = {
+    DataType.float64: 8,
+    DataType.float32: 4,
+    DataType.int64: 8,
+    DataType.int32: 4,
+    DataType.int16: 2,
+    DataType.uint32: 4,
+    DataType.char: 16,
+    DataType.isotime: 23,
+    DataType.uuid: 36,
+    DataType.none: 0,
+}
+
+_budget: int | None = None
+
+
+def parse_size(size: int | str) -> int:
+    """Convert a size such as 512MB, 2G or 1024 to a number of bytes."""
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)I?B?\s*", str(size).upper())
+    if match is None:
+        raise ValueError(f"invalid size: '{size}'")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def cgroup_memory_limit() -> int | None:
+    """Return the memory limit of the cgroup of this process, if any."""
+    for path in [
+        Path("/sys/fs/cgroup/memory.max"),  # cgroup v2
+        Path("/sys/fs/cgroup/memory/memory.limit_in_bytes"),  # cgroup v1
+    ]:
+        try:
+            value = path.read_text().strip()
+        except OSError:
+            continue
+        # unlimited is "max" in v2, and a huge number in v1
+        if value.isdigit() and int(value) < 2**60:
+            return int(value)
+    return None
+
+
+def get_memory_budget() -> int:
+    """Return the current memory budget in bytes."""
+    if _budget is not None:
+        return _budget
+    if "VODF_MEMORY_BUDGET" in os.environ:
+        return parse_size(os.environ["VODF_MEMORY_BUDGET"])
+    limit = cgroup_memory_limit()
+    if limit is not None:
+        return int(limit * CGROUP_FRACTION)
+    return DEFAULT_MEMORY_BUDGET
+
+
+def set_memory_budget(budget: int | str | None):
+    """Set the global memory budget. None restores the default."""
+    global _budget
+    _budget = parse_size(budget) if budget is not None else None
+
+
+@contextmanager
+def memory_budget(budget: int | str | None):
+    """Temporarily set the global memory budget."""
+    previous = _budget
+    set_memory_budget(budget)
+    try:
+        yield get_memory_budget()
+    finally:
+        set_memory_budget(previous)
+
+
+def row_width(extension: TableExtension, array_length: int = 10) -> int:
+    """Estimate the size in bytes of one row of a table from its schema.
+
+    The length of array columns is not part of the schema, so each of their
+    dimensions is assumed to have array_length elements. Use the NAXIS1
+    header of an actual file for the exact value.
+    """
+    return sum(
+        _ITEM_SIZE[column.dtype] * array_length**column.ndims
+        for column in iter_columns(extension)
+    )
+
+
+def chunk_rows_for(
+    row_nbytes: int,
+    budget: int | None = None,
+    copies: int = 2,
+    workers: int = 1,
+    max_rows: int = 10_000_000,
+) -> int:
+    """Return the number of rows per chunk that fits in the memory budget.
+
+    Parameters
+    ----------
+    row_nbytes: int
+        size of one row in bytes
+    budget: int | None
+        memory budget in bytes, by default the global one
+    copies: int
+        number of copies of a chunk that are in memory at the same time
+        (e.g. the raw chunk and a converted one)
+    workers: int
+        number of workers processing chunks at the same time, which share
+        the budget
+    max_rows: int
+        upper limit, to keep chunks of very narrow tables reasonable
+    """
+    budget = get_memory_budget() if budget is None else budget
+    per_chunk = budget // (max(copies, 1) * max(workers, 1))
+    return int(np.clip(per_chunk // max(row_nbytes, 1), 1, max_rows))
+
+
+class MemoryTracker:
+    """Measure the peak memory used within a block of code.
+
+    ``peak`` is the peak of memory allocated through Python (including NumPy
+    arrays) during the block, and ``max_rss`` the maximum resident set size of
+    the process so far (which never decreases).
+
+    .. code-block:: python
+
+        with MemoryTracker() as tracker:
+            stack_event_files(paths, "stacked.fits")
+        print(tracker.peak, tracker.within_budget)
+    """
+
+    def __init__(self):
+        self.peak = 0
+        self.max_rss = 0
+        self.budget = get_memory_budget()
+        self._was_tracing = False
+
+    def __enter__(self):  # noqa: D105
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._start, _ = tracemalloc.get_traced_memory()
+        return self
+
+    def __exit__(self, *args):  # noqa: D105
+        _, peak = tracemalloc.get_traced_memory()
+        if not self._was_tracing:
+            tracemalloc.stop()
+        self.peak = peak - self._start
+        # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+        scale = 1 if sys.platform == "darwin" else 1024
+        self.max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    @property
+    def within_budget(self) -> bool:
+        """True if the peak memory was within the budget."""
+        return self.peak <= self.budget
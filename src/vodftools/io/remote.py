@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+"""
+Reading files from HTTP servers and object storage with byte-range requests.
+
+`open_file` returns a read-only, seekable binary file object for a local path
+or a URL. For URLs, only the byte ranges that are actually read are
+downloaded, using HTTP ``Range`` requests, so that `~vodftools.io.bintable.scan_hdus`
+and the header validation only transfer the header blocks of each HDU, and
+not the data in between.
+
+- Reads are rounded up to blocks of `RangeFile.block_size` bytes, and recent
+  blocks are cached, so that the many small reads of the header scanner result
+  in few requests.
+- `RangeFile.read_ranges` fetches many ranges at once (e.g. a few columns of
+  many rows); ranges separated by less than ``max_gap`` bytes are coalesced
+  into one request.
+- HTTP connections are kept alive and reused, per host, by a `ConnectionPool`.
+
+``s3://bucket/key`` URLs are mapped to HTTPS URLs of the bucket, or of the
+endpoint in the ``AWS_ENDPOINT_URL`` environment variable (path-style). Only
+anonymous requests are supported, i.e. public buckets; pre-signed URLs can be
+used as plain HTTPS URLs. Other schemes can be added with `register_backend`.
+
+Gzip-compressed files, local or remote, are decompressed on the fly (see
+`vodftools.io.compressed`).
+"""
+
+import atexit
+import http.client
+import io
+import os
+import queue
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import BinaryIO, Protocol
+from urllib.parse import urlsplit
+
+from .compressed import open_compressed
+
+__all__ = [
+    "RangeBackend",
+    "HTTPBackend",
+    "ConnectionPool",
+    "RangeFile",
+    "coalesce_ranges",
+    "register_backend",
+    "open_file",
+    "is_remote",
+]
+
+#: default size of the blocks read and cached by `RangeFile`
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+#: ranges closer than this are fetched with one request
+DEFAULT_MAX_GAP = 32 * 1024
+
+
+class RangeBackend(Protocol):
+    """Source of byte ranges of one remote file."""
+
+    def size(self) -> int:
+        """Return the size of the file in bytes."""
+
+    def read_range(self, start: int, stop: int) -> bytes:
+        """Return the bytes [start, stop) of the file."""
+
+
+class ConnectionPool:
+    """Pool of keep-alive HTTP connections, per scheme, host and port.
+
+    Parameters
+    ----------
+    maxsize: int
+        maximum number of idle connections kept per host
+    timeout: float
+        timeout of each connection, in seconds
+    """
+
+    def __init__(self, maxsize: int = 8, timeout: float = 30.0):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle: dict[tuple, queue.LifoQueue] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, key) -> queue.LifoQueue:
+        with self._lock:
+            return self._idle.setdefault(key, queue.LifoQueue(self.maxsize))
+
+    def get(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        """Return an idle connection to the host, or a new one."""
+        try:
+            return self._queue((scheme, netloc)).get_nowait()
+        except queue.Empty:
+            return self.connect(scheme, netloc)
+
+    def connect(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        """Return a new connection to the host."""
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def put(self, scheme: str, netloc: str, connection: http.client.HTTPConnection):
+        """Return a connection to the pool once its response was read."""
+        try:
+            self._queue((scheme, netloc)).put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            queues, self._idle = list(self._idle.values()), {}
+        for idle in queues:
+            while not idle.empty():
+                idle.get_nowait().close()
+
+
+_default_pool = ConnectionPool()
+atexit.register(_default_pool.close)
+
+
+class HTTPBackend:
+    """Byte ranges of a file on an HTTP(S) server that supports Range requests.
+
+    Parameters
+    ----------
+    url: str
+        http:// or https:// URL of the file
+    pool: ConnectionPool | None
+        connections to use, by default a pool shared by all backends
+    """
+
+    def __init__(self, url: str, pool: ConnectionPool | None = None):
+        self.url = url
+        self.pool = pool or _default_pool
+        parts = urlsplit(url)
+        self._scheme, self._netloc = parts.scheme, parts.netloc
+        self._target = parts.path + (f"?{parts.query}" if parts.query else "")
+        self._size = None
+        self.num_requests = 0  #: number of requests sent, for diagnostics
+        self.bytes_received = 0  #: size of all response bodies, for diagnostics
+
+    def _send(self, connection, method: str, headers: dict):
+        connection.request(method, self._target, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+
+    def _request(self, method: str, headers: dict) -> tuple[int, dict, bytes]:
+        connection = self.pool.get(self._scheme, self._netloc)
+        try:
+            response, body = self._send(connection, method, headers)
+        except (http.client.HTTPException, ConnectionError):
+            # the server may have closed a kept-alive connection, retry once
+            connection.close()
+            connection = self.pool.connect(self._scheme, self._netloc)
+            response, body = self._send(connection, method, headers)
+
+        self.num_requests += 1
+        self.bytes_received += len(body)
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.put(self._scheme, self._netloc, connection)
+        return response.status, dict(response.getheaders()), body
+
+    def size(self) -> int:
+        """Return the size of the file, from Content-Length."""
+        if self._size is None:
+            status, headers, _ = self._request("HEAD", {})
+            if status != 200:
+                raise OSError(f"HEAD {self.url} failed with status {status}")
+            self._size = int(_header(headers, "Content-Length"))
+        return self._size
+
+    def read_range(self, start: int, stop: int) -> bytes:
+        """Return the bytes [start, stop) of the file."""
+        if stop <= start:
+            return b""
+        status, headers, body = self._request(
+            "GET", {"Range": f"bytes={start}-{stop - 1}"}
+        )
+        if status == 206:
+            return body
+        if status == 200:
+            # the server ignored the Range header and sent the whole file
+            return body[start:stop]
+        if status == 416:
+            return b""
+        raise OSError(f"GET {self.url} failed with status {status}")
+
+
+def _header(headers: dict, name: str) -> str:
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    raise OSError(f"missing {name} header in response")
+
+
+def _s3_backend(url: str) -> HTTPBackend:
+    parts = urlsplit(url)
+    bucket, key = parts.netloc, parts.path.lstrip("/")
+    endpoint = os.environ.get("AWS_ENDPOINT_URL")
+    if endpoint:
+        return HTTPBackend(f"{endpoint.rstrip('/')}/{bucket}/{key}")
+    return HTTPBackend(f"https://{bucket}.s3.amazonaws.com/{key}")
+
+
+_BACKENDS: dict[str, Callable[[str], RangeBackend]] = {
+    "http": HTTPBackend,
+    "https": HTTPBackend,
+    "s3": _s3_backend,
+}
+
+
+def register_backend(scheme: str, factory: Callable[[str], RangeBackend]):
+    """Use factory(url) to read URLs with the given scheme."""
+    _BACKENDS[scheme] = factory
+
+
+def coalesce_ranges(
+    ranges: Iterable[tuple[int, int]], max_gap: int = DEFAULT_MAX_GAP
+) -> list[tuple[int, int]]:
+    """Merge sorted or unsorted [start, stop) ranges closer than max_gap."""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+class RangeFile(io.RawIOBase):
+    """Read-only, seekable file object reading from a `RangeBackend`.
+
+    Parameters
+    ----------
+    backend: RangeBackend
+        source of the data
+    block_size: int
+        reads are extended to whole blocks of this size
+    cache_blocks: int
+        number of blocks kept in memory
+    max_gap: int
+        default for `read_ranges`
+    """
+
+    def __init__(
+        self,
+        backend: RangeBackend,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache_blocks: int = 64,
+        max_gap: int = DEFAULT_MAX_GAP,
+    ):
+        self.backend = backend
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.max_gap = max_gap
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._position = 0
+        self._size = backend.size()
+
+    def readable(self) -> bool:  # noqa: D102
+        return True
+
+    def seekable(self) -> bool:  # noqa: D102
+        return True
+
+    def tell(self) -> int:  # noqa: D102
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:  # noqa: D102
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}
+        self._position = max(base[whence] + offset, 0)
+        return self._position
+
+    def _blocks(self, first: int, last: int) -> list[bytes]:
+        """Return blocks first to last (inclusive), fetching missing ones."""
+        missing = [b for b in range(first, last + 1) if b not in self._cache]
+        # consecutive missing blocks are fetched with one request
+        ranges = coalesce_ranges(((b, b + 1) for b in missing), max_gap=0)
+        for start_block, stop_block in ranges:
+            data = self.backend.read_range(
+                start_block * self.block_size,
+                min(stop_block * self.block_size, self._size),
+            )
+            for block in range(start_block, stop_block):
+                offset = (block - start_block) * self.block_size
+                self._cache[block] = data[offset : offset + self.block_size]
+
+        blocks = []
+        for block in range(first, last + 1):
+            self._cache.move_to_end(block)
+            blocks.append(self._cache[block])
+        while len(self._cache) > max(self.cache_blocks, last - first + 1):
+            self._cache.popitem(last=False)
+        return blocks
+
+    def readinto(self, buffer) -> int:  # noqa: D102
+        view = memoryview(buffer).cast("B")
+        stop = min(self._position + len(view), self._size)
+        if stop <= self._position:
+            return 0
+        first = self._position // self.block_size
+        last = (stop - 1) // self.block_size
+        data = b"".join(self._blocks(first, last))
+        offset = self._position - first * self.block_size
+        num = stop - self._position
+        view[:num] = data[offset : offset + num]
+        self._position = stop
+        return num
+
+    def read_ranges(
+        self, ranges: Iterable[tuple[int, int]], max_gap: int | None = None
+    ) -> list[bytes]:
+        """Return the bytes of many [start, stop) ranges, with few requests.
+
+        The ranges are coalesced (see `coalesce_ranges`) and each merged range
+        is fetched directly, bypassing the block cache.
+        """
+        ranges = list(ranges)
+        max_gap = self.max_gap if max_gap is None else max_gap
+        fetched = {
+            start: self.backend.read_range(start, min(stop, self._size))
+            for start, stop in coalesce_ranges(ranges, max_gap)
+        }
+        starts = sorted(fetched)
+
+        result = []
+        for start, stop in ranges:
+            # the merged range containing start is the last one starting before
+            merged_start = starts[bisect_right(starts, start) - 1]
+            data = fetched[merged_start]
+            result.append(data[start - merged_start : stop - merged_start])
+        return result
+
+
+def is_remote(path: str | Path) -> bool:
+    """Return True if path is a URL with a registered scheme."""
+    return urlsplit(str(path)).scheme in _BACKENDS
+
+
+def open_file(path: str | Path, decompress: bool = True, **kwargs) -> BinaryIO:
+    """Open a local file or a URL for reading, in binary mode.
+
+    URLs are read with a `RangeFile`, to which kwargs are passed; local files
+    are opened with `open`. The result can be used as a context manager in
+    both cases.
+
+    If decompress is True, gzip-compressed data is decompressed on the fly
+    with `vodftools.io.compressed.open_compressed`.
+    """
+    scheme = urlsplit(str(path)).scheme
+    if scheme not in _BACKENDS:
+        fileobj = open(path, "rb")
+    else:
+        fileobj = RangeFile(_BACKENDS[scheme](str(path)), **kwargs)
+    return open_compressed(fileobj) if decompress else fileobj
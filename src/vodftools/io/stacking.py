@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+
+"""
+Splitting event files into time shards and stacking many runs into one file.
+
+Both operations stream the EVENTS table chunk by chunk, so memory use does not
+depend on the size of the inputs. The SOI table of the output is rebuilt from
+the inputs, and the observation time headers (TSTART, TSTOP, DATE-BEG and
+DATE-END, see `observation_headers`) are recomputed to match the output.
+"""
+
+import math
+import warnings
+from collections.abc import Iterable
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from astropy.io import fits
+
+from ..models.metadata import observation_headers
+from ..schema import iter_headers
+from ..times import met_to_isot, reference_offset
+from .bintable import (
+    BinTableWriter,
+    HDUInfo,
+    iter_chunks,
+    scan_hdus,
+    table_dtype,
+    table_header,
+    write_primary,
+)
+from .encoding import decode_chunk, encoding_plan
+from .index import build_index, write_sidecar
+
+__all__ = ["update_observation_times", "split_by_time", "stack_event_files"]
+
+_OBS_KEYS = {
+    header.name: header.fits_key.upper() for header in iter_headers(observation_headers)
+}
+
+
+def update_observation_times(header: fits.Header, tstart: float, tstop: float):
+    """Set the start and stop times of the observation headers (in place).
+
+    The human-readable DATE-BEG and DATE-END are derived from the TSTART and
+    TSTOP values using the reference time defined in the same header.
+    """
+    header[_OBS_KEYS["start_time"]] = float(tstart)
+    header[_OBS_KEYS["end_time"]] = float(tstop)
+    header[_OBS_KEYS["start_date"]] = met_to_isot(tstart, header)
+    header[_OBS_KEYS["end_date"]] = met_to_isot(tstop, header)
+
+
+def _read_table(fileobj, hdu) -> np.ndarray:
+    """Read a (small) table completely."""
+    chunks = list(iter_chunks(fileobj, hdu))
+    return np.concatenate(chunks) if chunks else np.empty(0, table_dtype(hdu.header))
+
+
+def _write_table(fileobj, header: fits.Header, rows: np.ndarray):
+    with BinTableWriter(fileobj, table_header(rows.dtype, header)) as writer:
+        writer.write(rows)
+
+
+def _clip_intervals(soi: np.ndarray, start: float, stop: float) -> np.ndarray:
+    """Return the intervals of an SOI table restricted to [start, stop]."""
+    clipped = soi[(soi["START"] < stop) & (soi["STOP"] > start)].copy()
+    clipped["START"] = np.maximum(clipped["START"], start)
+    clipped["STOP"] = np.minimum(clipped["STOP"], stop)
+    return clipped
+
+
+def _write_shards(
+    infile: BinaryIO,
+    hdus: dict[str, HDUInfo],
+    soi_rows: np.ndarray,
+    edges: np.ndarray,
+    paths: dict[int, Path],
+    time_column: str,
+    chunk_rows: int | None,
+) -> int:
+    """Write some shards of `split_by_time` in one pass over the events.
+
+    Returns the number of events outside of all shards.
+    """
+    events, soi = hdus["EVENTS"], hdus["SOI"]
+    num_shards = len(edges) - 1
+    encoding = encoding_plan(events.header)
+    dropped = 0
+    with ExitStack() as stack:
+        writers = {}
+        for shard, path in paths.items():
+            outfile = stack.enter_context(open(path, "wb"))
+            write_primary(outfile, hdus["PRIMARY"].header)
+            header = events.header.copy()
+            update_observation_times(header, edges[shard], edges[shard + 1])
+            writers[shard] = BinTableWriter(outfile, header)
+
+        for chunk in iter_chunks(infile, events, chunk_rows=chunk_rows):
+            # the writers encode the decoded values again
+            chunk = decode_chunk(chunk, encoding)
+            times = chunk[time_column]
+            index = np.searchsorted(edges, times, side="right") - 1
+            # TSTOP itself belongs to the last shard
+            index[times == edges[-1]] = num_shards - 1
+            dropped += np.count_nonzero((index < 0) | (index >= num_shards))
+            for shard in np.unique(index):
+                if shard in writers:
+                    writers[shard].write(chunk[index == shard])
+
+        for shard, writer in writers.items():
+            writer.close()
+            intervals = _clip_intervals(soi_rows, edges[shard], edges[shard + 1])
+            _write_table(writer.fileobj, soi.header, intervals)
+    return dropped
+
+
+def split_by_time(
+    path: str | Path,
+    output_dir: str | Path,
+    shard_duration: float,
+    time_column: str = "TIME",
+    chunk_rows: int | None = None,
+    max_open_files: int = 64,
+) -> list[Path]:
+    """Split an event file into files covering consecutive time ranges.
+
+    The observation time range [TSTART, TSTOP] is cut into shards of
+    shard_duration seconds (the last one may be shorter). Each output file
+    contains the events of one shard and the SOI intervals clipped to it.
+    Events outside of [TSTART, TSTOP] (or with a NaN time) are dropped, with a
+    warning.
+
+    Parameters
+    ----------
+    path: str | Path
+        input event file
+    output_dir: str | Path
+        directory in which the shards are written, as ``<name>_shardNNNN.fits``
+    shard_duration: float
+        length of each shard in seconds
+    time_column: str
+        name of the event time column
+    chunk_rows: int | None
+        number of events to process at a time
+    max_open_files: int
+        maximum number of shards written at the same time. With more shards,
+        they are written in batches of this size, each reading the input
+        once more.
+
+    Returns
+    -------
+    list[Path]:
+        paths of the shards, in time order
+    """
+    path, output_dir = Path(path), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "rb") as infile:
+        hdus = {info.name: info for info in scan_hdus(infile)}
+        events, soi = hdus["EVENTS"], hdus["SOI"]
+        soi_rows = _read_table(infile, soi)
+
+        tstart = events.header[_OBS_KEYS["start_time"]]
+        tstop = events.header[_OBS_KEYS["end_time"]]
+        num_shards = max(1, math.ceil((tstop - tstart) / shard_duration))
+        edges = tstart + shard_duration * np.arange(num_shards + 1)
+        edges[-1] = tstop
+        paths = [
+            output_dir / f"{path.stem}_shard{index:04d}.fits"
+            for index in range(num_shards)
+        ]
+
+        batch = max(max_open_files, 1)
+        for first in range(0, num_shards, batch):
+            # every pass reads all events, so each counts the same dropped ones
+            dropped = _write_shards(
+                infile,
+                hdus,
+                soi_rows,
+                edges,
+                {
+                    shard: paths[shard]
+                    for shard in range(first, min(first + batch, num_shards))
+                },
+                time_column,
+                chunk_rows,
+            )
+
+    if dropped:
+        warnings.warn(
+            f"{dropped} events of {path} outside of [TSTART, TSTOP] were dropped",
+            stacklevel=2,
+        )
+    return paths
+
+
+def stack_event_files(
+    paths: Iterable[str | Path],
+    output: str | Path,
+    time_column: str = "TIME",
+    chunk_rows: int | None = None,
+    zone_columns: list[str] | None = None,
+) -> Path:
+    """Stack the events of many runs into a single event file.
+
+    All inputs must have the same EVENTS table layout. Times are shifted to the
+    reference time (MJDREF) of the first input, the SOI tables are concatenated,
+    and TSTART/TSTOP span all inputs. The OBS_ID of each input is recorded in a
+    HISTORY card.
+
+    Parameters
+    ----------
+    paths: Iterable[str | Path]
+        input event files
+    output: str | Path
+        output event file
+    time_column: str
+        name of the event time column
+    chunk_rows: int | None
+        number of events to process at a time
+    zone_columns: list[str] | None
+        if given, zone maps of these EVENTS columns are computed while
+        writing, and stored with the HDU index in the sidecar of the output
+        (see `vodftools.io.zonemap`)
+
+    Returns
+    -------
+    Path:
+        the output path
+    """
+    paths = [Path(path) for path in paths]
+    if not paths:
+        raise ValueError("no input files given")
+    output = Path(output)
+
+    # first pass over the headers only, to build the output header
+    inputs = []
+    for path in paths:
+        with open(path, "rb") as infile:
+            inputs.append({info.name: info for info in scan_hdus(infile)})
+
+    reference = inputs[0]["EVENTS"].header
+    dtype = table_dtype(reference)
+    header = reference.copy()
+    offsets = []
+    for path, hdus in zip(paths, inputs):
+        events = hdus["EVENTS"].header
+        if table_dtype(events) != dtype:
+            raise ValueError(f"EVENTS table of {path} has a different layout")
+        offsets.append(reference_offset(events, reference))
+        header.add_history(f"OBS_ID {events.get(_OBS_KEYS['obs_id'])} from {path.name}")
+
+    tstart = min(
+        hdus["EVENTS"].header[_OBS_KEYS["start_time"]] + offset
+        for hdus, offset in zip(inputs, offsets)
+    )
+    tstop = max(
+        hdus["EVENTS"].header[_OBS_KEYS["end_time"]] + offset
+        for hdus, offset in zip(inputs, offsets)
+    )
+    update_observation_times(header, tstart, tstop)
+
+    soi_tables = []
+    with open(output, "wb") as outfile:
+        write_primary(outfile, inputs[0]["PRIMARY"].header)
+
+        with BinTableWriter(outfile, header, zone_columns=zone_columns) as writer:
+            for path, hdus, offset in zip(paths, inputs, offsets):
+                encoding = encoding_plan(hdus["EVENTS"].header)
+                with open(path, "rb") as infile:
+                    for chunk in iter_chunks(
+                        infile, hdus["EVENTS"], chunk_rows=chunk_rows
+                    ):
+                        # times are shifted on decoded values, and encoded
+                        # again with the TSCAL and TZERO of the output
+                        chunk = decode_chunk(chunk, encoding)
+                        if offset:
+                            chunk[time_column] += offset
+                        writer.write(chunk)
+
+                    soi = _read_table(infile, hdus["SOI"])
+                soi = soi.astype(soi.dtype.newbyteorder("="))
+                soi["START"] += offset
+                soi["STOP"] += offset
+                soi_tables.append(soi)
+
+        _write_table(outfile, inputs[0]["SOI"].header, _merge_soi(soi_tables))
+
+    if zone_columns:
+        index = build_index(output)
+        index.zones["EVENTS"] = writer.zone_map
+        write_sidecar(index)
+    return output
+
+
+def _merge_soi(tables: list[np.ndarray]) -> np.ndarray:
+    """Concatenate SOI tables, widening string columns as needed."""
+    names = tables[0].dtype.names
+    formats = []
+    for name in names:
+        fields = [table.dtype[name] for table in tables]
+        if fields[0].kind == "S":
+            formats.append(f"S{max(field.itemsize for field in fields)}")
+        else:
+            formats.append(fields[0])
+    dtype = np.dtype(dict(names=names, formats=formats))
+    merged = np.empty(sum(len(table) for table in tables), dtype=dtype)
+    first = 0
+    for table in tables:
+        for name in names:
+            merged[name][first : first + len(table)] = table[name]
+        first += len(table)
+    return merged[np.argsort(merged["START"], kind="stable")]
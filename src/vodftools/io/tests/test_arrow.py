@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from vodftools.io.arrow import (  # noqa: E402
+    parquet_header,
+    validate_parquet,
+    write_parquet,
+)
+from vodftools.models.level1 import eff_area_2d_hdu, soi_hdu  # noqa: E402
+
+
+def test_events_roundtrip(event_file_path, tmp_path):
+    output = write_parquet(event_file_path, tmp_path / "events.parquet", chunk_rows=300)
+
+    parquet = pq.ParquetFile(output)
+    assert parquet.metadata.num_row_groups == 4
+    table = parquet.read()
+    assert table.schema.field("ENERGY").metadata[b"unit"] == b"TeV"
+
+    with fits.open(event_file_path) as hdul:
+        data = hdul["EVENTS"].data
+        for name in ["EVENT_ID", "TIME", "ENERGY"]:
+            np.testing.assert_array_equal(table[name].to_numpy(), data[name])
+
+
+def test_schema_metadata_and_validation(event_file_path, tmp_path):
+    cpu_count = pa.cpu_count()
+    output = write_parquet(
+        event_file_path,
+        tmp_path / "soi.parquet",
+        extension=soi_hdu,
+        hdu="SOI",
+        max_workers=cpu_count + 3,
+    )
+    assert pa.cpu_count() == cpu_count
+    field = pq.read_schema(output).field("START")
+    assert field.metadata[b"ucd"] == b"time.start"
+    assert field.metadata[b"dtype"] == b"float32"
+    assert pq.read_table(output)["IRF"].to_pylist() == ["IRF_A", "IRF_B"]
+
+    assert validate_parquet(output, soi_hdu) == []
+    # the width of character columns is kept
+    original = fits.getheader(event_file_path, "SOI")
+    assert parquet_header(output)["TFORM3"] == original["TFORM3"] != "1A"
+
+    # changing the type of a column is detected
+    table = pq.read_table(output)
+    index = table.schema.get_field_index("START")
+    table = table.set_column(
+        index,
+        table.schema.field("START").with_type(pa.float64()),
+        table["START"].cast(pa.float64()),
+    )
+    pq.write_table(table, output)
+    findings = validate_parquet(output, soi_hdu)
+    assert [f.element for f in findings] == ["START"]
+
+
+def test_array_columns(tmp_path):
+    energy = np.geomspace(0.1, 100, 11)
+    offset = np.linspace(0, 5, 6)
+    aeff = np.arange(50.0).reshape(1, 5, 10)
+    columns = [
+        fits.Column("ENERGY_LO", "10D", unit="TeV", array=energy[None, :-1]),
+        fits.Column("ENERGY_HI", "10D", unit="TeV", array=energy[None, 1:]),
+        fits.Column("OFFSET_LO", "5D", unit="deg", array=offset[None, :-1]),
+        fits.Column("OFFSET_HI", "5D", unit="deg", array=offset[None, 1:]),
+        fits.Column("AEFF", "50D", unit="m2", dim="(10,5)", array=aeff),
+    ]
+    hdu = fits.BinTableHDU.from_columns(columns, name="EFFECTIVE_AREA")
+    path = tmp_path / "irf.fits"
+    fits.HDUList([fits.PrimaryHDU(), hdu]).writeto(path)
+
+    output = write_parquet(
+        path, tmp_path / "irf.parquet", extension=eff_area_2d_hdu, hdu="EFFECTIVE_AREA"
+    )
+    table = pq.read_table(output)
+    assert table.schema.field("AEFF").metadata[b"shape"] == b"5,10"
+    np.testing.assert_array_equal(
+        np.asarray(table["AEFF"][0].values).reshape(5, 10), aeff[0]
+    )
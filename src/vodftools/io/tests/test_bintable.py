@@ -0,0 +1,78 @@
+import io
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.io.bintable import (
+    BinTableWriter,
+    find_hdu,
+    iter_chunks,
+    scan_hdus,
+    table_dtype,
+    table_header,
+    write_primary,
+)
+
+
+def test_scan_hdus(event_file_path):
+    with open(event_file_path, "rb") as infile:
+        hdus = list(scan_hdus(infile))
+
+    with fits.open(event_file_path) as hdul:
+        assert [hdu.name for hdu in hdus] == [hdu.name for hdu in hdul]
+        for info, hdu in zip(hdus, hdul):
+            assert info.data_offset == hdu.fileinfo()["datLoc"]
+            assert info.header_offset == hdu.fileinfo()["hdrLoc"]
+            header = hdu.header
+            axes = [header[f"NAXIS{axis}"] for axis in range(1, header["NAXIS"] + 1)]
+            size = int(np.prod(axes)) * abs(header["BITPIX"]) // 8 if axes else 0
+            assert info.data_size == size + header.get("PCOUNT", 0)
+            # the data span is padded to whole blocks
+            assert hdu.fileinfo()["datSpan"] == -(-info.data_size // 2880) * 2880
+
+
+def test_iter_chunks(event_file_path):
+    with open(event_file_path, "rb") as infile:
+        events = find_hdu(infile, "EVENTS")
+        chunks = list(iter_chunks(infile, events, columns=["TIME"], chunk_rows=300))
+
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    assert chunks[0].dtype.names == ("TIME",)
+    with fits.open(event_file_path) as hdul:
+        np.testing.assert_array_equal(
+            np.concatenate(chunks)["TIME"], hdul["EVENTS"].data["TIME"]
+        )
+
+    with pytest.raises(KeyError):
+        with open(event_file_path, "rb") as infile:
+            find_hdu(infile, "GTI")
+
+
+def test_writer_roundtrip():
+    dtype = np.dtype([("A", ">f8"), ("B", ">i4", (2, 3)), ("C", "S5")])
+    template = fits.Header([("TUNIT1", "s"), ("OBS_ID", 5)])
+    header = table_header(dtype, template)
+    assert table_dtype(header) == dtype
+
+    rows = np.zeros(10, dtype=[("A", "<f8"), ("B", "<i4", (2, 3)), ("C", "S5")])
+    rows["A"] = np.arange(10)
+    rows["B"] = 7
+    rows["C"] = b"hello"
+
+    out = io.BytesIO()
+    write_primary(out)
+    with BinTableWriter(out, header) as writer:
+        writer.header["OBS_ID"] = 6
+        writer.write(rows[:4])
+        writer.write(rows[4:])
+
+    out.seek(0)
+    with fits.open(out) as hdul:
+        table = hdul[1]
+        assert table.header["NAXIS2"] == 10
+        assert table.header["OBS_ID"] == 6
+        assert table.columns["A"].unit == "s"
+        np.testing.assert_array_equal(table.data["A"], rows["A"])
+        np.testing.assert_array_equal(table.data["B"], rows["B"])
+        assert table.data["C"][3] == "hello"
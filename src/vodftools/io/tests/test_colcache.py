@@ -0,0 +1,169 @@
+import io
+import time
+import warnings
+
+import numpy as np
+from astropy.io import fits
+
+from vodftools.io.bintable import (
+    BinTableWriter,
+    find_hdu,
+    iter_chunks,
+    read_columns,
+    table_header,
+    write_primary,
+)
+from vodftools.io.colcache import (
+    ColumnCache,
+    column_cache,
+    get_column_cache,
+    table_key,
+)
+
+# 15 bytes per row, so rows are not aligned with 32-bit words
+DTYPE = np.dtype([("TIME", ">f8"), ("ENERGY", ">f4"), ("FLAG", ">i2"), ("Q", "u1")])
+
+
+def make_rows(n_rows, seed):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(n_rows, dtype=DTYPE)
+    rows["TIME"] = np.sort(rng.uniform(0, 1000, n_rows))
+    rows["ENERGY"] = rng.lognormal(0, 1, n_rows)
+    rows["FLAG"] = rng.integers(-100, 100, n_rows)
+    rows["Q"] = rng.integers(0, 255, n_rows)
+    return rows
+
+
+def write_table(path, rows, datasum=True, chunk=777):
+    header = table_header(DTYPE)
+    header["EXTNAME"] = "EVENTS"
+    if datasum:
+        header["DATASUM"] = "0"
+        header["CHECKSUM"] = "0000000000000000"
+    with open(path, "wb") as outfile:
+        write_primary(outfile)
+        with BinTableWriter(outfile, header) as writer:
+            for start in range(0, len(rows), chunk):
+                writer.write(rows[start : start + chunk])
+
+
+class CountingFile(io.FileIO):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.bytes_read = 0
+
+    def readinto(self, buffer):
+        size = super().readinto(buffer)
+        self.bytes_read += size
+        return size
+
+
+def test_writer_datasum(tmp_path):
+    rows = make_rows(1001, seed=1)
+    write_table(tmp_path / "table.fits", rows)
+    reference = fits.BinTableHDU(rows, name="EVENTS")
+    reference.writeto(tmp_path / "astropy.fits", checksum=True)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with fits.open(tmp_path / "table.fits", checksum=True) as hdul:
+            header = hdul["EVENTS"].header
+            assert "CHECKSUM" not in header
+            expected = fits.getheader(tmp_path / "astropy.fits", "EVENTS")
+            assert header["DATASUM"] == expected["DATASUM"]
+
+
+def test_cached_reads(tmp_path):
+    rows = make_rows(5000, seed=2)
+    path = tmp_path / "table.fits"
+    write_table(path, rows)
+    columns = ["ENERGY", "Q"]
+
+    with column_cache(tmp_path / "cache", "10MB") as cache:
+        with CountingFile(path) as infile:
+            hdu = find_hdu(infile, "EVENTS")
+            first = np.concatenate(list(iter_chunks(infile, hdu, columns, 1000)))
+            built = infile.bytes_read
+            assert built >= rows.nbytes
+            assert len(rows) * 5 < cache.size() < len(rows) * 5 + 1000
+
+            again = np.concatenate(list(iter_chunks(infile, hdu, columns, 999)))
+            part = read_columns(infile, hdu, ["Q"], 100, 50)
+            assert infile.bytes_read == built
+
+    for chunk in (first, again):
+        for name in columns:
+            np.testing.assert_array_equal(chunk[name], rows[name])
+    np.testing.assert_array_equal(part["Q"], rows["Q"][100:150])
+    assert get_column_cache() is None
+
+
+def test_invalidated_by_datasum(tmp_path):
+    path = tmp_path / "table.fits"
+    write_table(path, make_rows(100, seed=3))
+    with column_cache(tmp_path / "cache") as cache:
+        with open(path, "rb") as infile:
+            hdu = find_hdu(infile, "EVENTS")
+            old_key = table_key(hdu.header)
+            read_columns(infile, hdu, ["TIME"], 0, 100)
+
+        rows = make_rows(100, seed=4)
+        write_table(path, rows)
+        with open(path, "rb") as infile:
+            hdu = find_hdu(infile, "EVENTS")
+            assert table_key(hdu.header) != old_key
+            times = read_columns(infile, hdu, ["TIME"], 0, 100)["TIME"]
+        np.testing.assert_array_equal(times, rows["TIME"])
+        assert len(list(cache.directory.iterdir())) == 2
+
+
+def test_without_datasum(tmp_path):
+    path = tmp_path / "table.fits"
+    rows = make_rows(100, seed=5)
+    write_table(path, rows, datasum=False)
+    with column_cache(tmp_path / "cache") as cache, open(path, "rb") as infile:
+        hdu = find_hdu(infile, "EVENTS")
+        chunk = next(iter_chunks(infile, hdu, ["FLAG"]))
+        np.testing.assert_array_equal(chunk["FLAG"], rows["FLAG"])
+        assert cache.size() == 0
+
+
+def test_lru_eviction(tmp_path):
+    paths = [tmp_path / f"table{index}.fits" for index in range(4)]
+    for seed, path in enumerate(paths):
+        write_table(path, make_rows(3000 if seed == 3 else 1000, seed=seed))
+
+    # room for the TIME columns of two tables
+    cache = ColumnCache(tmp_path / "cache", max_size=2 * 8000 + 1000)
+
+    def read(path):
+        time.sleep(0.02)  # file times may be coarser than a nanosecond
+        with open(path, "rb") as infile:
+            hdu = find_hdu(infile, "EVENTS")
+            assert cache.columns(infile, hdu, ["TIME"]) is not None
+            return table_key(hdu.header)
+
+    keys = [read(paths[0]), read(paths[1])]
+    read(paths[0])  # table1 is now the least recently used
+    keys.append(read(paths[2]))
+    assert cache.size() <= cache.max_size
+    assert sorted(path.name for path in cache.directory.iterdir()) == sorted(
+        [keys[0], keys[2]]
+    )
+
+    # too large for the cache
+    with open(paths[3], "rb") as infile:
+        hdu = find_hdu(infile, "EVENTS")
+        assert cache.columns(infile, hdu, ["TIME"]) is None
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("VODF_COLUMN_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setenv("VODF_COLUMN_CACHE_SIZE", "1GB")
+    cache = get_column_cache()
+    assert cache.directory == tmp_path / "cache"
+    assert cache.max_size == 1024**3
+    with column_cache(None):
+        assert get_column_cache() is cache
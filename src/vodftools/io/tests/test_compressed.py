@@ -0,0 +1,97 @@
+import gzip
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.data_validation import validate_file_data
+from vodftools.io.bintable import find_hdu, iter_chunks, scan_hdus
+from vodftools.io.compressed import (
+    BGZFFile,
+    compress_bgzf,
+    detect_compression,
+    open_compressed,
+)
+from vodftools.io.remote import open_file
+from vodftools.models.level1 import event_file
+from vodftools.schema import Column, DataType, FITSFile, TableExtension
+from vodftools.validation import validate_file
+
+
+@pytest.fixture()
+def event_files(make_event_file, tmp_path):
+    """The same event file, plain, gzip-compressed and BGZF-compressed."""
+    path = make_event_file(n_events=50_000)
+    with fits.open(path, mode="update") as hdul:
+        hdul["EVENTS"].data["ENERGY"][[7, 40_000]] = np.nan
+
+    gzipped = tmp_path / "events.fits.gz"
+    gzipped.write_bytes(gzip.compress(path.read_bytes()))
+    bgzf = compress_bgzf(path, tmp_path / "events.bgzf.fits.gz", workers=2)
+    return dict(plain=path, gzip=gzipped, bgzf=bgzf)
+
+
+def test_detect_compression(event_files):
+    for name, path in event_files.items():
+        with open(path, "rb") as infile:
+            assert detect_compression(infile) == (name if name != "plain" else None)
+            assert infile.tell() == 0
+
+
+def test_bgzf_random_access(event_files):
+    data = event_files["plain"].read_bytes()
+    # BGZF is still valid gzip
+    assert gzip.decompress(event_files["bgzf"].read_bytes()) == data
+
+    with BGZFFile(open(event_files["bgzf"], "rb"), workers=4) as bgzf:
+        assert bgzf.num_blocks == -(-len(data) // 65280)
+        for offset, size in [(0, 10), (65270, 20), (100_000, 300_000), (0, 0)]:
+            bgzf.seek(offset)
+            assert bgzf.read(size) == data[offset : offset + size]
+        bgzf.seek(0)
+        assert bgzf.read() == data
+
+
+@pytest.mark.parametrize("name", ["gzip", "bgzf"])
+def test_scan_and_read(event_files, name):
+    with open(event_files["plain"], "rb") as infile:
+        expected = [hdu.header_offset for hdu in scan_hdus(infile)]
+        events = np.concatenate(list(iter_chunks(infile, find_hdu(infile, "EVENTS"))))
+
+    with open_file(event_files[name]) as fileobj:
+        assert [hdu.header_offset for hdu in scan_hdus(fileobj)] == expected
+    with open_compressed(open(event_files[name], "rb")) as fileobj:
+        hdu = find_hdu(fileobj, "EVENTS")
+        chunks = list(iter_chunks(fileobj, hdu, chunk_rows=10_000))
+    assert np.concatenate(chunks).tobytes() == events.tobytes()
+
+
+@pytest.mark.parametrize("name", ["gzip", "bgzf"])
+def test_validate_compressed(event_files, name):
+    expected = validate_file(event_files["plain"], event_file)
+    assert validate_file(event_files[name], event_file).findings == expected.findings
+
+    schema = FITSFile(
+        name="events",
+        description="events",
+        extensions=[
+            TableExtension(
+                name="EVENTS",
+                description="events",
+                class_hierarchy=["OGIP", "EVENTS"],
+                headers=[],
+                columns=[
+                    Column(
+                        name="ENERGY",
+                        description="energy",
+                        dtype=DataType.float32,
+                        ucd="phys.energy",
+                    )
+                ],
+            )
+        ],
+    )
+    expected = validate_file_data(event_files["plain"], schema, workers=1)
+    report = validate_file_data(event_files[name], schema, workers=2, chunk_rows=9000)
+    assert report.findings == expected.findings
+    assert "2 rows" in report.findings[0].message
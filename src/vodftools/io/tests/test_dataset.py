@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.io.dataset import EventDataset
+
+
+@pytest.fixture()
+def dataset(make_event_file, tmp_path):
+    for ii in range(5):
+        make_event_file(
+            f"run{ii}.fits", obs_id=ii, tstart=ii * 1000.0, duration=500.0, seed=ii
+        )
+    # IRF files may live in the same directory tree
+    (tmp_path / "irfs").mkdir()
+    aeff = fits.BinTableHDU.from_columns(
+        [fits.Column("AEFF", "D", array=[1.0])], name="EFFECTIVE_AREA"
+    )
+    fits.HDUList([fits.PrimaryHDU(), aeff]).writeto(tmp_path / "irfs" / "irf.fits")
+    return EventDataset.from_directory(tmp_path)
+
+
+def test_headers_only(dataset):
+    assert len(dataset) == 5
+    assert dataset.num_rows == 5000
+    assert dataset.time_range == (0.0, 4500.0)
+
+
+def test_from_paths_missing_events(tmp_path, dataset):
+    with pytest.raises(KeyError, match="EVENTS"):
+        EventDataset.from_paths([tmp_path / "irfs" / "irf.fits"])
+
+
+def test_select(dataset, monkeypatch):
+    selected = dataset.select(time=(1200.0, 3100.0))
+    assert [info.hdu.header["OBS_ID"] for info in selected.files] == [1, 2, 3]
+
+    selected = selected.select(OBS_ID=[2, 3, 4])
+    assert len(selected) == 2
+    assert len(dataset.select(OBS_ID=2, TELESCOP="CTAO")) == 0
+
+    rows = selected.read(columns=["TIME"])
+    assert np.all((rows["TIME"] >= 2000.0) & (rows["TIME"] < 3100.0))
+    assert np.any(rows["TIME"] > 3000)
+    assert len(dataset.select(OBS_ID=2).read()) == 1000
+
+    # pruned files are never opened
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    list(dataset.select(OBS_ID=4).iter_chunks(chunk_rows=100))
+    assert [path.name for path in opened] == ["run4.fits"]
@@ -0,0 +1,203 @@
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+from astropy.io import fits
+from pydantic import ValidationError
+
+from vodftools.binning import BinEdges, bin_events
+from vodftools.data_validation import validate_file_data
+from vodftools.fits_template import fits_template
+from vodftools.io.arrow import write_parquet
+from vodftools.io.bintable import (
+    BinTableWriter,
+    find_hdu,
+    iter_chunks,
+    scan_hdus,
+    table_header,
+    write_primary,
+)
+from vodftools.io.encoding import (
+    apply_encoding,
+    decode_chunk,
+    encode_values,
+    encoding_plan,
+    iter_decoded_chunks,
+    storage_dtype,
+)
+from vodftools.io.stacking import split_by_time, stack_event_files
+from vodftools.io.zonemap import col, select
+from vodftools.models.level1 import event_file, event_list_hdu
+from vodftools.schema import Column, ColumnEncoding, DataType, FITSFile, TableExtension
+from vodftools.synthetic import generate_file
+from vodftools.validation import validate_file
+
+EVENTS = TableExtension(
+    name="EVENTS",
+    description="events",
+    class_hierarchy=["OGIP", "EVENTS"],
+    headers=[],
+    columns=[
+        Column(
+            name="TIME",
+            description="time",
+            dtype=DataType.float64,
+            unit="s",
+            ucd="time",
+            encoding=ColumnEncoding(
+                storage=DataType.int64, scale=1e-6, reference="TSTART"
+            ),
+        ),
+        Column(
+            name="ENERGY",
+            description="energy",
+            dtype=DataType.float64,
+            unit="TeV",
+            ucd="phys.energy",
+            encoding=ColumnEncoding(storage=DataType.int32, scale=1e-6),
+        ),
+    ],
+)
+
+
+@pytest.fixture()
+def encoded_file(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = np.empty(10_000, dtype=[("TIME", "f8"), ("ENERGY", "f8")])
+    rows["TIME"] = np.sort(rng.uniform(6e8, 6e8 + 1800, len(rows)))
+    rows["ENERGY"] = rng.lognormal(0, 1, len(rows))
+
+    template = fits.Header()
+    template["EXTNAME"] = "EVENTS"
+    template["TSTART"] = 6e8
+    header = apply_encoding(
+        table_header(storage_dtype(EVENTS, rows.dtype), template), EVENTS
+    )
+    path = tmp_path / "encoded.fits"
+    with open(path, "wb") as outfile:
+        write_primary(outfile)
+        with BinTableWriter(
+            outfile, header, zone_columns=["TIME"], zone_rows=1000
+        ) as writer:
+            for start in range(0, len(rows), 3000):
+                writer.write(rows[start : start + 3000])
+    return path, rows, writer.zone_map
+
+
+def test_encoding_must_be_integer():
+    with pytest.raises(ValidationError, match="integer"):
+        ColumnEncoding(storage=DataType.float32)
+
+
+def test_write_and_read_encoded(encoded_file):
+    path, rows, zone_map = encoded_file
+    with open(path, "rb") as infile:
+        hdu = find_hdu(infile, "EVENTS")
+        assert encoding_plan(hdu.header) == {"TIME": (1e-6, 6e8), "ENERGY": (1e-6, 0.0)}
+        assert hdu.row_size == 12
+        decoded = np.concatenate(list(iter_decoded_chunks(infile, hdu, chunk_rows=999)))
+
+    assert np.allclose(decoded["TIME"], rows["TIME"], rtol=0, atol=1e-6)
+    assert np.allclose(decoded["ENERGY"], rows["ENERGY"], rtol=0, atol=1e-6)
+    # readable by other FITS readers; astropy needs uint=False for an int64
+    # column with a TZERO other than 2**63
+    with fits.open(path, uint=False) as hdul:
+        table = hdul["EVENTS"].data
+        assert np.allclose(table["TIME"], rows["TIME"], rtol=0, atol=1e-6)
+        assert np.allclose(table["ENERGY"], rows["ENERGY"], rtol=0, atol=1e-6)
+
+    # zone maps and selections use the decoded values
+    assert zone_map.mins["TIME"][0] == pytest.approx(rows["TIME"][0], abs=1e-6)
+    selected = select(path, col("TIME") < 6e8 + 100)
+    assert len(selected) == np.count_nonzero(decoded["TIME"] < 6e8 + 100)
+
+
+def test_encode_out_of_range():
+    with pytest.raises(ValueError, match="int16"):
+        encode_values(np.array([1.0, 40000.0]), 1.0, 0.0, np.int16)
+    with pytest.raises(ValueError, match="nan"):
+        encode_values(np.array([np.nan]), 1.0, 0.0, np.int32)
+
+
+def test_decode_unsigned_convention():
+    chunk = np.array([(-(2**31),), (2**31 - 1,)], dtype=[("COUNT", ">i4")])
+    decoded = decode_chunk(chunk, {"COUNT": (1.0, 2.0**31)})
+    assert decoded["COUNT"].dtype == np.uint32
+    assert decoded["COUNT"].tolist() == [0, 2**32 - 1]
+
+
+def test_template_and_synthetic_files(tmp_path):
+    lines = list(fits_template(EVENTS))
+    assert any(line.startswith("TFORM# = K ") for line in lines)
+    assert any(line.startswith("TSCAL# = 1e-06") for line in lines)
+    assert any("TZERO# = 0.0 " in line and "TSTART" in line for line in lines)
+
+    schema = FITSFile(name="encoded", description="encoded", extensions=[EVENTS])
+    path = generate_file(
+        schema,
+        tmp_path / "synthetic.fits",
+        num_rows=500,
+        header_values={"EVENTS": {"TSTART": 1000.0}},
+        time_step=0.5,
+        workers=1,
+    )
+    assert validate_file(path, schema).ok
+    with fits.open(path, uint=False) as hdul:
+        events = hdul["EVENTS"]
+        assert events.header["TFORM1"] == "K"
+        assert events.header["TZERO1"] == 1000.0
+        assert np.all(events.data["TIME"] < 500 * 0.5)
+
+
+def encode_event_file(source, output):
+    """Copy an event file, with TIME and ENERGY encoded as in the level-1 model."""
+    with open(source, "rb") as infile:
+        hdus = {hdu.name: hdu for hdu in scan_hdus(infile)}
+        events = np.concatenate(list(iter_chunks(infile, hdus["EVENTS"])))
+        soi = np.concatenate(list(iter_chunks(infile, hdus["SOI"])))
+
+    rows = np.empty(len(events), dtype=events.dtype.descr + [("OFFSET", ">f4")])
+    for name in events.dtype.names:
+        rows[name] = events[name]
+    rows["ENERGY"] = 1.5
+    rows["OFFSET"] = 0.5
+    header = table_header(
+        storage_dtype(event_list_hdu, rows.dtype), hdus["EVENTS"].header
+    )
+    with open(output, "wb") as outfile:
+        write_primary(outfile, hdus["PRIMARY"].header)
+        with BinTableWriter(outfile, apply_encoding(header, event_list_hdu)) as writer:
+            writer.write(rows)
+        with BinTableWriter(outfile, hdus["SOI"].header) as writer:
+            writer.write(soi)
+    return output, rows
+
+
+def test_readers_decode(make_event_file, tmp_path):
+    path, rows = encode_event_file(make_event_file(), tmp_path / "encoded.fits")
+    with fits.open(path) as hdul:
+        assert hdul["EVENTS"].header["TFORM2"] == "K"
+        assert hdul["EVENTS"].header["TFORM3"] == "J"
+        np.testing.assert_allclose(hdul["EVENTS"].data["TIME"], rows["TIME"], atol=1e-8)
+    assert validate_file(path, event_file).ok
+    assert validate_file_data(path, event_file, workers=1).findings == []
+
+    edges = BinEdges(energy=np.array([1.0, 2.0, 1e7]), offset=np.array([0.0, 1.0]))
+    cube = bin_events([path], edges, workers=1)
+    assert cube.counts[:, 0].tolist() == [len(rows), 0]
+
+    def read(output, name):
+        with fits.open(output) as hdul:
+            return hdul["EVENTS"].data[name].copy()
+
+    stacked = stack_event_files([path, path], tmp_path / "stacked.fits")
+    np.testing.assert_allclose(
+        read(stacked, "TIME"), np.tile(rows["TIME"], 2), atol=1e-8
+    )
+    np.testing.assert_allclose(read(stacked, "ENERGY"), 1.5)
+    shards = split_by_time(path, tmp_path / "shards", 600.0)
+    times = np.concatenate([read(shard, "TIME") for shard in shards])
+    np.testing.assert_allclose(times, rows["TIME"], atol=1e-8)
+
+    parquet = pq.read_table(write_parquet(path, tmp_path / "encoded.parquet"))
+    np.testing.assert_allclose(parquet["TIME"].to_numpy(), rows["TIME"], atol=1e-8)
+    np.testing.assert_allclose(parquet["ENERGY"].to_numpy(), 1.5)
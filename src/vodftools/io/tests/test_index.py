@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.io.bintable import find_hdu, scan_hdus
+from vodftools.io.dataset import EventFileInfo
+from vodftools.io.index import (
+    IndexDatabase,
+    build_index,
+    load_index,
+    read_sidecar,
+    sidecar_path,
+    write_sidecar,
+)
+from vodftools.models.level1 import event_file
+from vodftools.validation import validate_file
+
+
+@pytest.fixture()
+def irf_file(tmp_path):
+    """A file with many HDUs, the wanted one near the end."""
+    hdus = [fits.PrimaryHDU()]
+    for version in range(1, 21):
+        table = fits.BinTableHDU.from_columns(
+            [fits.Column("ENERG_LO", "E", array=np.arange(10.0) * version)],
+            name="EFFECTIVE_AREA",
+            ver=version,
+        )
+        table.header["HDUCLASS"] = "VODF"
+        table.header["HDUCLAS1"] = "EFF_AREA"
+        hdus.append(table)
+    path = tmp_path / "irfs.fits"
+    fits.HDUList(hdus).writeto(path)
+    return path
+
+
+def test_build_index(irf_file):
+    index = build_index(irf_file)
+    with open(irf_file, "rb") as infile:
+        hdus = list(scan_hdus(infile))
+
+    assert len(index.hdus) == 21
+    for entry, hdu in zip(index.hdus, hdus):
+        assert (entry.name, entry.version) == (hdu.name, hdu.version)
+        assert entry.header_offset == hdu.header_offset
+        assert entry.data_offset == hdu.data_offset
+        assert entry.data_size == hdu.data_size
+    assert index.find("EFFECTIVE_AREA", 20).index == 20
+    assert len(index.with_class("VODF", "EFF_AREA")) == 20
+    with pytest.raises(KeyError):
+        index.find("EFFECTIVE_AREA", 21)
+
+
+class _CountingFile:
+    """File wrapper counting the bytes read."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, *args):
+        return self.fileobj.seek(*args)
+
+
+def test_find_with_index(irf_file):
+    index = load_index(irf_file, write=True)
+    assert sidecar_path(irf_file).exists()
+
+    with open(irf_file, "rb") as infile:
+        counting = _CountingFile(infile)
+        scanned = find_hdu(counting, "EFFECTIVE_AREA", 15)
+        scan_bytes = counting.bytes_read
+        counting.bytes_read = 0
+        direct = find_hdu(counting, "EFFECTIVE_AREA", 15, index=index)
+
+    assert direct.index == scanned.index == 15
+    assert direct.data_offset == scanned.data_offset
+    assert counting.bytes_read == 2880 < scan_bytes / 10
+
+
+def test_sidecar_invalidation(irf_file):
+    write_sidecar(build_index(irf_file))
+    assert read_sidecar(irf_file) is not None
+
+    with fits.open(irf_file, mode="append") as hdul:
+        hdul.append(fits.ImageHDU(name="EXTRA"))
+    assert read_sidecar(irf_file) is None
+    assert load_index(irf_file).find("EXTRA").index == 21
+
+    sidecar_path(irf_file).write_text("not json")
+    assert read_sidecar(irf_file) is None
+
+
+def test_index_database(make_event_file, irf_file, tmp_path):
+    events = [make_event_file(f"events_{ii}.fits", obs_id=ii) for ii in range(3)]
+    with IndexDatabase(tmp_path / "index.sqlite") as database:
+        assert database.add([*events, irf_file], workers=2) == 4
+        assert database.add([*events, irf_file]) == 0
+        assert len(database) == 4
+
+        found = list(database.find("EFFECTIVE_AREA", version=3))
+        assert [(path, entry.index) for path, entry in found] == [(str(irf_file), 3)]
+        assert len(list(database.find("SOI"))) == 3
+
+        # a changed file is indexed again
+        os.utime(events[0], ns=(0, 0))
+        assert database.get(events[0]) is None
+        assert database.add(events) == 1
+        assert load_index(events[1], database=database).find("SOI").index == 2
+
+
+def test_validate_and_read_with_sidecar(event_file_path):
+    expected = validate_file(event_file_path, event_file)
+    write_sidecar(build_index(event_file_path))
+    assert validate_file(event_file_path, event_file).findings == expected.findings
+    assert EventFileInfo.from_path(event_file_path).num_rows == 1000
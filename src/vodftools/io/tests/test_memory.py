@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from vodftools.io.bintable import find_hdu, iter_chunks
+from vodftools.io.memory import (
+    DEFAULT_MEMORY_BUDGET,
+    MemoryTracker,
+    chunk_rows_for,
+    get_memory_budget,
+    memory_budget,
+    parse_size,
+    row_width,
+)
+from vodftools.models.level1 import eff_area_2d_hdu
+
+
+def test_parse_size():
+    assert parse_size(1024) == 1024
+    assert parse_size("2K") == 2048
+    assert parse_size("512MB") == 512 * 1024**2
+    assert parse_size("1.5 GiB") == int(1.5 * 1024**3)
+    with pytest.raises(ValueError, match="invalid size"):
+        parse_size("lots")
+
+
+def test_budget_priority(monkeypatch):
+    monkeypatch.setattr("vodftools.io.memory.cgroup_memory_limit", lambda: None)
+    monkeypatch.delenv("VODF_MEMORY_BUDGET", raising=False)
+    assert get_memory_budget() == DEFAULT_MEMORY_BUDGET
+
+    monkeypatch.setenv("VODF_MEMORY_BUDGET", "64M")
+    assert get_memory_budget() == 64 * 1024**2
+
+    with memory_budget("1M") as budget:
+        assert budget == get_memory_budget() == 1024**2
+    assert get_memory_budget() == 64 * 1024**2
+
+
+def test_chunk_rows_for():
+    narrow, wide = 20, row_width(eff_area_2d_hdu, array_length=100)
+    assert wide > 1000 * narrow
+
+    budget = 100 * 1024**2
+    assert chunk_rows_for(narrow, budget) > 1000 * chunk_rows_for(wide, budget)
+    assert chunk_rows_for(narrow, budget, copies=1) * narrow <= budget
+    assert chunk_rows_for(narrow, budget, workers=4) == chunk_rows_for(
+        narrow, budget // 4
+    )
+    # at least one row, even if it does not fit
+    assert chunk_rows_for(10 * budget, budget) == 1
+
+
+def test_iter_chunks_follows_budget(event_file_path):
+    with open(event_file_path, "rb") as infile:
+        hdu = find_hdu(infile, "EVENTS")
+        with memory_budget(hdu.row_size * 200):
+            sizes = [len(chunk) for chunk in iter_chunks(infile, hdu)]
+
+    assert sum(sizes) == hdu.num_rows
+    assert max(sizes) == 100
+
+
+def test_memory_tracker():
+    with memory_budget("1M"), MemoryTracker() as tracker:
+        data = np.ones(1024**2 // 8 * 4)
+        del data
+
+    assert tracker.peak >= 4 * 1024**2
+    assert not tracker.within_budget
+    assert tracker.max_rss > 0
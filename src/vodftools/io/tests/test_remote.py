@@ -0,0 +1,182 @@
+import threading
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.io.bintable import find_hdu, iter_chunks, read_columns, scan_hdus
+from vodftools.io.remote import (
+    ConnectionPool,
+    HTTPBackend,
+    RangeFile,
+    coalesce_ranges,
+    is_remote,
+    open_file,
+)
+from vodftools.models.level1 import event_file
+from vodftools.validation import validate_file
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file server supporting single Range requests and keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _serve(self, with_body):
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        data = path.read_bytes()
+        body, status = data, HTTPStatus.OK
+
+        requested = self.headers.get("Range")
+        if requested and with_body:
+            start, stop = requested.removeprefix("bytes=").split("-")
+            start, stop = int(start), min(int(stop) + 1, len(data))
+            body, status = data[start:stop], HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{stop - 1}/{len(data)}")
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        self._serve(with_body=True)
+
+    def do_HEAD(self):  # noqa: N802
+        self._serve(with_body=False)
+
+
+@pytest.fixture()
+def http_server(tmp_path):
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(RangeRequestHandler, directory=str(tmp_path))
+    )
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server, path):
+    host, port = server.server_address
+    return f"http://{host}:{port}/{path.name}"
+
+
+def test_coalesce_ranges():
+    ranges = [(100, 110), (0, 10), (15, 20), (50, 60)]
+    assert coalesce_ranges(ranges, max_gap=5) == [(0, 20), (50, 60), (100, 110)]
+    assert coalesce_ranges(ranges, max_gap=100) == [(0, 110)]
+    assert coalesce_ranges([(0, 100), (10, 20)], max_gap=0) == [(0, 100)]
+
+
+def test_open_file():
+    assert not is_remote("/data/events.fits")
+    assert is_remote("https://example.org/events.fits")
+    assert is_remote("s3://bucket/events.fits")
+
+
+def test_headers_only(http_server, make_event_file):
+    path = make_event_file(n_events=100_000)
+    url = _url(http_server, path)
+
+    with open(path, "rb") as infile:
+        expected = [(hdu.name, hdu.data_offset) for hdu in scan_hdus(infile)]
+    with open_file(url, block_size=8 * 2880) as remote:
+        found = [(hdu.name, hdu.data_offset) for hdu in scan_hdus(remote)]
+
+    assert found == expected
+    assert remote.backend.bytes_received < path.stat().st_size / 10
+
+
+def test_validate_remote(http_server, make_event_file):
+    path = make_event_file()
+    local = validate_file(path, event_file)
+    remote = validate_file(_url(http_server, path), event_file)
+    assert remote.findings == local.findings
+
+
+def test_read_columns(http_server, tmp_path):
+    # rows are wide, so reading one narrow column saves most of the transfer
+    path = tmp_path / "wide.fits"
+    fits.BinTableHDU.from_columns(
+        [
+            fits.Column("ID", "K", array=np.arange(200)),
+            fits.Column("VALUES", "4000E", array=np.ones((200, 4000))),
+        ],
+        name="WIDE",
+    ).writeto(path)
+
+    with open_file(_url(http_server, path), block_size=2880, max_gap=0) as remote:
+        hdu = find_hdu(remote, "WIDE")
+        before = remote.backend.bytes_received
+        chunks = list(iter_chunks(remote, hdu, columns=["ID"], chunk_rows=64))
+        transferred = remote.backend.bytes_received - before
+
+    assert np.concatenate(chunks)["ID"].tolist() == list(range(200))
+    assert chunks[0].dtype.names == ("ID",)
+    assert transferred == 200 * 8
+
+
+@pytest.mark.parametrize("max_gap", [0, 100_000])
+def test_read_separate_columns(http_server, tmp_path, max_gap):
+    path = tmp_path / "columns.fits"
+    rows = np.zeros(300, dtype=[("A", ">i4"), ("B", ">f8", (100,)), ("C", ">i2")])
+    rows["A"] = np.arange(300)
+    rows["C"] = -np.arange(300)
+    fits.BinTableHDU(rows, name="TABLE").writeto(path)
+
+    with open_file(_url(http_server, path), block_size=2880, max_gap=max_gap) as remote:
+        hdu = find_hdu(remote, "TABLE")
+        before = remote.backend.bytes_received
+        table = read_columns(remote, hdu, ["C", "A"], 10, 250)
+        transferred = remote.backend.bytes_received - before
+
+    assert table.dtype.names == ("C", "A")
+    assert table["A"].tolist() == list(range(10, 260))
+    assert table["C"].tolist() == [-index for index in range(10, 260)]
+    if max_gap == 0:
+        assert transferred == 250 * 6
+    assert len(read_columns(remote, hdu, ["A"], 0, 0)) == 0
+
+
+def test_connection_pool(http_server, make_event_file):
+    path = make_event_file()
+    pool = ConnectionPool(maxsize=2)
+    backend = HTTPBackend(_url(http_server, path), pool=pool)
+    remote = RangeFile(backend, block_size=2880, cache_blocks=1)
+
+    remote.seek(2880)
+    assert remote.read(10) == path.read_bytes()[2880:2890]
+    remote.seek(0)
+    remote.read(5)
+    # the kept-alive connection is back in the pool after each request
+    assert backend.num_requests == 3
+    [idle] = pool._idle.values()
+    assert idle.qsize() == 1
+    pool.close()
+
+
+def test_s3_endpoint(http_server, make_event_file, monkeypatch, tmp_path):
+    path = make_event_file()
+    bucket = tmp_path / "bucket"
+    bucket.mkdir()
+    (bucket / "events.fits").write_bytes(path.read_bytes())
+
+    host, port = http_server.server_address
+    monkeypatch.setenv("AWS_ENDPOINT_URL", f"http://{host}:{port}")
+    with open_file("s3://bucket/events.fits") as remote:
+        assert find_hdu(remote, "SOI").num_rows == 2
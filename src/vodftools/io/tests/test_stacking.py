@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.io.stacking import split_by_time, stack_event_files
+from vodftools.models.level1 import event_file
+from vodftools.validation import validate_file
+
+
+def test_split_by_time(make_event_file, tmp_path):
+    path = make_event_file(tstart=0.0, duration=1000.0, n_events=5000)
+    shards = split_by_time(path, tmp_path / "shards", 300.0, chunk_rows=700)
+    assert len(shards) == 4
+
+    with fits.open(path) as hdul:
+        original = hdul["EVENTS"].data["TIME"]
+
+    times = []
+    for index, shard in enumerate(shards):
+        assert validate_file(shard, event_file).ok
+        with fits.open(shard) as hdul:
+            events, soi = hdul["EVENTS"], hdul["SOI"]
+            start, stop = index * 300.0, min((index + 1) * 300.0, 1000.0)
+            assert events.header["TSTART"] == start
+            assert events.header["TSTOP"] == stop
+            assert np.all((events.data["TIME"] >= start) & (events.data["TIME"] < stop))
+            assert soi.data["START"].min() == start
+            assert soi.data["STOP"].max() == stop
+            times.append(events.data["TIME"])
+
+    np.testing.assert_array_equal(np.concatenate(times), original)
+
+    # the SOI boundary at 500 s falls in the second shard
+    with fits.open(shards[1]) as hdul:
+        assert list(hdul["SOI"].data["IRF"]) == ["IRF_A", "IRF_B"]
+
+
+def test_split_in_batches(make_event_file, tmp_path):
+    path = make_event_file(tstart=0.0, duration=1000.0, n_events=2000)
+    with fits.open(path, mode="update") as hdul:
+        times = hdul["EVENTS"].data["TIME"]
+        times[:3] = [-5.0, np.nan, 1000.0]
+        times[-1] = 1001.0
+        expected = times[(times >= 0) & (times <= 1000)]
+
+    with pytest.warns(UserWarning, match="3 events .* were dropped"):
+        shards = split_by_time(path, tmp_path / "shards", 100.0, max_open_files=3)
+    assert len(shards) == 10
+
+    split = []
+    for shard in shards:
+        with fits.open(shard) as hdul:
+            split.append(hdul["EVENTS"].data["TIME"])
+    # TSTOP belongs to the last shard
+    assert 1000.0 in split[-1]
+    np.testing.assert_array_equal(np.sort(np.concatenate(split)), np.sort(expected))
+
+
+def test_stack_event_files(make_event_file, tmp_path):
+    paths = [
+        make_event_file(f"run{ii}.fits", obs_id=ii, tstart=ii * 2000.0, seed=ii)
+        for ii in range(3)
+    ]
+    with fits.open(paths[2], mode="update") as hdul:
+        # shift reference time by 1000 s
+        for hdu in hdul[1:]:
+            hdu.header["MJDREFF"] += 1000 / 86400
+        hdul["EVENTS"].data["TIME"] -= 1000
+        hdul["EVENTS"].header["TSTART"] -= 1000
+        hdul["EVENTS"].header["TSTOP"] -= 1000
+        hdul["SOI"].data["START"] -= 1000
+        hdul["SOI"].data["STOP"] -= 1000
+
+    output = stack_event_files(paths, tmp_path / "stacked.fits", chunk_rows=333)
+    assert validate_file(output, event_file).ok
+
+    with fits.open(output) as hdul:
+        events, soi = hdul["EVENTS"], hdul["SOI"]
+        assert len(events.data) == 3000
+        assert events.header["TSTART"] == 0.0
+        assert np.isclose(events.header["TSTOP"], 5800.0)
+        assert len(soi.data) == 6
+        assert np.all(np.diff(soi.data["START"]) > 0)
+        assert np.isclose(
+            events.data["TIME"][2000:].min(), soi.data["START"][4], atol=5
+        )
+        assert len(events.header["HISTORY"]) == 3
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from astropy import units as u
+from astropy.io import fits
+
+from vodftools.io.bintable import (
+    BinTableWriter,
+    find_hdu,
+    table_header,
+    write_primary,
+)
+from vodftools.io.units import conversion_factor, conversion_plan, iter_converted_chunks
+from vodftools.schema import Column, DataType, TableExtension
+
+events_hdu = TableExtension(
+    name="EVENTS",
+    description="events",
+    class_hierarchy=["OGIP", "EVENTS"],
+    headers=[],
+    columns=[
+        Column(name="TIME", description="time", dtype=DataType.float64, unit="s"),
+        Column(name="ENERGY", description="energy", dtype=DataType.float32, unit="TeV"),
+        Column(name="EVENT_ID", description="id", dtype=DataType.int64),
+    ],
+)
+
+
+def test_conversion_factor():
+    conversion_factor.cache_clear()
+    assert conversion_factor("GeV", "TeV") == pytest.approx(1e-3)
+    conversion_factor("GeV", "TeV")
+    assert conversion_factor.cache_info().hits == 1
+
+    with pytest.raises(u.UnitConversionError, match="energy"):
+        conversion_factor("m", "TeV")
+
+
+def test_convert_on_read(event_file_path):
+    with fits.open(event_file_path, mode="update") as hdul:
+        expected = hdul["EVENTS"].data["ENERGY"].copy()
+        hdul["EVENTS"].data["ENERGY"] *= 1000
+        hdul["EVENTS"].columns.change_unit("ENERGY", "GeV")
+
+    with open(event_file_path, "rb") as infile:
+        events = find_hdu(infile, "EVENTS")
+        assert conversion_plan(events.header, events_hdu) == {
+            "ENERGY": pytest.approx(1e-3)
+        }
+        chunks = list(iter_converted_chunks(infile, events, events_hdu, chunk_rows=300))
+
+    energy = np.concatenate(chunks)["ENERGY"]
+    assert energy.dtype.itemsize == 4
+    np.testing.assert_allclose(energy, expected, rtol=1e-6)
+
+
+def test_incompatible_units_rejected_upfront(event_file_path):
+    with fits.open(event_file_path, mode="update") as hdul:
+        hdul["EVENTS"].columns.change_unit("ENERGY", "m")
+        hdul["EVENTS"].columns.change_unit("TIME", "d")
+
+    with open(event_file_path, "rb") as infile:
+        events = find_hdu(infile, "EVENTS")
+        with pytest.raises(u.UnitConversionError, match="ENERGY"):
+            next(iter_converted_chunks(infile, events, events_hdu))
+
+
+def test_integer_storage_rejected_upfront(tmp_path):
+    energy = fits.Column("ENERGY", "J", unit="GeV", array=np.arange(10))
+    fits.BinTableHDU.from_columns([energy], name="EVENTS").writeto(tmp_path / "i.fits")
+    with open(tmp_path / "i.fits", "rb") as infile:
+        events = find_hdu(infile, "EVENTS")
+        with pytest.raises(u.UnitConversionError, match="stored as int32"):
+            next(iter_converted_chunks(infile, events, events_hdu))
+
+    # scaled integers are decoded to floats first
+    rows = np.zeros(10, dtype=[("ENERGY", ">i4")])
+    rows["ENERGY"] = np.arange(10)
+    header = table_header(rows.dtype)
+    header.update(EXTNAME="EVENTS", TUNIT1="GeV", TSCAL1=0.5)
+    with open(tmp_path / "s.fits", "wb") as outfile:
+        write_primary(outfile)
+        with BinTableWriter(outfile, header) as writer:
+            writer.write(rows)
+    with open(tmp_path / "s.fits", "rb") as infile:
+        events = find_hdu(infile, "EVENTS")
+        [chunk] = iter_converted_chunks(infile, events, events_hdu)
+    np.testing.assert_allclose(chunk["ENERGY"], np.arange(10) * 0.5e-3)
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.io import zonemap
+from vodftools.io.bintable import find_hdu
+from vodftools.io.dataset import EventDataset
+from vodftools.io.index import build_index, read_sidecar, write_sidecar
+from vodftools.io.stacking import stack_event_files
+from vodftools.io.zonemap import (
+    ZoneMap,
+    ZoneMapBuilder,
+    build_zone_map,
+    col,
+    iter_select,
+    select,
+)
+
+
+def test_zone_map_builder():
+    rows = np.zeros(10, dtype=[("TIME", ">f8"), ("ENERGY", ">f4")])
+    rows["TIME"] = np.arange(10)
+    rows["ENERGY"] = [5, 1, np.nan, np.nan, 2, 3, 4, 9, 0, 7]
+
+    builder = ZoneMapBuilder(["TIME", "ENERGY"], chunk_rows=4)
+    # blocks not aligned with the zones
+    for start, stop in [(0, 3), (3, 9), (9, 10)]:
+        builder.update(rows[start:stop])
+    zone_map = builder.finish()
+
+    assert zone_map.num_chunks == 3
+    assert zone_map.mins["TIME"].tolist() == [0, 4, 8]
+    assert zone_map.maxs["TIME"].tolist() == [3, 7, 9]
+    assert zone_map.mins["ENERGY"].tolist() == [1, 2, 0]
+    assert zone_map.maxs["ENERGY"].tolist() == [5, 9, 7]
+    restored = ZoneMap.from_dict(zone_map.to_dict())
+    np.testing.assert_array_equal(restored.maxs["ENERGY"], zone_map.maxs["ENERGY"])
+
+
+def test_predicates():
+    mins, maxs = np.array([0.0, 10.0, np.nan]), np.array([5.0, 20.0, np.nan])
+    assert (col("E") > 5).may_match(mins, maxs).tolist() == [False, True, True]
+    assert (col("E") >= 5).may_match(mins, maxs).tolist() == [True, True, True]
+    assert (col("E") < 10).may_match(mins, maxs).tolist() == [True, False, True]
+    assert (col("E") == 7).may_match(mins, maxs).tolist() == [False, False, True]
+    between = col("E").between(5.5, 10)
+    assert between.may_match(mins, maxs).tolist() == [False, False, True]
+    assert between.evaluate(np.array([5.5, 7, 10])).tolist() == [True, True, False]
+
+
+def test_select_skips_chunks(make_event_file, monkeypatch):
+    path = make_event_file(n_events=100_000)
+    index = build_index(
+        path, zone_columns={"EVENTS": ["TIME", "ENERGY"]}, zone_rows=1000
+    )
+    write_sidecar(index)
+    assert read_sidecar(path).zones["EVENTS"].num_chunks == 100
+
+    with fits.open(path) as hdul:
+        events = hdul["EVENTS"].data
+        mask = (events["TIME"] >= 1500) & (events["TIME"] < 1560)
+        mask &= events["ENERGY"] > 2
+        expected = events[mask]
+
+    # count the rows actually read
+    read = []
+    original = zonemap.iter_chunks
+
+    def counting(*args, **kwargs):
+        for chunk in original(*args, **kwargs):
+            read.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(zonemap, "iter_chunks", counting)
+    selected = select(path, col("TIME").between(1500, 1560), col("ENERGY") > 2)
+
+    assert len(selected) == len(expected) > 0
+    np.testing.assert_array_equal(selected["EVENT_ID"], expected["EVENT_ID"])
+    assert sum(read) <= 5000
+
+    empty = select(path, col("ENERGY") > 1e6, columns=["TIME"])
+    assert len(empty) == 0
+    assert empty.dtype.names == ("TIME",)
+
+
+def test_iter_select_without_zone_map(event_file_path):
+    with open(event_file_path, "rb") as infile:
+        hdu = find_hdu(infile, "EVENTS")
+        chunks = list(iter_select(infile, hdu, [col("ENERGY") < 1], chunk_rows=100))
+        zone_map = build_zone_map(infile, hdu, ["ENERGY"], chunk_rows=100)
+    assert all((chunk["ENERGY"] < 1).all() for chunk in chunks)
+    assert zone_map.num_rows == 1000
+
+    with pytest.raises(ValueError, match="scalar"):
+        ZoneMapBuilder(["X"]).update(np.zeros(2, dtype=[("X", "f4", (3,))]))
+
+
+def test_zone_maps_written_while_stacking(make_event_file, tmp_path):
+    paths = [
+        make_event_file(f"run_{ii}.fits", obs_id=ii, tstart=1000.0 + 2000 * ii)
+        for ii in range(3)
+    ]
+    output = stack_event_files(
+        paths, tmp_path / "stacked.fits", chunk_rows=300, zone_columns=["TIME"]
+    )
+    zone_map = read_sidecar(output).zones["EVENTS"]
+    assert zone_map.num_rows == 3000
+    rebuilt = build_index(output, {"EVENTS": ["TIME"]}).zones["EVENTS"]
+    np.testing.assert_array_equal(zone_map.mins["TIME"], rebuilt.mins["TIME"])
+    np.testing.assert_array_equal(zone_map.maxs["TIME"], rebuilt.maxs["TIME"])
+
+    dataset = EventDataset.from_paths([output]).select(time=(3000.0, 3100.0))
+    assert dataset.files[0].zone_map is not None
+    times = dataset.read(columns=["TIME"])["TIME"]
+    assert len(times) > 0
+    assert times.min() >= 3000
+    assert times.max() < 3100
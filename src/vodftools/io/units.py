@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""
+Conversion of column data to the units defined in the schema.
+
+A file may store a column in any unit that is convertible to the one in the
+schema (e.g. GeV instead of TeV). The conversion factors are resolved once per
+pair of units and cached, checked for all columns before any data is read, and
+then applied to each chunk in place, without creating `~astropy.units.Quantity`
+objects or temporary copies.
+"""
+
+from collections.abc import Iterator, Mapping
+from functools import lru_cache
+from typing import BinaryIO
+
+import numpy as np
+from astropy import units as u
+
+from ..schema import TableExtension, iter_columns
+from .bintable import HDUInfo, iter_chunks, table_dtype
+from .encoding import _unsigned, decode_chunk, encoding_plan
+
+__all__ = [
+    "conversion_factor",
+    "conversion_plan",
+    "convert_chunk",
+    "iter_converted_chunks",
+]
+
+
+@lru_cache(maxsize=1024)
+def conversion_factor(from_unit: str, to_unit: str) -> float:
+    """Return the factor to convert values from from_unit to to_unit.
+
+    Raises
+    ------
+    astropy.units.UnitConversionError:
+        if the units do not have the same physical type
+    """
+    source = u.Unit(from_unit, format="fits", parse_strict="raise")
+    target = u.Unit(to_unit)
+    try:
+        return source.to(target)
+    except u.UnitConversionError as err:
+        raise u.UnitConversionError(
+            f"'{from_unit}' ({source.physical_type}) is not convertible to "
+            f"'{to_unit}' ({target.physical_type})"
+        ) from err
+
+
+def conversion_plan(header: Mapping, extension: TableExtension) -> dict[str, float]:
+    """Return the conversion factors needed to read a table in schema units.
+
+    Only columns whose factor is not 1 are included. Columns without a TUNIT
+    are assumed to be in the schema unit. Factors are applied in place, so
+    columns that need one must hold floats once read, i.e. be stored as
+    floats or as scaled integers (see `vodftools.io.encoding`).
+
+    Raises
+    ------
+    astropy.units.UnitConversionError:
+        if any column has a unit that is not convertible to the schema unit,
+        or needs a non-trivial conversion but has an integer type in the
+        schema or in the file
+    """
+    tunits = {
+        str(header[f"TTYPE{index}"]).strip(): header.get(f"TUNIT{index}")
+        for index in range(1, header.get("TFIELDS", 0) + 1)
+    }
+    dtype = table_dtype(header)
+    encoding = encoding_plan(header)
+
+    plan, errors = {}, []
+    for column in iter_columns(extension):
+        tunit = tunits.get(column.name)
+        if not column.unit or not tunit:
+            continue
+        try:
+            factor = conversion_factor(tunit, column.unit)
+        except (u.UnitConversionError, ValueError) as err:
+            errors.append(f"{column.name}: {err}")
+            continue
+        if factor == 1.0:
+            continue
+        if not column.dtype.name.startswith("float"):
+            errors.append(f"{column.name}: cannot scale integer column in place")
+            continue
+        stored = dtype[column.name].base
+        decoded_float = column.name in encoding and not _unsigned(
+            stored, *encoding[column.name]
+        )
+        if stored.kind != "f" and not decoded_float:
+            errors.append(
+                f"{column.name}: cannot scale column stored as {stored.name} in place"
+            )
+            continue
+        plan[column.name] = factor
+
+    if errors:
+        raise u.UnitConversionError("; ".join(errors))
+    return plan
+
+
+def convert_chunk(chunk: np.ndarray, plan: Mapping[str, float]) -> np.ndarray:
+    """Apply a conversion plan to a chunk of rows, in place."""
+    for name, factor in plan.items():
+        if name not in chunk.dtype.names:
+            continue
+        values = chunk[name]
+        np.multiply(values, factor, out=values, casting="same_kind")
+    return chunk
+
+
+def iter_converted_chunks(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    extension: TableExtension,
+    **kwargs,
+) -> Iterator[np.ndarray]:
+    """Like `iter_chunks`, but with values converted to the schema units.
+
+    Scaled-integer columns are decoded first (see `vodftools.io.encoding`).
+
+    Raises
+    ------
+    astropy.units.UnitConversionError:
+        before reading any data, if a unit is not convertible
+    """
+    plan = conversion_plan(hdu.header, extension)
+    encoding = encoding_plan(hdu.header)
+    for chunk in iter_chunks(fileobj, hdu, **kwargs):
+        yield convert_chunk(decode_chunk(chunk, encoding), plan)
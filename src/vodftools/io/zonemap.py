@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+"""
+Per-chunk statistics of table columns, and selections that use them.
+
+A `ZoneMap` stores the minimum and maximum of some columns (e.g. TIME and
+ENERGY) for every chunk of `ZoneMap.chunk_rows` consecutive rows of a table.
+`iter_select` and `select` first compare the predicates of a selection with
+these statistics, and only read the chunks that may contain matching rows;
+the predicates are then evaluated on the rows read, with numpy.
+
+Zone maps are computed while writing a table (see the ``zone_columns``
+argument of `~vodftools.io.bintable.BinTableWriter`) or afterwards with
+`build_zone_map`, and are stored in the index sidecar of the file (see
+`vodftools.io.index`), where `select` finds them.
+
+.. code-block:: python
+
+    from vodftools.io.zonemap import col, select
+
+    events = select(
+        "events.fits",
+        col("TIME").between(1000.0, 1100.0),
+        col("ENERGY") > 1.0,
+    )
+"""
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from .bintable import HDUInfo, find_hdu, iter_chunks, table_dtype
+from .encoding import decode_chunk, encoding_plan
+
+__all__ = [
+    "DEFAULT_ZONE_ROWS",
+    "ZoneMap",
+    "ZoneMapBuilder",
+    "Predicate",
+    "col",
+    "build_zone_map",
+    "iter_select",
+    "select",
+]
+
+#: default number of rows summarized by each entry of a zone map
+DEFAULT_ZONE_ROWS = 16384
+
+
+@dataclass
+class ZoneMap:
+    """Minimum and maximum of some columns for each chunk of rows of a table.
+
+    Chunks without any valid (non-NaN) value have NaN statistics, and are
+    never skipped.
+    """
+
+    chunk_rows: int
+    num_rows: int
+    mins: dict[str, np.ndarray] = field(default_factory=dict)
+    maxs: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def num_chunks(self) -> int:
+        """Number of chunks."""
+        return -(-self.num_rows // self.chunk_rows)
+
+    def to_dict(self) -> dict:
+        """Return the zone map as a JSON-serializable dict."""
+        return dict(
+            chunk_rows=self.chunk_rows,
+            num_rows=self.num_rows,
+            columns={
+                name: [self.mins[name].tolist(), self.maxs[name].tolist()]
+                for name in self.mins
+            },
+        )
+
+    @classmethod
+    def from_dict(cls, document: dict) -> "ZoneMap":
+        """Create a zone map from the output of `to_dict`."""
+        zone_map = cls(chunk_rows=document["chunk_rows"], num_rows=document["num_rows"])
+        for name, (mins, maxs) in document["columns"].items():
+            zone_map.mins[name] = np.array(mins, dtype=np.float64)
+            zone_map.maxs[name] = np.array(maxs, dtype=np.float64)
+        return zone_map
+
+
+def _chunk_stats(values: np.ndarray) -> tuple[float, float]:
+    values = values.astype(np.float64, copy=False)
+    valid = values[~np.isnan(values)]
+    if len(valid) == 0:
+        return np.nan, np.nan
+    return float(valid.min()), float(valid.max())
+
+
+class ZoneMapBuilder:
+    """Compute a zone map from rows given in blocks of any size.
+
+    Parameters
+    ----------
+    columns: Iterable[str]
+        scalar numeric columns to summarize
+    chunk_rows: int
+        number of rows per zone
+    """
+
+    def __init__(self, columns: Iterable[str], chunk_rows: int = DEFAULT_ZONE_ROWS):
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.num_rows = 0
+        self._mins = {name: [] for name in self.columns}
+        self._maxs = {name: [] for name in self.columns}
+
+    def update(self, rows: np.ndarray):
+        """Add the statistics of rows, which follow the rows added before."""
+        start = 0
+        while start < len(rows):
+            # rows completing the current chunk
+            used = self.num_rows % self.chunk_rows
+            stop = start + min(self.chunk_rows - used, len(rows) - start)
+            for name in self.columns:
+                if rows.dtype[name].shape:
+                    raise ValueError(f"zone maps need scalar columns, not {name}")
+                low, high = _chunk_stats(rows[name][start:stop])
+                if used:
+                    # merge with the part of the chunk seen before
+                    low = np.fmin(low, self._mins[name][-1])
+                    high = np.fmax(high, self._maxs[name][-1])
+                    self._mins[name][-1], self._maxs[name][-1] = low, high
+                else:
+                    self._mins[name].append(low)
+                    self._maxs[name].append(high)
+            self.num_rows += stop - start
+            start = stop
+
+    def finish(self) -> ZoneMap:
+        """Return the zone map of all rows added."""
+        return ZoneMap(
+            chunk_rows=self.chunk_rows,
+            num_rows=self.num_rows,
+            mins={name: np.array(self._mins[name]) for name in self.columns},
+            maxs={name: np.array(self._maxs[name]) for name in self.columns},
+        )
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """A comparison of a column with a value, e.g. ``col("ENERGY") > 1``.
+
+    For "between", value is a (low, high) tuple, and rows with
+    low <= x < high match.
+    """
+
+    column: str
+    op: str  #: one of "<", "<=", ">", ">=", "==", "between"
+    value: float | tuple[float, float]
+
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        """Return the mask of the values matching the predicate."""
+        if self.op == "between":
+            low, high = self.value
+            return (values >= low) & (values < high)
+        return {
+            "<": np.less,
+            "<=": np.less_equal,
+            ">": np.greater,
+            ">=": np.greater_equal,
+            "==": np.equal,
+        }[self.op](values, self.value)
+
+    def may_match(self, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+        """Return the mask of the chunks that may contain matching rows."""
+        if self.op == "between":
+            low, high = self.value
+            possible = (maxs >= low) & (mins < high)
+        elif self.op in ("<", "<="):
+            possible = self.evaluate(mins)
+        elif self.op in (">", ">="):
+            possible = self.evaluate(maxs)
+        else:
+            possible = (mins <= self.value) & (maxs >= self.value)
+        return possible | np.isnan(mins)
+
+
+class _ColumnRef:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __lt__(self, value):
+        return Predicate(self.name, "<", value)
+
+    def __le__(self, value):
+        return Predicate(self.name, "<=", value)
+
+    def __gt__(self, value):
+        return Predicate(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Predicate(self.name, ">=", value)
+
+    def __eq__(self, value):
+        return Predicate(self.name, "==", value)
+
+    def between(self, low: float, high: float) -> Predicate:
+        """Match values in [low, high)."""
+        return Predicate(self.name, "between", (low, high))
+
+
+def col(name: str) -> _ColumnRef:
+    """Refer to a column, to build a `Predicate` with comparison operators."""
+    return _ColumnRef(name)
+
+
+def build_zone_map(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    columns: Iterable[str],
+    chunk_rows: int = DEFAULT_ZONE_ROWS,
+) -> ZoneMap:
+    """Read some columns of a table and compute their zone map.
+
+    Scaled-integer columns are summarized by their decoded values.
+    """
+    columns = list(columns)
+    plan = encoding_plan(hdu.header)
+    builder = ZoneMapBuilder(columns, chunk_rows)
+    read_rows = max(chunk_rows, chunk_rows * (1_000_000 // chunk_rows))
+    for chunk in iter_chunks(fileobj, hdu, columns=columns, chunk_rows=read_rows):
+        builder.update(decode_chunk(chunk, plan))
+    return builder.finish()
+
+
+def _row_ranges(keep: np.ndarray, chunk_rows: int, num_rows: int):
+    """Return the [start, stop) row ranges of consecutive kept chunks."""
+    edges = np.diff(np.concatenate([[False], keep, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1) * chunk_rows
+    stops = np.minimum(np.flatnonzero(edges == -1) * chunk_rows, num_rows)
+    return zip(starts.tolist(), stops.tolist())
+
+
+def iter_select(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    predicates: Iterable[Predicate],
+    zone_map: ZoneMap | None = None,
+    columns: list[str] | None = None,
+    chunk_rows: int | None = None,
+) -> Iterator[np.ndarray]:
+    """Yield the rows of a table matching all predicates, chunk by chunk.
+
+    Scaled-integer columns (see `vodftools.io.encoding`) are decoded, so
+    predicates compare decoded values.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        file containing the table
+    hdu: HDUInfo
+        location of the table
+    predicates: Iterable[Predicate]
+        conditions that the returned rows all fulfill
+    zone_map: ZoneMap | None
+        statistics of the table; chunks that cannot match are not read. If
+        None, or if it does not cover the table, all rows are read.
+    columns: list[str] | None
+        only return these columns
+    chunk_rows: int | None
+        maximum number of rows read at once
+    """
+    predicates = list(predicates)
+    plan = encoding_plan(hdu.header)
+    ranges = [(0, hdu.num_rows)]
+    if zone_map is not None and zone_map.num_rows == hdu.num_rows:
+        keep = np.ones(zone_map.num_chunks, dtype=bool)
+        for predicate in predicates:
+            if predicate.column in zone_map.mins:
+                keep &= predicate.may_match(
+                    zone_map.mins[predicate.column], zone_map.maxs[predicate.column]
+                )
+        ranges = _row_ranges(keep, zone_map.chunk_rows, zone_map.num_rows)
+
+    for start, stop in ranges:
+        for chunk in iter_chunks(
+            fileobj, hdu, chunk_rows=chunk_rows, start=start, stop=stop
+        ):
+            chunk = decode_chunk(chunk, plan)
+            if predicates:
+                mask = np.ones(len(chunk), dtype=bool)
+                for predicate in predicates:
+                    mask &= predicate.evaluate(chunk[predicate.column])
+                if not mask.any():
+                    continue
+                if not mask.all():
+                    chunk = chunk[mask]
+            yield chunk[columns] if columns else chunk
+
+
+def select(
+    path: str | Path,
+    *predicates: Predicate,
+    hdu: str = "EVENTS",
+    columns: list[str] | None = None,
+) -> np.ndarray:
+    """Read the rows of a table of a file matching all predicates.
+
+    The HDU and its zone map are taken from the index sidecar of the file if
+    there is a current one (see `vodftools.io.index`).
+    """
+    from .index import read_sidecar
+
+    index = read_sidecar(path)
+    zone_map = index.zones.get(hdu) if index is not None else None
+    with open(path, "rb") as infile:
+        info = find_hdu(infile, hdu, index=index)
+        chunks = list(iter_select(infile, info, predicates, zone_map, columns))
+    if chunks:
+        return np.concatenate(chunks)
+    empty = decode_chunk(
+        np.empty(0, dtype=table_dtype(info.header)), encoding_plan(info.header)
+    )
+    return empty[columns] if columns else empty
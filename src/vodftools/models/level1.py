@@ -16,9 +16,9 @@
 # Note: GADF Extension info:
 #   https://gamma-astro-data-formats.readthedocs.io/en/v0.3/general/hduclass.html
 
-
 from ..schema import (
     Column,
+    ColumnEncoding,
     ColumnGroup,
     DataType,
     FITSFile,
@@ -33,7 +33,7 @@ from .metadata import (
     time_headers,
 )
 
-__all__ = ["event_file", "irf_file"]
+__all__ = ["event_file", "irf_file", "monitoring_file"]
 
 event_list_hdu = TableExtension(
     name="EVENTS",
@@ -47,7 +47,27 @@ event_list_hdu = TableExtension(
         observation_headers,
         earth_location_headers,
     ],
-    columns=[],
+    columns=[
+        Column(
+            name="TIME",
+            description="time of the event, in seconds since the reference time",
+            dtype=DataType.float64,
+            unit="s",
+            ucd="time",
+            # integer nanoseconds since MJDREF: the resolution of a float64 at
+            # 20 years, in a column that any FITS reader can decode
+            encoding=ColumnEncoding(storage=DataType.int64, scale=1e-9),
+        ),
+        Column(
+            name="ENERGY",
+            description="reconstructed energy of the event",
+            dtype=DataType.float32,
+            unit="TeV",
+            ucd="phys.energy",
+            # 1 eV resolution, up to 2 PeV
+            encoding=ColumnEncoding(storage=DataType.int32, scale=1e-6),
+        ),
+    ],
 )
 
 
@@ -147,3 +167,88 @@ irf_file = FITSFile(
     description="VODF Level-1 Instrumental Response Functions",
     extensions=[eff_area_2d_hdu],
 )
+
+
+monitoring_time_column = Column(
+    name="TIME",
+    description="time of the sample, in seconds since the reference time",
+    dtype=DataType.float64,
+    unit="s",
+    ucd="time",
+)
+
+
+pointing_hdu = TableExtension(
+    description="Pointing direction of the array as a function of time",
+    name="POINTING",
+    class_hierarchy=["VODF", "MONITORING", "POINTING"],
+    headers=[
+        creator_headers,
+        time_headers,
+        bibliographic_headers,
+        earth_location_headers,
+    ],
+    columns=[
+        monitoring_time_column,
+        Column(
+            name="RA_PNT",
+            description="right ascension of the pointing direction",
+            dtype=DataType.float64,
+            unit="deg",
+            ucd="pos.eq.ra",
+        ),
+        Column(
+            name="DEC_PNT",
+            description="declination of the pointing direction",
+            dtype=DataType.float64,
+            unit="deg",
+            ucd="pos.eq.dec",
+        ),
+        Column(
+            name="ALT_PNT",
+            description="altitude of the pointing direction",
+            dtype=DataType.float32,
+            unit="deg",
+            ucd="pos.az.alt",
+        ),
+        Column(
+            name="AZ_PNT",
+            description="azimuth of the pointing direction",
+            dtype=DataType.float32,
+            unit="deg",
+            ucd="pos.az.azi",
+        ),
+    ],
+)
+
+
+data_quality_hdu = TableExtension(
+    description="Data quality of the observation as a function of time",
+    name="DATA_QUALITY",
+    class_hierarchy=["VODF", "MONITORING", "DATA_QUALITY"],
+    headers=[creator_headers, time_headers, bibliographic_headers],
+    columns=[
+        monitoring_time_column,
+        Column(
+            name="QUALITY",
+            description="data quality flags, 0 if the data are good",
+            dtype=DataType.int32,
+            ucd="meta.code.qual",
+        ),
+        Column(
+            name="TRIGGER_RATE",
+            description="rate of array triggers",
+            dtype=DataType.float32,
+            unit="Hz",
+            ucd="arith.rate",
+            required=False,
+        ),
+    ],
+)
+
+
+monitoring_file = FITSFile(
+    name="monitoring_file",
+    description="VODF Level-1 Monitoring Time Series",
+    extensions=[pointing_hdu, data_quality_hdu],
+)
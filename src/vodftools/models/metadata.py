@@ -30,7 +30,6 @@ Useful links:
 
 """
 
-
 from vodftools.schema import DataType, Header, HeaderGroup, Reference
 
 #### Metadata for DL3 EventList:
@@ -53,7 +52,10 @@ creator_headers = HeaderGroup(
             reference=Reference.heasarc,
         ),
         Header(
-            name="creation_date", fits_key="DATE", description="Date file was created"
+            name="creation_date",
+            fits_key="DATE",
+            description="Date file was created",
+            ivoa_key="obs_creation_date",
         ),
         Header(
             name="data_product_id",
@@ -106,6 +108,7 @@ observation_headers = HeaderGroup(
             fits_key="PROP_ID",
             description="Proposal identifier",
             reference=Reference.vodf,
+            ivoa_key="proposal_id",
             required=False,
         ),
         Header(
@@ -165,7 +168,7 @@ time_headers = HeaderGroup(
             name="time_system",
             fits_key="TIMESYS",
             description="Time System",
-            dtype=DataType.int32,
+            dtype=DataType.char,
             reference=Reference.fits_timerep,
         ),
         Header(
@@ -275,6 +278,7 @@ bibliographic_headers = HeaderGroup(
             fits_key="REFERENC",
             description="DOI or bibliographic reference of this data product",
             reference=Reference.fits_v4,
+            ivoa_key="bib_reference",
             required=False,
         ),
     ],
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+"""
+Time-indexed access to MONITORING time series.
+
+The POINTING and DATA_QUALITY tables of a monitoring file (see
+`vodftools.models.level1.monitoring_file`) sample the state of the array at
+irregular times. Joining events with this state means looking up, for each of
+millions of event times, the sample in effect at that time.
+
+A `TimeSeries` reads the columns of such a table once, drops samples without a
+valid TIME, and sorts the samples by time. This sorted TIME column is the
+index: every query is one `numpy.searchsorted` over it, vectorized over all
+the query times, so a lookup costs O(log n) per event and no Python loop.
+
+- `TimeSeries.asof` gives the last sample at or before each time (the state
+  in effect), and `TimeSeries.nearest` the closest sample in time;
+- `TimeSeries.lookup` gives the column values of these samples;
+- `TimeSeries.time_range` and `TimeSeries.time_ranges` give the samples
+  within one or many time intervals, e.g. GTIs.
+
+The query times must be in the same time system and relative to the same
+reference time (MJDREF) as the TIME column of the table.
+
+.. code-block:: python
+
+    from vodftools.monitoring import TimeSeries
+
+    pointing = TimeSeries.read("monitoring.fits", "POINTING")
+    values = pointing.lookup(events["TIME"], ["RA_PNT", "DEC_PNT"], tolerance=60)
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from .io.bintable import find_hdu, table_dtype
+from .io.encoding import iter_decoded_chunks
+from .io.index import read_sidecar
+from .io.remote import open_file
+
+__all__ = ["TimeSeries"]
+
+
+def _native(values: np.ndarray) -> np.ndarray:
+    """Return values in native byte order, which searchsorted is fastest with."""
+    return np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("="))
+
+
+class TimeSeries:
+    """Samples of a time series, sorted by time.
+
+    Parameters
+    ----------
+    times: np.ndarray
+        time of each sample. Samples with a NaN or infinite time are dropped.
+    columns: dict[str, np.ndarray]
+        values of each sample, by column name
+    name: str
+        name of the series, e.g. the EXTNAME of its table
+    """
+
+    def __init__(
+        self, times: np.ndarray, columns: dict[str, np.ndarray], name: str = ""
+    ):
+        times = _native(np.asarray(times, dtype=np.float64))
+        keep = np.isfinite(times)
+        order = np.flatnonzero(keep)
+        if np.any(np.diff(times[keep]) < 0):
+            # stable, so samples with equal times keep their order
+            order = order[np.argsort(times[keep], kind="stable")]
+        self.name = name
+        self.times = times[order]
+        self.columns = {
+            column: _native(np.asarray(values))[order]
+            for column, values in columns.items()
+        }
+
+    @classmethod
+    def read(
+        cls,
+        path: str | Path,
+        hdu: str,
+        columns: list[str] | None = None,
+        version: int | None = None,
+    ) -> "TimeSeries":
+        """Read a time series from a table with a TIME column.
+
+        Parameters
+        ----------
+        path: str | Path
+            file, local, remote or compressed. Its index sidecar is used to
+            find the HDU if there is one (see `vodftools.io.index`).
+        hdu: str
+            EXTNAME of the table, e.g. POINTING or DATA_QUALITY
+        columns: list[str] | None
+            columns to read besides TIME, by default all of them
+        version: int | None
+            EXTVER of the table, by default the first one
+
+        Raises
+        ------
+        KeyError:
+            if the table has no TIME column
+        """
+        with open_file(path) as fileobj:
+            info = find_hdu(fileobj, hdu, version=version, index=read_sidecar(path))
+            names = table_dtype(info.header).names
+            if "TIME" not in names:
+                raise KeyError(f"no column TIME in HDU '{hdu}' of {path}")
+            if columns is None:
+                columns = [name for name in names if name != "TIME"]
+            chunks = list(
+                iter_decoded_chunks(fileobj, info, columns=["TIME", *columns])
+            )
+        if chunks:
+            table = np.concatenate(chunks)
+        else:
+            table = np.empty(0, dtype=table_dtype(info.header)[["TIME", *columns]])
+        return cls(
+            table["TIME"], {name: table[name] for name in columns}, name=info.name
+        )
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.times)
+
+    def __repr__(self):  # noqa: D105
+        return f"TimeSeries('{self.name}', {len(self)} samples)"
+
+    def asof(self, times: np.ndarray, tolerance: float | None = None) -> np.ndarray:
+        """Return the index of the last sample at or before each time.
+
+        The index is -1 for times before the first sample, NaN times, and, if
+        tolerance is given, times more than tolerance after the sample.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if len(self) == 0:
+            return np.full(times.shape, -1, dtype=np.intp)
+        index = np.searchsorted(self.times, times, side="right") - 1
+        invalid = ~np.isfinite(times)
+        if tolerance is not None:
+            invalid |= times - self.times[np.maximum(index, 0)] > tolerance
+        return np.where(invalid, -1, index)
+
+    def nearest(self, times: np.ndarray, tolerance: float | None = None) -> np.ndarray:
+        """Return the index of the closest sample in time to each time.
+
+        Of two samples at the same distance, the earlier one is chosen. The
+        index is -1 if there is no sample, for NaN times, and, if tolerance is
+        given, times more than tolerance from the closest sample.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if len(self) == 0:
+            return np.full(times.shape, -1, dtype=np.intp)
+        after = np.searchsorted(self.times, times, side="left")
+        before = np.maximum(after - 1, 0)
+        after = np.minimum(after, len(self) - 1)
+        later = np.abs(self.times[after] - times) < np.abs(times - self.times[before])
+        index = np.where(later, after, before)
+        invalid = ~np.isfinite(times)
+        if tolerance is not None:
+            invalid |= np.abs(times - self.times[index]) > tolerance
+        return np.where(invalid, -1, index)
+
+    def lookup(
+        self,
+        times: np.ndarray,
+        columns: list[str] | None = None,
+        method: str = "asof",
+        tolerance: float | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Return the values of columns at each time.
+
+        Parameters
+        ----------
+        times: np.ndarray
+            the query times, in any order
+        columns: list[str] | None
+            columns to look up, by default all of them
+        method: str
+            ``asof`` for the last sample at or before each time (see `asof`),
+            or ``nearest`` for the closest one (see `nearest`)
+        tolerance: float | None
+            maximum distance in time to the sample
+
+        Returns
+        -------
+        dict[str, np.ndarray]:
+            values by column, one per time. Times without a sample get NaN in
+            float columns, and zeros (or empty strings) in the others.
+        """
+        if method not in ("asof", "nearest"):
+            raise ValueError(f"method must be 'asof' or 'nearest', not '{method}'")
+        index = getattr(self, method)(times, tolerance)
+        missing = index < 0
+        values = {}
+        for name in self.columns if columns is None else columns:
+            column = self.columns[name]
+            if len(column) == 0:
+                column = np.zeros(1, dtype=column.dtype)
+            selected = column[np.maximum(index, 0)]
+            if np.any(missing):
+                if selected.dtype.kind == "f":
+                    selected[missing] = np.nan
+                else:
+                    selected[missing] = np.zeros((), dtype=column.dtype)
+            values[name] = selected
+        return values
+
+    def time_range(self, start: float, stop: float) -> slice:
+        """Return the slice of the samples with start <= time < stop."""
+        first, last = np.searchsorted(self.times, [start, stop], side="left")
+        return slice(int(first), int(max(first, last)))
+
+    def time_ranges(
+        self, starts: np.ndarray, stops: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the index range of the samples within each of many intervals.
+
+        Samples ``first[i]:last[i]`` have ``starts[i] <= time < stops[i]``.
+        """
+        first = np.searchsorted(self.times, starts, side="left")
+        last = np.searchsorted(self.times, stops, side="left")
+        return first, np.maximum(first, last)
+
+    def select(self, start: float, stop: float) -> "TimeSeries":
+        """Return the samples with start <= time < stop."""
+        selected = self.time_range(start, stop)
+        return TimeSeries(
+            self.times[selected],
+            {name: values[selected] for name, values in self.columns.items()},
+            name=self.name,
+        )
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+"""
+Export of IVOA ObsCore tables from the headers of many VODF files.
+
+Headers that define an `~vodftools.schema.Header.ivoa_key` are copied to the
+ObsCore column of that name. The mapping from FITS keywords to ObsCore columns
+is compiled once per schema (see `compile_mapping`), so harvesting a file
+only reads its headers (with `~vodftools.io.bintable.scan_hdus`, so remote and
+compressed files are supported) and looks keywords up in a flat table. Files
+are harvested in parallel threads, and the derived columns (time coverage,
+exposure, access) are computed for all files at once.
+
+The time coverage ``t_min`` and ``t_max`` is given in MJD, in the time scale
+of the file (TIMESYS).
+
+A file that cannot be read does not stop the export: it gets no row, and is
+listed with the reason in ``table.meta["skipped"]``. A header value that
+cannot be converted to the type of its column is masked, and listed in
+``table.meta["invalid"]`` by file.
+
+.. code-block:: python
+
+    from vodftools.obscore import write_obscore
+
+    write_obscore(sorted(Path("archive").glob("*.fits.gz")), "obscore.parquet")
+"""
+
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from astropy.table import MaskedColumn, Table
+
+from .io.bintable import scan_hdus
+from .io.compressed import is_compressed
+from .io.remote import is_remote, open_file
+from .schema import DataType, FITSFile, HeaderGroup, iter_headers
+from .times import reference_keywords
+
+__all__ = [
+    "KeyMapping",
+    "compile_mapping",
+    "harvest_headers",
+    "obscore_table",
+    "write_obscore",
+]
+
+#: keywords needed for the derived columns, read in addition to the mapped ones
+TIME_KEYS = ("TSTART", "TSTOP", "MJDREFI", "MJDREFF", "MJDREF", "TIMESYS")
+
+#: table writer format for each file suffix
+FORMATS = {
+    ".parquet": "parquet",
+    ".xml": "votable",
+    ".vot": "votable",
+    ".csv": "ascii.csv",
+    ".ecsv": "ascii.ecsv",
+}
+
+_NUMPY_TYPES = {
+    DataType.float64: np.float64,
+    DataType.float32: np.float32,
+    DataType.int64: np.int64,
+    DataType.int32: np.int32,
+    DataType.int16: np.int16,
+    DataType.uint32: np.uint32,
+}
+
+
+@dataclass(frozen=True)
+class KeyMapping:
+    """Copy of one FITS keyword to one ObsCore column."""
+
+    fits_key: str
+    ivoa_key: str
+    dtype: DataType | None = None
+    unit: str | None = None
+    description: str = ""
+
+
+# compiled mappings, by the ids of the schema elements, which are kept
+# alive with the entry so that their ids are not reused
+_MAPPINGS: dict[tuple[int, ...], tuple[tuple, tuple[KeyMapping, ...]]] = {}
+
+
+def _default_sources() -> tuple:
+    from .models.level1 import event_file
+    from .models.metadata import instrument_headers
+
+    return (event_file, instrument_headers)
+
+
+def compile_mapping(*sources: FITSFile | HeaderGroup) -> tuple[KeyMapping, ...]:
+    """Return the mapping of FITS keywords to ObsCore columns defined in sources.
+
+    Sources are schemas, extensions or header groups; by default the VODF
+    level-1 event file and the instrument headers. If several headers map to
+    the same ObsCore column, the first one is used. The result is cached.
+    """
+    sources = sources or _default_sources()
+    key = tuple(id(source) for source in sources)
+    if key not in _MAPPINGS:
+        mapping = {}
+        for source in sources:
+            elements = getattr(source, "extensions", [source])
+            for element in elements:
+                for header in iter_headers(element):
+                    if header.ivoa_key and header.ivoa_key not in mapping:
+                        mapping[header.ivoa_key] = KeyMapping(
+                            fits_key=header.fits_key.upper(),
+                            ivoa_key=header.ivoa_key,
+                            dtype=header.dtype,
+                            unit=header.unit,
+                            description=header.description,
+                        )
+        _MAPPINGS[key] = (sources, tuple(mapping.values()))
+    return _MAPPINGS[key][1]
+
+
+def harvest_headers(path: str | Path, keys: Iterable[str]) -> dict:
+    """Return the first value of each of keys found in the headers of a file.
+
+    The primary header is included. Only the header blocks are read, and
+    for compressed files, reading stops as soon as all keys were found.
+    """
+    missing = set(keys)
+    values = {}
+    with open_file(path) as fileobj:
+        for hdu in scan_hdus(fileobj):
+            for key in list(missing):
+                if key in hdu.header:
+                    values[key] = hdu.header[key]
+                    missing.discard(key)
+            if not missing and is_compressed(fileobj):
+                break
+    return values
+
+
+def _file_size(path: str | Path) -> int | None:
+    if is_remote(path):
+        return None
+    return os.stat(path).st_size
+
+
+def _harvest(path, keys):
+    try:
+        return harvest_headers(path, keys), _file_size(path)
+    except (OSError, ValueError) as error:
+        return error, None
+
+
+def _column(name, values, dtype=None, unit=None, description=None):
+    """Return a masked column, and the indices of values of the wrong type."""
+    mask = np.array([value is None for value in values], dtype=bool)
+    invalid = []
+    if dtype is None:
+        filled = [str(value) if value is not None else "" for value in values]
+        data = np.array(filled, dtype=str)
+    else:
+        data = np.zeros(len(values), dtype)
+        for ii, value in enumerate(values):
+            if value is None:
+                continue
+            try:
+                data[ii] = value
+            except (TypeError, ValueError, OverflowError):
+                mask[ii] = True
+                invalid.append(ii)
+    column = MaskedColumn(
+        data, name=name, mask=mask, unit=unit, description=description
+    )
+    return column, invalid
+
+
+def _time_columns(rows: list[dict]) -> tuple[dict[str, np.ndarray], list[int]]:
+    num = len(rows)
+    t_min, t_max = np.full(num, np.nan), np.full(num, np.nan)
+    invalid = []
+    for ii, row in enumerate(rows):
+        if "TSTART" in row and "TSTOP" in row:
+            try:
+                mjd, fraction, _ = reference_keywords(row)
+                start, stop = float(row["TSTART"]), float(row["TSTOP"])
+            except (TypeError, ValueError):
+                invalid.append(ii)
+                continue
+            # integer and fractional MJD are added last, to keep their precision
+            t_min[ii] = start / 86400 + fraction + mjd
+            t_max[ii] = stop / 86400 + fraction + mjd
+    times = dict(t_min=t_min, t_max=t_max, t_exptime=(t_max - t_min) * 86400)
+    return times, invalid
+
+
+def obscore_table(
+    paths: Iterable[str | Path],
+    sources: tuple | None = None,
+    workers: int | None = None,
+    collection: str | None = None,
+    calib_level: int = 2,
+) -> Table:
+    """Return an ObsCore table with one row per file.
+
+    Parameters
+    ----------
+    paths: Iterable[str | Path]
+        files or URLs to harvest
+    sources: tuple | None
+        schemas or header groups passed to `compile_mapping`
+    workers: int | None
+        number of threads reading headers
+    collection: str | None
+        value of obs_collection, if given
+    calib_level: int
+        ObsCore calibration level of the files (2 for event lists)
+
+    Returns
+    -------
+    Table:
+        the ObsCore table. Files that cannot be read are left out and listed
+        in ``meta["skipped"]``, and values of the wrong type are masked and
+        listed in ``meta["invalid"]``, both by path.
+    """
+    paths = [str(path) for path in paths]
+    mapping = compile_mapping(*(sources or ()))
+    keys = {item.fits_key for item in mapping} | set(TIME_KEYS)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        harvested = list(pool.map(_harvest, paths, [keys] * len(paths)))
+    skipped = {
+        path: str(row)
+        for path, (row, _) in zip(paths, harvested)
+        if isinstance(row, Exception)
+    }
+    harvested = [
+        (path, row, size)
+        for path, (row, size) in zip(paths, harvested)
+        if path not in skipped
+    ]
+    paths = [path for path, _, _ in harvested]
+    rows = [row for _, row, _ in harvested]
+    invalid: dict[str, list[str]] = {}
+
+    table = Table()
+    table.meta["skipped"] = skipped
+    table.meta["invalid"] = invalid
+    table["dataproduct_type"] = np.full(len(paths), "event")
+    table["calib_level"] = np.full(len(paths), calib_level, dtype=np.int16)
+    if collection is not None:
+        table["obs_collection"] = np.full(len(paths), collection)
+    for item in mapping:
+        table[item.ivoa_key], bad = _column(
+            item.ivoa_key,
+            [row.get(item.fits_key) for row in rows],
+            dtype=_NUMPY_TYPES.get(item.dtype),
+            unit=item.unit,
+            description=item.description,
+        )
+        for ii in bad:
+            invalid.setdefault(paths[ii], []).append(
+                f"{item.fits_key} = {rows[ii][item.fits_key]!r} is not "
+                f"{item.dtype.name} ({item.ivoa_key})"
+            )
+
+    times, bad = _time_columns(rows)
+    for ii in bad:
+        invalid.setdefault(paths[ii], []).append(
+            "invalid TSTART, TSTOP or reference time"
+        )
+    for name, values in times.items():
+        unit = "s" if name == "t_exptime" else "d"
+        table[name] = MaskedColumn(values, mask=np.isnan(values), unit=unit)
+
+    table["access_url"] = paths
+    table["access_format"] = np.full(len(paths), "application/fits")
+    table["access_estsize"], _ = _column(
+        "access_estsize",
+        [None if size is None else -(-size // 1024) for _, _, size in harvested],
+        dtype=np.int64,
+        unit="kbyte",
+    )
+    return table
+
+
+def write_obscore(
+    paths: Iterable[str | Path],
+    output: str | Path,
+    format: str | None = None,
+    overwrite: bool = False,
+    **kwargs,
+) -> Table:
+    """Write the `obscore_table` of files, and return it.
+
+    The format is guessed from the suffix of output (see `FORMATS`) if not
+    given. Writing Parquet requires pyarrow. kwargs are passed to
+    `obscore_table`.
+    """
+    format = format or FORMATS.get(Path(output).suffix.lower())
+    if format is None:
+        raise ValueError(f"cannot guess the table format of {output}")
+    table = obscore_table(paths, **kwargs)
+    table.write(output, format=format, overwrite=overwrite)
+    return table
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
-"""Conversion of model schemas to PlantUML diagrams."""
+"""Conversion of model schemas to PlantUML diagrams.
+
+HeaderGroups shared by several extensions are declared once in the diagram,
+and each extension is linked to the shared class.
+"""
 
 from collections.abc import Generator
 from dataclasses import dataclass
@@ -8,10 +12,12 @@ from dataclasses import dataclass
 from .schema import (
     Column,
     Extension,
+    FITSFile,
     Header,
     HeaderGroup,
     SchemaElement,
     TableExtension,
+    fingerprint,
 )
 from .visitor import Visitor
 
@@ -26,15 +32,27 @@ def plantuml(schema: SchemaElement, **kwargs) -> Generator:
     yield "skinparam  wrapWidth 200"
     yield "skinparam defaultFontName Helvetica"
 
-    for cls in plantuml_class(schema, opts=kwargs):
-        yield str(cls)
-
-    for rel in plantuml_relationship(schema, opts=kwargs):
-        yield str(rel)
+    yield from _unique_blocks(plantuml_class(schema, opts=kwargs))
+    yield from dict.fromkeys(map(str, plantuml_relationship(schema, opts=kwargs)))
 
     yield "@enduml"
 
 
+def _unique_blocks(lines) -> Generator:
+    """Yield each class declaration, with its body, only once."""
+    seen = set()
+    block = []
+    for line in map(str, lines):
+        if line.startswith("class ") and block:
+            if (text := tuple(block)) not in seen:
+                seen.add(text)
+                yield from block
+            block = []
+        block.append(line)
+    if tuple(block) not in seen:
+        yield from block
+
+
 @dataclass
 class Relationship:
     from_class: str
@@ -84,7 +102,7 @@ def _(element, opts):
     yield f"class {element.name} <<{element.__class__.__name__}>>"
 
 
-@plantuml_class.generator(HeaderGroup)
+@plantuml_class.generator(HeaderGroup, key=fingerprint)
 def _(group, opts):
     for header in group.headers:
         yield from plantuml_class(header, opts)
@@ -114,7 +132,7 @@ def _(ext: TableExtension, opts):
         yield from plantuml_class(column, opts)
 
 
-@plantuml_class.generator(Column)
+@plantuml_class.generator(Column, key=fingerprint)
 def _(col: Column, opts):
     if opts.get("detail", False):
         yield "{"
@@ -129,7 +147,7 @@ def _(ext: TableExtension, opts):
         yield Relationship(from_class=ext.name, to_class=column.name, arrow="*-r-")
 
 
-@plantuml_class.generator(Header)
+@plantuml_class.generator(Header, key=fingerprint)
 def _(hdr: Header, opts):
     yield "{"
     if opts.get("detail", False):
@@ -140,8 +158,21 @@ def _(hdr: Header, opts):
     yield "}"
 
 
-@plantuml_relationship.generator(HeaderGroup)
+@plantuml_relationship.generator(HeaderGroup, key=fingerprint)
 def _(group, opts):
     for header in group.headers:
         yield Relationship(from_class=group.name, to_class=header.name)
         yield from plantuml_relationship(header, opts)
+
+
+@plantuml_class.generator(FITSFile)
+def _(ffile: FITSFile, opts):
+    for extension in ffile.extensions:
+        yield from plantuml_class(extension, opts)
+
+
+@plantuml_relationship.generator(FITSFile)
+def _(ffile: FITSFile, opts):
+    for extension in ffile.extensions:
+        yield Relationship(from_class=ffile.name, to_class=extension.name)
+        yield from plantuml_relationship(extension, opts)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+"""
+Audit of the numerical precision of the columns of a table.
+
+Narrow types halve the size of a column, but a float32 only has 24 bits of
+mantissa: a time column in seconds since MJDREF cannot resolve a microsecond
+once its values exceed a few seconds, and not even a second after about 2^24 s
+(194 days). The audit reads a table chunk by chunk and determines, for every
+numeric column, the narrowest type that can hold the values actually present at
+the required resolution, and whether the stored and declared types should be
+widened or could be narrowed.
+
+The required resolution is absolute for time columns (UCD ``time.*``, by
+default `DEFAULT_TIME_RESOLUTION`) and relative for other float columns (by
+default `DEFAULT_RELATIVE_PRECISION`). Integer columns only need to fit their
+range.
+
+Columns stored as scaled integers (TSCALn and TZEROn, see
+`vodftools.io.encoding`) are audited by the float values they represent, as
+if stored with their declared float type.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from typing import BinaryIO
+
+import numpy as np
+
+from .io.bintable import HDUInfo, iter_chunks
+from .io.encoding import _unsigned, decode_chunk, encoding_plan
+from .io.units import conversion_factor
+from .schema import Column, DataType, TableExtension, iter_columns
+from .validation import Finding, Severity, _column_cards
+
+__all__ = [
+    "DEFAULT_TIME_RESOLUTION",
+    "DEFAULT_RELATIVE_PRECISION",
+    "ColumnPrecision",
+    "audit_precision",
+    "precision_findings",
+]
+
+#: resolution needed for time columns, in seconds
+DEFAULT_TIME_RESOLUTION = 1e-6
+
+#: relative precision needed for other float columns
+DEFAULT_RELATIVE_PRECISION = 1e-6
+
+_TFORM_TO_TYPE = {
+    "E": DataType.float32,
+    "D": DataType.float64,
+    "I": DataType.int16,
+    "J": DataType.int32,
+    "K": DataType.int64,
+}
+
+#: numeric types from narrowest to widest, by kind
+_FLOATS = [DataType.float32, DataType.float64]
+_INTEGERS = [DataType.int16, DataType.int32, DataType.int64]
+
+
+@dataclass
+class ColumnPrecision:
+    """Result of the precision audit of one column."""
+
+    column: str
+    stored: DataType  #: type of the column in the file
+    declared: DataType | None  #: type of the column in the schema
+    minimum: float
+    maximum: float
+    #: absolute resolution needed, or None if relative (see `precision`)
+    resolution: float | None
+    precision: float | None  #: relative precision needed
+    #: worst rounding error of the values if stored as float32
+    float32_error: float | None
+    recommended: DataType  #: narrowest type that holds the values
+    #: TSCAL and TZERO of a column stored as scaled integers, whose decoded
+    #: values are audited; `stored` is then the float type they represent
+    encoding: tuple[float, float] | None = None
+
+    @property
+    def action(self) -> str:
+        """Whether the stored type should be widened, could be narrowed, or kept."""
+        return _compare(self.recommended, self.stored)
+
+
+def _compare(recommended: DataType, current: DataType) -> str:
+    for ladder in (_FLOATS, _INTEGERS):
+        if recommended in ladder and current in ladder:
+            diff = ladder.index(recommended) - ladder.index(current)
+            return "widen" if diff > 0 else "narrow" if diff < 0 else "keep"
+    return "keep"
+
+
+class _Accumulator:
+    """Running statistics of one column over all chunks."""
+
+    def __init__(self, stored: DataType):
+        self.stored = stored
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.max_abs = 0.0
+        self.abs_error = 0.0  # of float64 values rounded to float32
+        self.rel_error = 0.0
+
+    def add(self, values: np.ndarray):
+        values = values.reshape(-1)
+        if self.stored in _FLOATS:
+            values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.max_abs = max(self.max_abs, abs(self.minimum), abs(self.maximum))
+
+        if self.stored == DataType.float64:
+            values = values.astype(np.float64)
+            with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+                error = np.abs(values - values.astype(np.float32))
+                relative = error / np.abs(values)
+            self.abs_error = max(self.abs_error, float(error.max()))
+            relative = relative[values != 0]
+            if len(relative):
+                self.rel_error = max(self.rel_error, float(relative.max()))
+
+    def float32_errors(self) -> tuple[float, float]:
+        """Return the worst absolute and relative error of float32 storage."""
+        if self.stored == DataType.float64:
+            return self.abs_error, self.rel_error
+        # values already in float32 are exact, but only resolved to half the
+        # spacing of float32 numbers around them
+        half_spacing = float(np.spacing(np.float32(self.max_abs))) / 2
+        return half_spacing, float(np.finfo(np.float32).eps) / 2
+
+    def result(self, column: str, declared, resolution, precision):
+        minimum = self.minimum if np.isfinite(self.minimum) else 0.0
+        maximum = self.maximum if np.isfinite(self.maximum) else 0.0
+        if self.stored in _INTEGERS:
+            recommended = next(
+                dtype
+                for dtype in _INTEGERS
+                if np.iinfo(dtype.name).min <= minimum
+                and maximum <= np.iinfo(dtype.name).max
+            )
+            return ColumnPrecision(
+                column=column,
+                stored=self.stored,
+                declared=declared,
+                minimum=minimum,
+                maximum=maximum,
+                resolution=None,
+                precision=None,
+                float32_error=None,
+                recommended=recommended,
+            )
+
+        abs_error, rel_error = self.float32_errors()
+        if resolution is not None:
+            ok = abs_error <= resolution
+        else:
+            ok = rel_error <= precision
+        ok = ok and self.max_abs <= np.finfo(np.float32).max
+        return ColumnPrecision(
+            column=column,
+            stored=self.stored,
+            declared=declared,
+            minimum=minimum,
+            maximum=maximum,
+            resolution=resolution,
+            precision=None if resolution is not None else precision,
+            float32_error=abs_error,
+            recommended=DataType.float32 if ok else DataType.float64,
+        )
+
+
+def _resolution(
+    name: str, column: Column | None, unit, resolution: Mapping[str, float]
+):
+    """Return the absolute resolution needed for a column, in its own unit."""
+    if name in resolution:
+        return resolution[name]
+    if column is None or not (column.ucd or "").startswith("time"):
+        return None
+    factor = conversion_factor("s", unit) if unit else 1.0
+    return DEFAULT_TIME_RESOLUTION * factor
+
+
+def audit_precision(
+    fileobj: BinaryIO,
+    hdu: HDUInfo,
+    extension: TableExtension | None = None,
+    resolution: Mapping[str, float] | None = None,
+    precision: float = DEFAULT_RELATIVE_PRECISION,
+    chunk_rows: int | None = None,
+) -> dict[str, ColumnPrecision]:
+    """Determine the narrowest type each numeric column of a table could use.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        file containing the table
+    hdu: HDUInfo
+        location of the table, from `vodftools.io.bintable.scan_hdus`
+    extension: TableExtension | None
+        schema of the table, used for the declared types, and to recognize
+        time columns by their UCD
+    resolution: Mapping[str, float] | None
+        absolute resolution needed for some columns, in the unit of the
+        column in the file. Overrides the default for time columns.
+    precision: float
+        relative precision needed for float columns without a resolution,
+        including scaled-integer columns, which are decoded
+    chunk_rows: int | None
+        number of rows read at a time
+    """
+    resolution = resolution or {}
+    definitions = (
+        {col.name: col for col in iter_columns(extension)} if extension else {}
+    )
+    plan = encoding_plan(hdu.header)
+
+    accumulators, units, encodings = {}, {}, {}
+    for name, index in _column_cards(hdu.header).items():
+        tform = str(hdu.header[f"TFORM{index}"]).strip().lstrip("0123456789")
+        stored = _TFORM_TO_TYPE.get(tform[:1])
+        if stored is None:
+            continue
+        # unsigned integers are checked against the range of their storage
+        if name in plan and not _unsigned(np.dtype(stored.name), *plan[name]):
+            encodings[name] = plan[name]
+            stored = DataType.float64
+        accumulators[name] = _Accumulator(stored)
+        units[name] = hdu.header.get(f"TUNIT{index}")
+
+    if accumulators:
+        for chunk in iter_chunks(
+            fileobj, hdu, columns=list(accumulators), chunk_rows=chunk_rows
+        ):
+            chunk = decode_chunk(chunk, encodings)
+            for name, accumulator in accumulators.items():
+                accumulator.add(chunk[name])
+
+    audit = {}
+    for name, accumulator in accumulators.items():
+        column = definitions.get(name)
+        declared = column.dtype if column is not None else None
+        result = accumulator.result(
+            name,
+            declared=declared,
+            resolution=_resolution(name, column, units[name], resolution),
+            precision=precision,
+        )
+        if name in encodings:
+            stored = declared if declared in _FLOATS else DataType.float64
+            result = replace(result, stored=stored, encoding=encodings[name])
+        audit[name] = result
+    return audit
+
+
+def precision_findings(
+    audit: Mapping[str, ColumnPrecision], hdu_name: str
+) -> list[Finding]:
+    """Report the columns whose stored or declared type is too narrow.
+
+    Columns that could be narrowed are reported as warnings, so that the
+    savings are visible, but are not errors.
+    """
+    findings = []
+    for result in audit.values():
+        declared_too_narrow = (
+            result.declared is not None
+            and _compare(result.recommended, result.declared) == "widen"
+        )
+        if result.action == "widen":
+            if result.resolution is not None:
+                needed = f"a resolution of {result.resolution:g}"
+            else:
+                needed = f"a relative precision of {result.precision:g}"
+            findings.append(
+                Finding(
+                    hdu_name,
+                    result.column,
+                    f"values up to {result.maximum:g} are stored as "
+                    f"{result.stored.name} but need {result.recommended.name} "
+                    f"for {needed}",
+                )
+            )
+        elif declared_too_narrow:
+            findings.append(
+                Finding(
+                    hdu_name,
+                    result.column,
+                    f"declared as {result.declared.name}, which cannot hold the "
+                    f"values up to {result.maximum:g} in the file",
+                    Severity.warning,
+                )
+            )
+        elif result.action == "narrow":
+            findings.append(
+                Finding(
+                    hdu_name,
+                    result.column,
+                    f"could be stored as {result.recommended.name} instead of "
+                    f"{result.stored.name}",
+                    Severity.warning,
+                )
+            )
+    return findings
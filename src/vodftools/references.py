@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+"""
+Referential integrity between event files and IRF files.
+
+The IRF column of the SOI table of an event file names the IRF used for each
+stable observation interval. An IRF is stored in its own IRF file (see
+`vodftools.models.level1.irf_file`), and the name of an IRF is the name of
+its file without the ``.fits`` and compression suffixes, e.g. ``IRF_A`` for
+``irfs/IRF_A.fits.gz``.
+
+An `IRFCatalog` indexes the HDUs (EXTNAME, EXTVER and class hierarchy) of all
+IRF files of an archive, once per file, from their index sidecars, a shared
+`~vodftools.io.index.IndexDatabase`, or by scanning them. References are then
+resolved against the catalog only, and each distinct name only once, however
+many event files refer to it. A reference is:
+
+- dangling, if no IRF file has this name, or if the file lacks an HDU
+  required by the IRF schema,
+- ambiguous, if several IRF files have this name, or if the file has several
+  HDUs matching the same extension of the schema.
+
+.. code-block:: python
+
+    from vodftools.references import IRFCatalog, check_irf_references
+
+    catalog = IRFCatalog.build(Path("irfs").glob("*.fits*"), workers=16)
+    reports = check_irf_references(event_paths, catalog)
+    bad = [report for report in reports if not report.ok]
+"""
+
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from .io.bintable import find_hdu, iter_chunks
+from .io.index import FileIndex, HDUEntry, IndexDatabase, load_index, read_sidecar
+from .io.remote import open_file
+from .schema import Extension, FITSFile
+from .validation import Finding, Severity, ValidationReport, _extension_matches
+
+__all__ = [
+    "irf_name",
+    "IRFResolution",
+    "IRFCatalog",
+    "read_irf_references",
+    "check_irf_references",
+]
+
+_SUFFIXES = (".gz", ".bz2", ".fz", ".fits", ".fit")
+
+
+def irf_name(path: str | Path) -> str:
+    """Return the name of the IRF stored in a file, or referred to by a string."""
+    name = str(path).strip().rstrip("/").rsplit("/", 1)[-1]
+    for suffix in _SUFFIXES:
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+
+def _default_schema() -> FITSFile:
+    from .models.level1 import irf_file
+
+    return irf_file
+
+
+def _matches(entry: HDUEntry, extension: Extension) -> bool:
+    return _extension_matches(extension, entry.name, entry.version, entry.hduclass)
+
+
+@dataclass
+class IRFResolution:
+    """Result of resolving one IRF name."""
+
+    name: str
+    paths: list[str]  #: IRF files with this name
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """True if the name refers to exactly one complete IRF file."""
+        return not self.problems
+
+    @property
+    def path(self) -> str | None:
+        """The IRF file, if the reference is resolved."""
+        return self.paths[0] if self.ok else None
+
+
+class IRFCatalog:
+    """HDU indexes of all IRF files of an archive, by IRF name.
+
+    Parameters
+    ----------
+    indexes: Iterable[FileIndex]
+        indexes of the IRF files
+    schema: FITSFile | None
+        schema of IRF files, whose required extensions must be present, by
+        default `vodftools.models.level1.irf_file`
+    """
+
+    def __init__(self, indexes: Iterable[FileIndex], schema: FITSFile | None = None):
+        self.schema = schema or _default_schema()
+        self.files: dict[str, list[FileIndex]] = {}
+        for index in indexes:
+            self.files.setdefault(irf_name(index.path), []).append(index)
+        self._resolved: dict[str, IRFResolution] = {}
+
+    @classmethod
+    def build(
+        cls,
+        paths: Iterable[str | Path],
+        database: IndexDatabase | None = None,
+        workers: int | None = None,
+        schema: FITSFile | None = None,
+    ) -> "IRFCatalog":
+        """Index IRF files in parallel threads, and return their catalog.
+
+        Each file is scanned only if it has no current index in its sidecar or
+        in database (which is then updated, see `~vodftools.io.index.load_index`).
+        """
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            indexes = list(
+                pool.map(lambda path: load_index(path, database=database), paths)
+            )
+        return cls(indexes, schema)
+
+    @classmethod
+    def from_database(
+        cls, database: IndexDatabase, schema: FITSFile | None = None
+    ) -> "IRFCatalog":
+        """Return the catalog of the files of a database having an IRF HDU.
+
+        The files are not opened; the database is assumed to be current.
+        """
+        schema = schema or _default_schema()
+        indexes: dict[str, FileIndex] = {}
+        for extension in schema.extensions:
+            for path, entry in database.find(extension.name):
+                if path not in indexes:
+                    indexes[path] = FileIndex(path=path, size=-1, mtime_ns=-1)
+                if entry not in indexes[path].hdus:
+                    indexes[path].hdus.append(entry)
+        return cls(indexes.values(), schema)
+
+    def __len__(self) -> int:  # noqa: D105
+        return sum(len(indexes) for indexes in self.files.values())
+
+    def resolve(self, reference: str) -> IRFResolution:
+        """Resolve an IRF reference (the result is cached)."""
+        name = irf_name(reference)
+        if name in self._resolved:
+            return self._resolved[name]
+
+        indexes = self.files.get(name, [])
+        resolution = IRFResolution(name, [index.path for index in indexes])
+        if not indexes:
+            resolution.problems.append(f"dangling IRF reference '{name}': no such file")
+        elif len(indexes) > 1:
+            resolution.problems.append(
+                f"ambiguous IRF reference '{name}': {len(indexes)} files "
+                f"({', '.join(sorted(resolution.paths))})"
+            )
+        else:
+            for extension in self.schema.extensions:
+                count = sum(_matches(entry, extension) for entry in indexes[0].hdus)
+                if count == 0 and extension.required:
+                    resolution.problems.append(
+                        f"dangling IRF reference '{name}': no HDU {extension.name}"
+                        f" in {indexes[0].path}"
+                    )
+                elif count > 1:
+                    resolution.problems.append(
+                        f"ambiguous IRF reference '{name}': {count} HDUs"
+                        f" {extension.name} in {indexes[0].path}"
+                    )
+        self._resolved[name] = resolution
+        return resolution
+
+
+def read_irf_references(path: str | Path, hdu: str = "SOI") -> np.ndarray:
+    """Return the IRF column of the SOI table of an event file, as strings."""
+    with open_file(path) as fileobj:
+        info = find_hdu(fileobj, hdu, index=read_sidecar(path))
+        chunks = [chunk["IRF"] for chunk in iter_chunks(fileobj, info, ["IRF"])]
+    values = np.concatenate(chunks) if chunks else np.empty(0, dtype="S1")
+    return np.char.strip(np.char.decode(values, "ascii"))
+
+
+def _read_references(path: str, hdu: str) -> np.ndarray | Exception:
+    # a missing or broken file is reported in its own report, and does not
+    # stop the check of the other files
+    try:
+        return read_irf_references(path, hdu)
+    except (KeyError, OSError, ValueError) as error:
+        return error
+
+
+def check_irf_references(
+    event_paths: Iterable[str | Path],
+    catalog: IRFCatalog,
+    workers: int | None = None,
+    hdu: str = "SOI",
+) -> list[ValidationReport]:
+    """Check that the IRF references of event files resolve in a catalog.
+
+    Parameters
+    ----------
+    event_paths: Iterable[str | Path]
+        event files, local, remote or compressed
+    catalog: IRFCatalog
+        the available IRFs, see `IRFCatalog.build`
+    workers: int | None
+        number of threads reading the SOI tables
+    hdu: str
+        EXTNAME of the table with the IRF column
+
+    Returns
+    -------
+    list[ValidationReport]:
+        one report per event file, with one finding per problematic reference
+    """
+    paths = [str(path) for path in event_paths]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        tables = list(pool.map(lambda path: _read_references(path, hdu), paths))
+
+    reports = []
+    for path, references in zip(paths, tables):
+        report = ValidationReport(path=path, schema="irf_references")
+        reports.append(report)
+        if isinstance(references, KeyError):
+            report.findings.append(Finding(hdu, "IRF", str(references.args[0])))
+            continue
+        if isinstance(references, Exception):
+            message = f"cannot read the file: {references}"
+            report.findings.append(Finding(hdu, "IRF", message))
+            continue
+        names, rows = np.unique(references, return_index=True)
+        for name, row in zip(names.tolist(), rows.tolist()):
+            resolution = catalog.resolve(name)
+            for problem in resolution.problems:
+                message = f"{problem} (first in row {row})"
+                report.findings.append(Finding(hdu, "IRF", message, Severity.error))
+    return reports
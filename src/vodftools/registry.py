@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+"""
+Lookup of the schema of an HDU from its HDUCLASS/HDUCLASn keywords.
+
+Every `Extension` declares its place in a classification hierarchy (e.g.
+``["VODF", "EFF_AREA", "SPATIAL_NONE", "AEFF_2D"]``), which is written to the
+HDUCLASS, HDUCLAS1, HDUCLAS2, ... keywords. The `SchemaRegistry` indexes
+extensions in a prefix tree (trie) of these hierarchies, so that the most
+specific schema for an HDU is found by walking down the tree once, instead of
+trying to validate the HDU against every known schema.
+"""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from functools import cache
+
+from .schema import Extension, FITSFile
+
+__all__ = ["SchemaRegistry", "class_hierarchy", "default_registry"]
+
+
+def class_hierarchy(header: Mapping) -> list[str]:
+    """Return the classification hierarchy given by the HDUCLASn keywords."""
+    hierarchy = []
+    key = "HDUCLASS"
+    while (value := header.get(key)) is not None:
+        hierarchy.append(str(value).strip())
+        key = f"HDUCLAS{len(hierarchy)}"
+    return hierarchy
+
+
+@dataclass
+class _Node:
+    children: dict[str, "_Node"] = field(default_factory=dict)
+    extensions: list[Extension] = field(default_factory=list)
+
+
+class SchemaRegistry:
+    """Index of Extension schemas by class hierarchy.
+
+    Parameters
+    ----------
+    extensions: Iterable[Extension]
+        schemas to register
+    """
+
+    def __init__(self, extensions: Iterable[Extension] = ()):
+        self._root = _Node()
+        self._size = 0
+        for extension in extensions:
+            self.register(extension)
+
+    def __len__(self) -> int:
+        """Return the number of registered extensions."""
+        return self._size
+
+    def register(self, extension: Extension):
+        """Add an extension schema to the registry."""
+        node = self._root
+        for name in extension.class_hierarchy:
+            node = node.children.setdefault(name, _Node())
+        if not any(ext is extension for ext in node.extensions):
+            node.extensions.append(extension)
+            self._size += 1
+
+    def register_file(self, schema: FITSFile):
+        """Add all extensions of a file schema to the registry."""
+        for extension in schema.extensions:
+            self.register(extension)
+
+    def candidates(self, hierarchy: list[str]) -> list[Extension]:
+        """Return the extensions of the most specific registered class.
+
+        This is the deepest node of the tree along the given hierarchy that has
+        extensions registered. HDUs may thus declare a more specific class than
+        any known schema and still be matched to the closest parent.
+        """
+        node, found = self._root, []
+        for name in hierarchy:
+            node = node.children.get(name)
+            if node is None:
+                break
+            if node.extensions:
+                found = node.extensions
+        return found
+
+    def match(self, header: Mapping) -> Extension | None:
+        """Return the most specific schema for an HDU with the given header.
+
+        If several extensions share the same class hierarchy, the one whose
+        name and version match EXTNAME and EXTVER is preferred.
+        """
+        candidates = self.candidates(class_hierarchy(header))
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+
+        name, version = header.get("EXTNAME"), header.get("EXTVER", 1)
+        for extension in candidates:
+            if extension.name == name and extension.version in (0, version):
+                return extension
+        for extension in candidates:
+            if extension.name == name:
+                return extension
+        return candidates[0]
+
+
+@cache
+def default_registry() -> SchemaRegistry:
+    """Return a registry of all VODF level-1 extensions."""
+    from .models.level1 import event_file, irf_file, monitoring_file
+
+    registry = SchemaRegistry()
+    for schema in [event_file, irf_file, monitoring_file]:
+        registry.register_file(schema)
+    return registry
@@ -6,10 +6,13 @@ Elements to build a FITS-compliant schema.
 This file defines a meta-schema for FITS bintables and headers.
 """
 
+import hashlib
+import weakref
+from collections.abc import Iterator
 from enum import StrEnum, auto
 from typing import Annotated
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 from . import vodf_version_id
 from .validators import VALID_NAME_REGEXP, Capitalize, ValidUCD, ValidUnit
@@ -21,9 +24,14 @@ __all__ = [
     "Extension",
     "TableExtension",
     "Column",
+    "ColumnEncoding",
     "ColumnGroup",
     "FITSFile",
     "DataType",
+    "iter_headers",
+    "iter_columns",
+    "fingerprint",
+    "intern_schema",
 ]
 
 
@@ -95,6 +103,33 @@ class Extension(SchemaElement):
     class_hierarchy: list[str]
 
 
+class ColumnEncoding(BaseModel):
+    """Storage of a column as scaled integers (TSCALn, TZEROn).
+
+    A stored integer s represents the value ``zero + scale * s``. With a
+    reference keyword, zero is the value of that keyword in each file, e.g.
+    TSTART to store times as integer offsets from the start of the data.
+
+    Note that `astropy.io.fits` can only read int64 columns with a TZEROn other
+    than 0 or 2**63 when opened with ``uint=False``.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    storage: DataType  #: integer type stored in the file
+    scale: float = 1.0  #: TSCALn, the resolution of the stored values
+    zero: float = 0.0  #: TZEROn, if there is no reference
+    reference: str | None = None  #: header keyword giving TZEROn
+
+    @model_validator(mode="after")
+    def _integer_storage(self):
+        if self.storage not in (DataType.int16, DataType.int32, DataType.int64):
+            raise ValueError(f"storage must be an integer type, not {self.storage}")
+        if self.scale == 0:
+            raise ValueError("scale must not be zero")
+        return self
+
+
 class Column(SchemaElement):
     """Column of a Table."""
 
@@ -103,6 +138,7 @@ class Column(SchemaElement):
     unit: Annotated[str, ValidUnit] | None = None  #: astropy unit string representation
     ucd: Annotated[str, ValidUCD] | None = None
     format: str | None = None  #: format for output to text if not default
+    encoding: ColumnEncoding | None = None  #: storage as scaled integers, if any
 
 
 class ColumnGroup(SchemaElement):
@@ -121,3 +157,69 @@ class FITSFile(SchemaElement):
     """A FITS file containing multiple extensions."""
 
     extensions: list[TableExtension]
+
+
+def iter_headers(element: Extension | HeaderGroup) -> Iterator[Header]:
+    """Yield all Headers of an element, flattening any HeaderGroups."""
+    for item in element.headers:
+        if isinstance(item, HeaderGroup):
+            yield from iter_headers(item)
+        else:
+            yield item
+
+
+def iter_columns(element: TableExtension | ColumnGroup) -> Iterator[Column]:
+    """Yield all Columns of an element, flattening any ColumnGroups."""
+    for item in element.columns:
+        if isinstance(item, ColumnGroup):
+            yield from iter_columns(item)
+        else:
+            yield item
+
+
+# fingerprints by id of the element; entries are removed when it is collected
+_FINGERPRINTS: dict[int, str] = {}
+
+
+def fingerprint(element: SchemaElement) -> str:
+    """Return a hash of the type and content of a schema element.
+
+    Equal elements have the same fingerprint. It is computed once per element
+    object, so elements must not be modified once they are fingerprinted.
+    """
+    key = id(element)
+    if key not in _FINGERPRINTS:
+        content = f"{type(element).__name__}:{element.model_dump_json()}"
+        _FINGERPRINTS[key] = hashlib.sha1(content.encode()).hexdigest()
+        weakref.finalize(element, _FINGERPRINTS.pop, key, None)
+    return _FINGERPRINTS[key]
+
+
+def intern_schema(
+    element: SchemaElement, table: dict[str, SchemaElement] | None = None
+) -> SchemaElement:
+    """Replace equal HeaderGroups and ColumnGroups of a schema by one object.
+
+    Schemas built by code often contain many equal but distinct groups.
+    Once interned, they are shared, so that renderers such as
+    `~vodftools.fits_template.fits_template` render them only once. The
+    element is modified in place, and returned.
+
+    Parameters
+    ----------
+    element: SchemaElement
+        FITSFile, Extension or group to intern
+    table: dict[str, SchemaElement] | None
+        canonical groups by fingerprint, to share groups between schemas
+    """
+    table = {} if table is None else table
+    for field in ("extensions", "headers", "columns"):
+        items = getattr(element, field, None)
+        if items is None:
+            continue
+        for ii, item in enumerate(items):
+            if isinstance(item, HeaderGroup | ColumnGroup):
+                items[ii] = table.setdefault(fingerprint(item), item)
+            elif isinstance(item, Extension):
+                intern_schema(item, table)
+    return element
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+"""
+Long-running validation service.
+
+Importing astropy and building the schema models costs far more than checking
+the headers of a small file, so instead of starting a new process per file, the
+`ValidationService` loads everything once and then answers requests over a Unix
+socket (one JSON object per line) and/or a localhost HTTP port. Requests are
+accepted by an asyncio front end, and the CPU-bound checks are run in a pool of
+worker processes that are warmed up at start-up.
+
+Requests are JSON objects with an ``action`` key:
+
+- ``{"action": "validate", "path": "/data/run_1.fits", "schema": "event_file"}``
+- ``{"action": "template", "schema": "irf_file"}``
+- ``{"action": "schemas"}``
+- ``{"action": "ping"}``
+
+Over HTTP, the same requests can be sent as a ``POST /`` with a JSON body, or
+using the shortcuts ``POST /validate``, ``GET /template/<schema>``,
+``GET /schemas`` and ``GET /health``.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from http import HTTPStatus
+from pathlib import Path
+
+from .fits_template import fits_template
+from .schema import FITSFile
+from .validation import validate_file
+
+__all__ = ["ValidationService", "load_schemas", "send_request"]
+
+logger = logging.getLogger(__name__)
+
+#: maximum size of a request, in bytes
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+@cache
+def load_schemas() -> dict[str, FITSFile]:
+    """Return all known FITSFile schemas, by name."""
+    from .models.level1 import event_file, irf_file, monitoring_file
+
+    return {schema.name: schema for schema in [event_file, irf_file, monitoring_file]}
+
+
+def _init_worker():
+    """Pay the import and model-building cost once per worker process."""
+    load_schemas()
+
+
+def _validate(path: str, schema_name: str) -> dict:
+    return validate_file(path, load_schemas()[schema_name]).to_dict()
+
+
+class RequestError(Exception):
+    """Raised for requests that cannot be answered."""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+class ValidationService:
+    """Serve validation and template requests from warm schemas.
+
+    Parameters
+    ----------
+    workers: int | None
+        number of worker processes used for validation. Defaults to the number
+        of CPUs.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.schemas = load_schemas()
+        self._templates = {}
+        self._servers = []
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            # forking a process that runs an event loop is not safe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _schema(self, request: dict) -> str:
+        name = request.get("schema")
+        if name not in self.schemas:
+            raise RequestError(
+                f"unknown schema '{name}', expected one of {list(self.schemas)}",
+                HTTPStatus.NOT_FOUND,
+            )
+        return name
+
+    def template(self, schema_name: str) -> str:
+        """Return the (cached) FITS template of a schema."""
+        if schema_name not in self._templates:
+            lines = fits_template(self.schemas[schema_name])
+            self._templates[schema_name] = "\n".join(lines)
+        return self._templates[schema_name]
+
+    async def handle_request(self, request: dict) -> dict:
+        """Answer a single request.
+
+        Raises
+        ------
+        RequestError:
+            if the request is malformed or refers to an unknown schema
+        """
+        if not isinstance(request, dict):
+            raise RequestError("expected a JSON object")
+        action = request.get("action")
+
+        if action == "ping":
+            return dict(status="ok")
+
+        if action == "schemas":
+            return dict(schemas=list(self.schemas))
+
+        if action == "template":
+            return dict(template=self.template(self._schema(request)))
+
+        if action == "validate":
+            schema_name = self._schema(request)
+            if "path" not in request:
+                raise RequestError("missing 'path'")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, _validate, str(request["path"]), schema_name
+            )
+
+        raise RequestError(f"unknown action '{action}'")
+
+    async def _answer(self, request: dict) -> tuple[HTTPStatus, dict]:
+        try:
+            return HTTPStatus.OK, await self.handle_request(request)
+        except RequestError as err:
+            return err.status, dict(error=str(err))
+        except Exception as err:
+            logger.exception("Failed to handle request %s", request)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, dict(error=repr(err))
+
+    async def _handle_stream(self, reader, writer):
+        """Handle a connection speaking newline-delimited JSON."""
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as err:
+                    response = dict(error=str(err))
+                else:
+                    _, response = await self._answer(request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_http(self, reader, writer):
+        """Handle a (minimal, HTTP/1.1) request on the TCP port."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                length = -1
+            if len(request_line) < 2 or not 0 <= length <= MAX_REQUEST_SIZE:
+                status, response = HTTPStatus.BAD_REQUEST, dict(error="bad request")
+            else:
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except asyncio.IncompleteReadError:
+                    status = HTTPStatus.BAD_REQUEST
+                    response = dict(error="request body shorter than Content-Length")
+                else:
+                    status, response = await self._answer_http(*request_line[:2], body)
+
+            payload = json.dumps(response).encode()
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _answer_http(self, method, target, body) -> tuple[HTTPStatus, dict]:
+        parts = [part for part in target.split("?")[0].split("/") if part]
+
+        if method == "GET" and parts == ["health"]:
+            request = dict(action="ping")
+        elif method == "GET" and parts == ["schemas"]:
+            request = dict(action="schemas")
+        elif method == "GET" and len(parts) == 2 and parts[0] == "template":
+            request = dict(action="template", schema=parts[1])
+        elif method == "POST" and parts in ([], ["validate"]):
+            try:
+                request = json.loads(body or b"{}")
+            except json.JSONDecodeError as err:
+                return HTTPStatus.BAD_REQUEST, dict(error=str(err))
+            if not isinstance(request, dict):
+                return HTTPStatus.BAD_REQUEST, dict(error="expected a JSON object")
+            if parts:
+                request["action"] = "validate"
+        else:
+            return HTTPStatus.NOT_FOUND, dict(error=f"no such endpoint: {target}")
+
+        return await self._answer(request)
+
+    async def start_unix(self, path: str | Path) -> asyncio.AbstractServer:
+        """Start listening on a Unix socket."""
+        path = Path(path)
+        if path.is_socket():
+            path.unlink()
+        server = await asyncio.start_unix_server(
+            self._handle_stream, path=path, limit=MAX_REQUEST_SIZE
+        )
+        self._servers.append(server)
+        logger.info("Listening on %s", path)
+        return server
+
+    async def start_http(
+        self, host: str = "127.0.0.1", port: int = 0
+    ) -> asyncio.AbstractServer:
+        """Start listening for HTTP requests. Use port 0 to pick a free port."""
+        server = await asyncio.start_server(
+            self._handle_http, host=host, port=port, limit=MAX_REQUEST_SIZE
+        )
+        self._servers.append(server)
+        logger.info("Listening on http://%s:%d", *server.sockets[0].getsockname()[:2])
+        return server
+
+    async def serve_forever(self):
+        """Run all started servers until cancelled."""
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in self._servers))
+        finally:
+            self.close()
+
+    def warm_up(self):
+        """Start all worker processes and render all templates."""
+        futures = [self.executor.submit(load_schemas) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        for name in self.schemas:
+            self.template(name)
+
+    def close(self):
+        """Stop listening and shut down the worker processes."""
+        for server in self._servers:
+            server.close()
+        self._servers.clear()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def __aenter__(self):  # noqa: D105
+        return self
+
+    async def __aexit__(self, *args):  # noqa: D105
+        self.close()
+
+
+def send_request(request: dict, socket_path: str | Path, timeout=60.0) -> dict:
+    """Send a request to a running service over its Unix socket.
+
+    This is a simple blocking client, for use in scripts.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(os.fspath(socket_path))
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as stream:
+            return json.loads(stream.readline())
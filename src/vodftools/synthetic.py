@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+
+"""
+Generation of synthetic files that follow a schema, e.g. for load testing.
+
+Every required header is filled with its fixed value, its first allowed value
+or example, or a placeholder of the right type, and every column is filled
+with random values of the right dtype, shape and unit. Values are generated
+chunk by chunk with NumPy, and the chunks are written in parallel by worker
+processes directly to their place in the output file, so generating very large
+tables is limited by disk bandwidth rather than by Python.
+
+The values are chosen from the UCD of each column where possible (e.g. sorted
+times for ``time.*``, increasing ids for ``meta.id``, log-distributed energies
+for ``*.energy``), but have no physical meaning.
+"""
+
+import os
+import uuid
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from astropy import units as u
+from astropy.io import fits
+
+from .io.bintable import BLOCK_SIZE, table_header, write_primary
+from .io.encoding import apply_encoding, encode_values, encoding_plan
+from .io.memory import chunk_rows_for
+from .schema import (
+    Column,
+    DataType,
+    FITSFile,
+    Header,
+    TableExtension,
+    iter_columns,
+    iter_headers,
+)
+
+__all__ = [
+    "column_dtype",
+    "example_header_value",
+    "extension_header",
+    "generate_rows",
+    "generate_file",
+]
+
+_TYPE_TO_NUMPY = {
+    DataType.float64: ">f8",
+    DataType.float32: ">f4",
+    DataType.int64: ">i8",
+    DataType.int32: ">i4",
+    DataType.int16: ">i2",
+    DataType.uint32: ">i8",
+    DataType.char: "S16",
+    DataType.isotime: "S23",
+    DataType.uuid: "S36",
+    DataType.none: "S0",
+}
+
+_EXAMPLE_VALUES = {
+    DataType.float64: 0.0,
+    DataType.float32: 0.0,
+    DataType.int64: 0,
+    DataType.int32: 0,
+    DataType.int16: 0,
+    DataType.uint32: 0,
+    DataType.isotime: "2024-01-01T00:00:00",
+}
+
+#: length of each dimension of array columns, if not specified
+DEFAULT_ARRAY_LENGTH = 10
+
+#: number of rows of the blocks in which random values are drawn
+_BLOCK_ROWS = 4096
+
+_HEX_DIGITS = np.array(list(b"0123456789abcdef"), dtype=np.uint8).view("S1")
+
+
+def column_dtype(column: Column, array_length: int = DEFAULT_ARRAY_LENGTH):
+    """Return the numpy dtype (and shape) used to store a column."""
+    base = _TYPE_TO_NUMPY[column.encoding.storage if column.encoding else column.dtype]
+    if column.ndims:
+        return (base, (array_length,) * column.ndims)
+    return base
+
+
+def example_header_value(header: Header):
+    """Return a valid value for a header keyword."""
+    if header.value is not None:
+        value = header.value
+        if header.dtype in (DataType.float32, DataType.float64):
+            return float(value)
+        return value
+    if header.allowed_values:
+        return header.allowed_values[0]
+    if header.examples:
+        return header.examples[0]
+    if header.dtype == DataType.uuid:
+        return str(uuid.uuid4())
+    return _EXAMPLE_VALUES.get(header.dtype, "UNKNOWN")
+
+
+def extension_header(
+    extension: TableExtension,
+    dtype: np.dtype,
+    num_rows: int = 0,
+    header_values: Mapping | None = None,
+) -> fits.Header:
+    """Return a complete BINTABLE header for a table of the given extension."""
+    header = fits.Header()
+    header["EXTNAME"] = extension.name
+    if extension.version:
+        header["EXTVER"] = extension.version
+    for index, name in enumerate(extension.class_hierarchy):
+        header["HDUCLASS" if index == 0 else f"HDUCLAS{index}"] = name
+
+    header_values = header_values or {}
+    for definition in iter_headers(extension):
+        key = definition.fits_key.upper()
+        if not definition.required and key not in header_values:
+            continue
+        header[key] = header_values.get(key, example_header_value(definition))
+
+    for column in iter_columns(extension):
+        reference = column.encoding and column.encoding.reference
+        if reference and reference not in header:
+            header[reference] = header_values.get(reference, 0.0)
+
+    header = table_header(dtype, header, num_rows=num_rows)
+    for index, column in enumerate(iter_columns(extension), start=1):
+        if column.unit:
+            header[f"TUNIT{index}"] = u.Unit(column.unit).to_string("fits")
+        if column.ucd:
+            header[f"TUCD{index}"] = column.ucd
+    return apply_encoding(header, extension)
+
+
+def _random_rows(key: list[int], first: int, num: int, draw) -> np.ndarray:
+    """Return the values of rows [first, first + num) drawn by draw(rng, rows).
+
+    Values are drawn in blocks of `_BLOCK_ROWS` rows, each with its own seed
+    derived from key, so that a row gets the same value however the table is
+    split into chunks.
+    """
+    start = first // _BLOCK_ROWS
+    stop = max(start + 1, -(-(first + num) // _BLOCK_ROWS))
+    values = np.concatenate(
+        [
+            draw(np.random.default_rng([*key, block]), _BLOCK_ROWS)
+            for block in range(start, stop)
+        ]
+    )
+    offset = first - start * _BLOCK_ROWS
+    return values[offset : offset + num]
+
+
+def _isotimes(index: np.ndarray, time_step: float) -> np.ndarray:
+    """Return ISO timestamps (with milliseconds) time_step apart."""
+    offsets = np.rint(index * time_step * 1000).astype("timedelta64[ms]")
+    times = np.datetime64(_EXAMPLE_VALUES[DataType.isotime], "ms") + offsets
+    return np.datetime_as_string(times, unit="ms").astype("S23")
+
+
+def _uuids(random_bytes: np.ndarray) -> np.ndarray:
+    """Return version 4 UUID strings made from 16 random bytes per row."""
+    random_bytes = random_bytes.copy()
+    random_bytes[:, 6] = random_bytes[:, 6] & 0x0F | 0x40  # version 4
+    random_bytes[:, 8] = random_bytes[:, 8] & 0x3F | 0x80  # RFC 4122 variant
+    nibbles = np.stack([random_bytes >> 4, random_bytes & 0x0F], axis=-1)
+    digits = _HEX_DIGITS[nibbles.reshape(len(random_bytes), 32)]
+    digits = np.insert(digits, [8, 12, 16, 20], b"-", axis=1)
+    return np.ascontiguousarray(digits).view("S36").ravel()
+
+
+def _column_values(column: Column, shape, first: int, key: list[int], time_step: float):
+    num, inner = shape[0], shape[1:]
+    index = np.arange(first, first + num, dtype=np.float64)
+    ucd = column.ucd or ""
+
+    def random(method: str, *args) -> np.ndarray:
+        return _random_rows(
+            key,
+            first,
+            num,
+            lambda rng, rows: getattr(rng, method)(*args, size=(rows, *inner)),
+        )
+
+    if column.dtype == DataType.none:
+        return np.full(shape, b"")
+    if column.dtype == DataType.char:
+        return np.full(shape, b"SYNTHETIC")
+    if column.dtype == DataType.isotime:
+        values = _isotimes(index, time_step)
+    elif column.dtype == DataType.uuid:
+        values = _uuids(
+            _random_rows(
+                key,
+                first,
+                num,
+                lambda rng, rows: rng.integers(0, 256, (rows, 16), dtype=np.uint8),
+            )
+        )
+    elif ucd == "time.start":
+        values = index * time_step
+    elif ucd == "time.end":
+        values = (index + 1) * time_step
+    elif ucd.startswith("time"):
+        jitter = _random_rows(
+            key, first, num, lambda rng, rows: rng.uniform(0, 1, rows)
+        )
+        values = (index + jitter) * time_step
+    elif ucd == "meta.id":
+        values = index
+    elif ucd.endswith("energy"):
+        values = 10 ** random("uniform", -1, 2)
+    elif ucd.startswith("pos.eq.ra"):
+        values = random("uniform", 0, 360)
+    elif ucd.startswith("pos.eq.dec"):
+        values = np.degrees(np.arcsin(random("uniform", -1, 1)))
+    elif ucd.startswith("pos"):
+        values = random("uniform", 0, 5)
+    elif column.dtype.name.startswith("float"):
+        values = random("standard_normal")
+    else:
+        values = random("integers", 0, 1000)
+
+    if values.shape != shape:
+        values = np.broadcast_to(
+            values.reshape((num,) + (1,) * (len(shape) - 1)), shape
+        )
+    return values
+
+
+def generate_rows(
+    extension: TableExtension,
+    dtype: np.dtype,
+    first: int,
+    num: int,
+    seed: int = 0,
+    time_step: float = 1.0,
+    encoding: Mapping[str, tuple[float, float]] | None = None,
+) -> np.ndarray:
+    """Generate rows [first, first + num) of a synthetic table.
+
+    The values of a row only depend on the seed and its index, so any part of
+    a table can be generated independently of the others. Columns in encoding
+    (TSCAL, TZERO by name, see `~vodftools.io.encoding.encoding_plan`) are
+    stored as scaled integers.
+    """
+    encoding = encoding or {}
+    rows = np.empty(num, dtype=dtype)
+    for index, column in enumerate(iter_columns(extension)):
+        shape = (num,) + dtype[column.name].shape
+        values = _column_values(column, shape, first, [seed, index], time_step)
+        if column.name in encoding:
+            scale, zero = encoding[column.name]
+            values = encode_values(values, scale, zero, dtype[column.name].base)
+        rows[column.name] = values
+    return rows
+
+
+def _write_rows(path, offset, extension, dtype, first, num, seed, time_step, plan):
+    rows = generate_rows(extension, dtype, first, num, seed, time_step, plan)
+    with open(path, "r+b") as outfile:
+        outfile.seek(offset + first * dtype.itemsize)
+        outfile.write(rows.tobytes())
+
+
+def generate_file(
+    schema: FITSFile,
+    path: str | Path,
+    num_rows: int | Mapping[str, int] = 1000,
+    header_values: Mapping[str, Mapping] | None = None,
+    seed: int = 0,
+    time_step: float = 1.0,
+    array_length: int = DEFAULT_ARRAY_LENGTH,
+    chunk_rows: int | None = None,
+    workers: int | None = None,
+) -> Path:
+    """Write a synthetic file following a schema.
+
+    Parameters
+    ----------
+    schema: FITSFile
+        schema of the file
+    path: str | Path
+        output file
+    num_rows: int | Mapping[str, int]
+        number of rows of every table, or of each table by EXTNAME
+    header_values: Mapping[str, Mapping] | None
+        header values to use instead of the generated ones, by EXTNAME
+    seed: int
+        seed of the random values
+    time_step: float
+        average interval between successive values of time columns
+    array_length: int
+        length of each dimension of array columns
+    chunk_rows: int | None
+        number of rows generated by each task, by default as many as fit in
+        the memory budget shared by all workers
+    workers: int | None
+        number of worker processes. Defaults to the number of CPUs, and 1
+        generates everything in the current process.
+    """
+    path = Path(path)
+    workers = workers or os.cpu_count()
+    header_values = header_values or {}
+
+    tasks = []
+    with open(path, "wb") as outfile:
+        write_primary(outfile)
+        for extension in schema.extensions:
+            rows = num_rows if isinstance(num_rows, int) else num_rows[extension.name]
+            dtype = np.dtype(
+                [
+                    (column.name, column_dtype(column, array_length))
+                    for column in iter_columns(extension)
+                ]
+            )
+            header = extension_header(
+                extension, dtype, rows, header_values.get(extension.name)
+            )
+            outfile.write(header.tostring().encode("ascii"))
+
+            data_offset = outfile.tell()
+            data_size = rows * dtype.itemsize
+            padded = -(-data_size // BLOCK_SIZE) * BLOCK_SIZE
+            outfile.truncate(data_offset + padded)
+            outfile.seek(data_offset + padded)
+
+            step = chunk_rows or chunk_rows_for(dtype.itemsize, workers=workers)
+            for first in range(0, rows, step):
+                num = min(step, rows - first)
+                tasks.append(
+                    (
+                        path,
+                        data_offset,
+                        extension,
+                        dtype,
+                        first,
+                        num,
+                        seed,
+                        time_step,
+                        encoding_plan(header),
+                    )
+                )
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            _write_rows(*task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_write_rows, *task) for task in tasks]:
+                future.result()
+    return path
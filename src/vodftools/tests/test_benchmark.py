@@ -0,0 +1,41 @@
+from vodftools.benchmark import (
+    compare,
+    load_results,
+    make_large_schema,
+    run_benchmarks,
+    save_results,
+)
+
+
+def test_make_large_schema():
+    schema = make_large_schema(3, num_headers=2, num_columns=4)
+    assert len(schema.extensions) == 3
+    assert len(schema.extensions[0].columns[0].columns) == 4
+
+
+def test_run_and_compare(tmp_path):
+    results = run_benchmarks(
+        ["render_fits_template", "read_chunks", "validate_file"],
+        sizes=[1000],
+        schema_sizes=[2],
+        repeat=1,
+        workdir=tmp_path,
+    )
+    assert [result.key for result in results] == [
+        "render_fits_template[2]",
+        "read_chunks[1000]",
+        "validate_file[1000]",
+    ]
+    assert results[1].rows_per_second > 0
+
+    save_results(results, tmp_path / "baseline.json")
+    baseline = load_results(tmp_path / "baseline.json")
+    assert baseline == results
+
+    slower = [
+        type(result)(**{**result.__dict__, "best": result.best * 2})
+        for result in results
+    ]
+    comparison = compare(baseline, slower, threshold=0.5)
+    assert all(regressed for _, _, regressed in comparison)
+    assert not any(regressed for _, _, regressed in compare(baseline, baseline))
@@ -0,0 +1,125 @@
+import gzip
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.binning import bin_events, irf_edges
+
+ENERGY_EDGES = np.geomspace(0.1, 100, 13)
+OFFSET_EDGES = np.linspace(0, 2.5, 6)
+
+
+@pytest.fixture()
+def irf_path(tmp_path):
+    def vector(name, values, unit):
+        return fits.Column(name, f"{len(values)}D", unit=unit, array=[values])
+
+    aeff = fits.BinTableHDU.from_columns(
+        [
+            vector("ENERGY_LO", ENERGY_EDGES[:-1], "TeV"),
+            vector("ENERGY_HI", ENERGY_EDGES[1:], "TeV"),
+            vector("OFFSET_LO", OFFSET_EDGES[:-1], "deg"),
+            vector("OFFSET_HI", OFFSET_EDGES[1:], "deg"),
+            fits.Column("AEFF", "60D", unit="m2", dim="(12, 5)", array=[np.ones(60)]),
+        ],
+        name="EFFECTIVE_AREA",
+    )
+    path = tmp_path / "irfs.fits"
+    fits.HDUList([fits.PrimaryHDU(), aeff]).writeto(path)
+    return path
+
+
+def write_events(path, n_events, seed, energy_unit="TeV", radec=False):
+    rng = np.random.default_rng(seed)
+    energy = rng.lognormal(0.0, 1.5, n_events)
+    offset = rng.uniform(0, 3, n_events)
+    energy[:3] = [np.nan, 0.01, 200]
+    columns = [
+        fits.Column("EVENT_ID", "K", array=np.arange(n_events)),
+        fits.Column(
+            "ENERGY",
+            "E",
+            unit=energy_unit,
+            array=energy * (1000 if energy_unit == "GeV" else 1),
+        ),
+    ]
+    if radec:
+        # offsets along a meridian, where they are differences of declination
+        columns += [
+            fits.Column("RA", "D", unit="deg", array=np.full(n_events, 83.6)),
+            fits.Column("DEC", "D", unit="deg", array=22.0 + offset),
+        ]
+    else:
+        columns.append(fits.Column("OFFSET", "E", unit="deg", array=offset))
+    events = fits.BinTableHDU.from_columns(columns, name="EVENTS")
+    if radec:
+        events.header["RA_PNT"] = 83.6
+        events.header["DEC_PNT"] = 22.0
+    fits.HDUList([fits.PrimaryHDU(), events]).writeto(path)
+    table = fits.getdata(path, "EVENTS")
+    return table["ENERGY"].astype(np.float64), offset.astype(np.float32)
+
+
+def expected_counts(energy, offset):
+    inside = (energy < ENERGY_EDGES[-1]) & (offset < OFFSET_EDGES[-1])
+    counts, _, _ = np.histogram2d(
+        energy[inside], offset[inside], bins=[ENERGY_EDGES, OFFSET_EDGES]
+    )
+    return counts.astype(np.int64)
+
+
+def test_irf_edges(irf_path):
+    edges = irf_edges(irf_path)
+    assert np.array_equal(edges.energy, ENERGY_EDGES)
+    assert np.array_equal(edges.offset, OFFSET_EDGES)
+    assert edges.shape == (12, 5)
+    assert edges.energy_unit == "TeV"
+
+
+def test_irf_edges_not_contiguous(irf_path):
+    with fits.open(irf_path, mode="update") as hdul:
+        hdul["EFFECTIVE_AREA"].data["OFFSET_LO"][0, 2] = 1.1
+    with pytest.raises(ValueError, match="contiguous"):
+        irf_edges(irf_path)
+
+
+def test_bin_events(irf_path, tmp_path):
+    edges = irf_edges(irf_path)
+    energy_a, offset_a = write_events(tmp_path / "a.fits", 20_000, seed=1)
+    energy_b, offset_b = write_events(
+        tmp_path / "b.fits", 5_000, seed=2, energy_unit="GeV"
+    )
+    paths = [tmp_path / "a.fits", tmp_path / "b.fits"]
+
+    expected = expected_counts(energy_a, offset_a) + expected_counts(
+        energy_b / 1000, offset_b
+    )
+    serial = bin_events(paths, edges, workers=1, chunk_rows=3000)
+    assert serial.num_events == 25_000
+    assert np.array_equal(serial.counts, expected)
+    assert serial.total < serial.num_events
+
+    parallel = bin_events(paths, edges, workers=2, chunk_rows=1000, task_rows=4096)
+    assert np.array_equal(parallel.counts, expected)
+
+
+def test_bin_events_compressed_and_pointing(irf_path, tmp_path):
+    edges = irf_edges(irf_path)
+    path = tmp_path / "events.fits"
+    energy, offset = write_events(path, 10_000, seed=3, radec=True)
+    gzipped = tmp_path / "events.fits.gz"
+    gzipped.write_bytes(gzip.compress(path.read_bytes()))
+
+    plain = bin_events([path], edges, workers=1)
+    compressed = bin_events([gzipped], edges, workers=1, chunk_rows=999)
+    assert np.array_equal(plain.counts, compressed.counts)
+    # the offsets are recomputed from RA and DEC, so avoid values near the edges
+    near_edge = np.isclose(offset[:, None], OFFSET_EDGES, atol=1e-6).any(axis=1)
+    assert near_edge.sum() == 0
+    assert np.array_equal(plain.counts, expected_counts(energy, offset))
+
+
+def test_bin_events_missing_offset(irf_path, make_event_file):
+    with pytest.raises(KeyError, match="OFFSET"):
+        bin_events([make_event_file()], irf_edges(irf_path), workers=1)
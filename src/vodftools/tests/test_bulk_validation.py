@@ -0,0 +1,57 @@
+import numpy as np
+from astropy.io import fits
+
+from vodftools.bulk_validation import collect_headers, validate_headers
+from vodftools.models.level1 import event_file, event_list_hdu, soi_hdu
+from vodftools.validation import validate_file
+
+
+def test_violation_matrix(make_event_file, tmp_path):
+    paths = [make_event_file(f"events_{ii}.fits", obs_id=ii) for ii in range(6)]
+    with fits.open(paths[1], mode="update") as hdul:
+        del hdul["EVENTS"].header["TSTART"]
+        hdul["EVENTS"].header["RADECSYS"] = "GALACTIC"
+    with fits.open(paths[2], mode="update") as hdul:
+        hdul["EVENTS"].header["TSTOP"] = "soon"
+        hdul["EVENTS"].header["MJDREFI"] = True
+        hdul["EVENTS"].header["DATE-BEG"] = "yesterday"
+        hdul["SOI"].columns.change_unit("START", "m")
+    with fits.open(paths[3], mode="update") as hdul:
+        hdul["EVENTS"].header["TIMEUNIT"] = "d"
+        hdul["EVENTS"].header["DATAID"] = "not-a-uuid"
+    no_events = tmp_path / "empty.fits"
+    fits.PrimaryHDU().writeto(no_events)
+    paths.append(no_events)
+
+    table = collect_headers(paths, event_list_hdu, workers=3)
+    assert len(table) == 7
+    assert table.found.tolist() == [True] * 6 + [False]
+    assert table.values["OBS_ID"][:6].tolist() == list(range(6))
+
+    matrix = validate_headers(table, event_list_hdu)
+    assert matrix.violations.shape == (7, len(matrix.rules))
+    assert matrix.ok.tolist() == [True, False, False, False, True, True, False]
+    assert matrix.counts() == {
+        "EXTNAME:required": 1,
+        "TSTART:required": 1,
+        "RADECSYS:allowed": 1,
+        "TSTOP:dtype": 1,
+        "MJDREFI:dtype": 1,
+        "DATE-BEG:dtype": 1,
+        "TIMEUNIT:value": 1,
+        "DATAID:dtype": 1,
+    }
+
+    # same problems as the file-by-file validation
+    for index, path in enumerate(paths[:6]):
+        expected = {
+            f.element
+            for f in validate_file(path, event_file).findings
+            if f.hdu == "EVENTS" and f.severity == "error"
+        }
+        assert {f.element for f in matrix.findings(index)} == expected
+
+    soi = validate_headers(collect_headers(paths, soi_hdu), soi_hdu)
+    assert soi.counts() == {"EXTNAME:required": 1, "START:unit": 1}
+    assert np.flatnonzero(~soi.ok).tolist() == [2, 6]
+    assert soi.to_table()["START:unit"].tolist() == [False, False, True] + [False] * 4
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools import data_validation
+from vodftools.data_validation import (
+    column_checks,
+    validate_file_data,
+    validate_table_data,
+)
+from vodftools.io.bintable import find_hdu
+from vodftools.io.compressed import compress_bgzf
+from vodftools.schema import Column, DataType, FITSFile, TableExtension
+from vodftools.validation import Severity
+
+events_hdu = TableExtension(
+    name="EVENTS",
+    description="events",
+    class_hierarchy=["OGIP", "EVENTS"],
+    headers=[],
+    columns=[
+        Column(name="EVENT_ID", description="id", dtype=DataType.int64, ucd="meta.id"),
+        Column(
+            name="TIME",
+            description="time",
+            dtype=DataType.float64,
+            unit="s",
+            ucd="time.epoch",
+        ),
+        Column(
+            name="ENERGY",
+            description="energy",
+            dtype=DataType.float32,
+            unit="TeV",
+            ucd="phys.energy",
+        ),
+    ],
+)
+schema = FITSFile(name="events", description="events", extensions=[events_hdu])
+
+
+@pytest.fixture()
+def bad_event_file(make_event_file):
+    path = make_event_file(n_events=1000)
+    with fits.open(path, mode="update") as hdul:
+        data = hdul["EVENTS"].data
+        data["ENERGY"][[10, 500]] = np.nan
+        data["ENERGY"][20] = -1.0
+        # swap rows across the boundary of two tasks of 250 rows
+        data["TIME"][[249, 250]] = data["TIME"][[250, 249]]
+    return path
+
+
+def test_column_checks():
+    event_id, time, energy = events_hdu.columns
+    assert column_checks(event_id) == []
+    assert column_checks(time) == ["finite", "sorted"]
+    assert column_checks(energy) == ["finite", "positive"]
+
+
+def test_valid_file(event_file_path):
+    report = validate_file_data(event_file_path, schema, workers=1)
+    assert report.ok
+    assert report.findings == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_findings_are_merged(bad_event_file, workers):
+    with open(bad_event_file, "rb") as infile:
+        hdu = find_hdu(infile, "EVENTS")
+    findings = validate_table_data(
+        bad_event_file, hdu, events_hdu, workers=workers, chunk_rows=250
+    )
+    by_key = {(f.element, f.message.split()[3]): f for f in findings}
+
+    nan = by_key[("ENERGY", "non-finite")]
+    assert nan.message.startswith("2 rows")
+    assert "row 10" in nan.message
+
+    negative = by_key[("ENERGY", "non-positive")]
+    assert "row 10" in negative.message  # NaN is not positive either
+    assert negative.message.startswith("3 rows")
+
+    order = [f for f in findings if f.element == "TIME"]
+    assert len(order) == 1
+    assert order[0].severity == Severity.warning
+    assert "row 250" in order[0].message
+
+
+def test_chunking_does_not_change_result(bad_event_file):
+    whole = validate_file_data(bad_event_file, schema, workers=1)
+    chunked = validate_file_data(bad_event_file, schema, workers=1, chunk_rows=97)
+    assert whole.findings == chunked.findings
+    assert not whole.ok
+
+
+def test_compressed_file_rewritten(make_event_file, bad_event_file, tmp_path):
+    path = tmp_path / "events.fits.gz"
+    compress_bgzf(make_event_file("good.fits", n_events=1000), path)
+    assert validate_file_data(path, schema, workers=1).ok
+    assert not data_validation._open_files
+    assert not data_validation._last_rows
+
+    # same path, new data
+    compress_bgzf(bad_event_file, path)
+    report = validate_file_data(path, schema, workers=1)
+    assert not report.ok
+    expected = validate_file_data(bad_event_file, schema, workers=1)
+    assert report.findings == expected.findings
+
+
+def test_isotime_column(tmp_path):
+    dates = np.array(["2024-01-01T00:00:00", "yesterday", "2024-01-02T00:00:00"])
+    path = tmp_path / "dates.fits"
+    fits.BinTableHDU.from_columns(
+        [fits.Column("DATE", "23A", array=dates)], name="DATES"
+    ).writeto(path)
+    extension = TableExtension(
+        name="DATES",
+        description="dates",
+        class_hierarchy=["TEST"],
+        headers=[],
+        columns=[Column(name="DATE", description="date", dtype=DataType.isotime)],
+    )
+
+    with open(path, "rb") as infile:
+        hdu = find_hdu(infile, "DATES")
+    [finding] = validate_table_data(path, hdu, extension, workers=1)
+    assert finding.element == "DATE"
+    assert finding.message == "1 rows with invalid ISO times (first: row 1)"
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from vodftools.fits_template import write_fits_template
+from vodftools.fits_template import fits_template, write_fits_template
 from vodftools.schema import (
     Column,
     ColumnGroup,
@@ -8,7 +8,10 @@ from vodftools.schema import (
     Header,
     HeaderGroup,
     TableExtension,
+    fingerprint,
+    intern_schema,
 )
+from vodftools.visitor import Visitor
 
 
 def test_write_complex_template(tmp_path):
@@ -100,3 +103,70 @@ def test_write_complex_template(tmp_path):
 
     f = FITSFile(name="test_file", extensions=[t, t, t], description="A Nice FITS file")
     write_fits_template(f, tmp_path / "test.tpl")
+
+
+def test_shared_fragments_rendered_once():
+    headers = [
+        Header(name=f"h{ii}", fits_key=f"KEY{ii}", description="a header", unit="m")
+        for ii in range(3)
+    ]
+    # equal groups built separately, as generated schemas do
+    groups = [
+        HeaderGroup(name="Shared", description="shared", headers=headers)
+        for _ in range(2)
+    ]
+    extensions = [
+        TableExtension(
+            name=f"HDU{ii}",
+            description="an HDU",
+            class_hierarchy=["VODF", "TEST"],
+            headers=[groups[ii % 2]],
+            columns=[],
+        )
+        for ii in range(10)
+    ]
+    schema = FITSFile(name="file", description="a file", extensions=extensions)
+    assert fingerprint(groups[0]) == fingerprint(groups[1])
+    assert fingerprint(groups[0]) != fingerprint(headers[0])
+
+    intern_schema(schema)
+    assert all(ext.headers[0] is groups[0] for ext in schema.extensions)
+
+    fits_template.clear_cache()
+    lines = list(fits_template(schema))
+    key0 = [line for line in lines if line.startswith("KEY0")]
+    assert len(key0) == 10
+    # the group is rendered once, and its lines replayed in the other HDUs
+    assert len({id(line) for line in key0}) == 1
+
+    fits_template.clear_cache()
+    assert list(fits_template(schema)) == lines
+
+
+def test_visitor_cache():
+    calls = []
+
+    @Visitor
+    def visitor(schema):
+        """Render fits keys, counting the renderings."""
+
+    @visitor.generator(Header, key=fingerprint)
+    def _(header, opts):
+        calls.append(header.fits_key)
+        yield header.fits_key.upper()
+
+    header = Header(name="h", fits_key="KEY", description="a header", unit="m")
+    assert list(visitor(header)) == ["KEY"]
+    assert list(visitor(header)) == ["KEY"]
+    assert len(calls) == 1
+
+    assert list(visitor(header, opts={"other": 1})) == ["KEY"]
+    assert len(calls) == 2
+    # unhashable options are not cached
+    list(visitor(header, opts={"other": []}))
+    list(visitor(header, opts={"other": []}))
+    assert len(calls) == 4
+
+    visitor.clear_cache()
+    list(visitor(header))
+    assert len(calls) == 5
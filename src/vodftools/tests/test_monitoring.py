@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from vodftools.models.level1 import monitoring_file
+from vodftools.monitoring import TimeSeries
+from vodftools.synthetic import generate_file
+
+
+@pytest.fixture()
+def series():
+    times = np.array([30.0, 10.0, np.nan, 20.0, 20.0, 40.0])
+    values = np.array([3, 1, -1, 2, 22, 4], dtype=">i4")
+    return TimeSeries(times, {"VALUE": values, "X": times * 2}, name="TEST")
+
+
+def test_sorted_index(series):
+    assert len(series) == 5
+    assert series.times.tolist() == [10, 20, 20, 30, 40]
+    # equal times keep their order
+    assert series.columns["VALUE"].tolist() == [1, 2, 22, 3, 4]
+    assert series.columns["VALUE"].dtype.isnative
+
+
+def test_asof_and_nearest(series):
+    times = np.array([5, 10, 19.9, 20, 26, 34, 100, np.nan])
+    assert series.asof(times).tolist() == [-1, 0, 0, 2, 2, 3, 4, -1]
+    assert series.asof(times, tolerance=5).tolist() == [-1, 0, -1, 2, -1, 3, -1, -1]
+    assert series.nearest(times).tolist() == [0, 0, 1, 1, 3, 3, 4, -1]
+    assert series.nearest(times, tolerance=5).tolist() == [0, 0, 1, 1, 3, 3, -1, -1]
+    assert series.nearest([15.0]).tolist() == [0]  # the earlier of two
+
+    values = series.lookup(times, tolerance=5)
+    assert values["VALUE"].tolist() == [0, 1, 0, 22, 0, 3, 0, 0]
+    np.testing.assert_array_equal(
+        values["X"], [np.nan, 20, np.nan, 40, np.nan, 60, np.nan, np.nan]
+    )
+    nearest = series.lookup(times, ["VALUE"], method="nearest")
+    assert list(nearest) == ["VALUE"]
+    with pytest.raises(ValueError, match="method"):
+        series.lookup(times, method="linear")
+
+    empty = TimeSeries(np.empty(0), {"VALUE": np.empty(0, dtype="i4")})
+    assert empty.asof(times).tolist() == [-1] * len(times)
+    assert empty.lookup(times)["VALUE"].tolist() == [0] * len(times)
+
+
+def test_time_ranges(series):
+    assert series.time_range(20, 40) == slice(1, 4)
+    assert series.time_range(41, 50) == slice(5, 5)
+    assert series.time_range(40, 20) == slice(4, 4)
+    first, last = series.time_ranges([0, 15, 35], [15, 35, 35])
+    assert first.tolist() == [0, 1, 4]
+    assert last.tolist() == [1, 4, 4]
+    selected = series.select(15, 35)
+    assert selected.columns["VALUE"].tolist() == [2, 22, 3]
+
+
+def test_read_monitoring_file(tmp_path):
+    path = generate_file(
+        monitoring_file,
+        tmp_path / "monitoring.fits",
+        num_rows=500,
+        time_step=10.0,
+        workers=1,
+    )
+    pointing = TimeSeries.read(path, "POINTING")
+    assert repr(pointing) == "TimeSeries('POINTING', 500 samples)"
+    assert set(pointing.columns) == {"RA_PNT", "DEC_PNT", "ALT_PNT", "AZ_PNT"}
+    assert np.all(np.diff(pointing.times) >= 0)
+
+    rng = np.random.default_rng(0)
+    events = rng.uniform(-100, 5100, 100_000)
+    values = pointing.lookup(events, ["RA_PNT"])
+    # brute force: the number of samples at or before each event, minus one
+    index = (pointing.times <= events[:1000, None]).sum(axis=1) - 1
+    ra = pointing.columns["RA_PNT"]
+    expected = np.where(index >= 0, ra[np.maximum(index, 0)], np.nan)
+    assert (index < 0).any()
+    np.testing.assert_array_equal(values["RA_PNT"][:1000], expected)
+
+    quality = TimeSeries.read(path, "DATA_QUALITY", columns=["QUALITY"])
+    assert list(quality.columns) == ["QUALITY"]
+    assert quality.columns["QUALITY"].dtype == np.int32
+
+
+def test_read_without_time(make_event_file):
+    with pytest.raises(KeyError, match="TIME"):
+        TimeSeries.read(make_event_file(), "SOI")
@@ -0,0 +1,112 @@
+import gzip
+
+import numpy as np
+import pytest
+from astropy.io import fits
+from astropy.table import Table
+
+from vodftools.models.level1 import event_file
+from vodftools.models.metadata import instrument_headers
+from vodftools.obscore import compile_mapping, obscore_table, write_obscore
+from vodftools.schema import DataType, Header, HeaderGroup
+
+
+@pytest.fixture()
+def event_files(make_event_file, tmp_path):
+    paths = []
+    for obs_id in range(1, 5):
+        path = make_event_file(f"events_{obs_id}.fits", obs_id=obs_id, n_events=100)
+        fits.setval(path, "TELESCOP", value="CTAO", extname="EVENTS")
+        paths.append(path)
+    # a compressed file without proposal nor telescope
+    path = make_event_file("events_5.fits", obs_id=5, tstart=5000.0, n_events=100)
+    compressed = tmp_path / "events_5.fits.gz"
+    compressed.write_bytes(gzip.compress(path.read_bytes()))
+    fits.setval(paths[0], "PROP_ID", value="P-42", extname="EVENTS")
+    return paths + [compressed]
+
+
+def test_compile_mapping():
+    mapping = compile_mapping(event_file, instrument_headers)
+    keys = {item.fits_key: item.ivoa_key for item in mapping}
+    assert keys["OBS_ID"] == "obs_id"
+    assert keys["TELESCOP"] == "facility_name"
+    # compiled once per schema
+    assert compile_mapping(event_file, instrument_headers) is mapping
+    assert compile_mapping() is compile_mapping()
+
+
+def test_obscore_table(event_files):
+    table = obscore_table(event_files, workers=4, collection="TEST")
+
+    assert len(table) == 5
+    assert table["obs_id"].tolist() == ["1", "2", "3", "4", "5"]
+    assert table["facility_name"].mask.tolist() == [False] * 4 + [True]
+    assert table["proposal_id"][0] == "P-42"
+    assert table["proposal_id"].mask[1:].all()
+    assert (table["obs_collection"] == "TEST").all()
+    assert table["access_url"][-1].endswith(".fits.gz")
+
+    mjdref = 51910 + 7.428703703703703e-4
+    assert table["t_min"][0] == pytest.approx(mjdref + 1000 / 86400, abs=1e-9)
+    assert table["t_min"][-1] == pytest.approx(mjdref + 5000 / 86400, abs=1e-9)
+    np.testing.assert_allclose(table["t_exptime"], 1800.0)
+    assert str(table["t_min"].unit) == "d"
+
+
+@pytest.mark.parametrize("suffix", [".xml", ".csv", ".parquet"])
+def test_write_obscore(event_files, tmp_path, suffix):
+    output = tmp_path / f"obscore{suffix}"
+    if suffix == ".parquet":
+        pq = pytest.importorskip("pyarrow.parquet")
+        write_obscore(event_files, output, collection="TEST")
+        table = Table(pq.read_table(output).to_pydict())
+    else:
+        write_obscore(event_files, output, collection="TEST")
+        table = Table.read(output)
+
+    assert len(table) == 5
+    assert list(table["t_exptime"]) == pytest.approx([1800.0] * 5)
+    assert "facility_name" in table.colnames
+
+    with pytest.raises(ValueError, match="format"):
+        write_obscore(event_files, tmp_path / "obscore.txt")
+
+
+def test_bad_files_are_skipped(event_files, tmp_path):
+    fits.setval(event_files[1], "TSTART", value="soon", extname="EVENTS")
+    missing = tmp_path / "missing.fits"
+    table = obscore_table([missing, *event_files])
+
+    assert len(table) == 5
+    assert list(table.meta["skipped"]) == [str(missing)]
+    assert table.meta["invalid"] == {
+        str(event_files[1]): ["invalid TSTART, TSTOP or reference time"]
+    }
+    assert table["t_min"].mask.tolist() == [False, True, False, False, False]
+    assert table["obs_id"][1] == "2"
+
+
+def test_invalid_values_are_masked(event_files, tmp_path):
+    fits.setval(event_files[2], "RA_PNT", value="north", extname="EVENTS")
+    pointing = HeaderGroup(
+        name="pointing",
+        description="pointing",
+        headers=[
+            Header(
+                name="RA_PNT",
+                description="pointing",
+                fits_key="RA_PNT",
+                dtype=DataType.float64,
+                ivoa_key="s_ra",
+            )
+        ],
+    )
+    output = tmp_path / "obscore.ecsv"
+    table = write_obscore(event_files, output, sources=(pointing,))
+
+    assert table["s_ra"].mask.tolist() == [True, True, True, True, True]
+    assert table.meta["invalid"] == {
+        str(event_files[2]): ["RA_PNT = 'north' is not float64 (s_ra)"]
+    }
+    assert Table.read(output).meta["invalid"] == table.meta["invalid"]
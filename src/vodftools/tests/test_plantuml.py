@@ -0,0 +1,17 @@
+from collections import Counter
+
+from vodftools.models.level1 import event_file
+from vodftools.plantuml import plantuml
+
+
+def test_shared_groups_declared_once():
+    lines = list(plantuml(event_file))
+    classes = Counter(line for line in lines if line.startswith("class "))
+    assert classes["class CreatorMeta <<HeaderGroup>>"] == 1
+    assert max(classes.values()) == 1
+
+    # both extensions are linked to the shared group
+    links = [line for line in lines if line.endswith(" CreatorMeta")]
+    assert sorted(link.split()[0] for link in links) == ["EVENTS", "SOI"]
+    relationships = [line for line in lines if " -" in line or " *-" in line]
+    assert len(set(relationships)) == len(relationships)
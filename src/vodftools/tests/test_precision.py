@@ -0,0 +1,104 @@
+import pytest
+
+from vodftools.io.bintable import find_hdu
+from vodftools.models.level1 import event_file, event_list_hdu, soi_hdu
+from vodftools.precision import audit_precision, precision_findings
+from vodftools.schema import Column, DataType, TableExtension
+from vodftools.synthetic import generate_file
+from vodftools.validation import Severity
+
+
+def _events_hdu(time_dtype=DataType.float64):
+    return TableExtension(
+        name="EVENTS",
+        description="events",
+        class_hierarchy=["OGIP", "EVENTS"],
+        headers=[],
+        columns=[
+            Column(name="EVENT_ID", description="id", dtype=DataType.int64),
+            Column(
+                name="TIME",
+                description="time",
+                dtype=time_dtype,
+                unit="s",
+                ucd="time.epoch",
+            ),
+            Column(
+                name="ENERGY",
+                description="energy",
+                dtype=DataType.float32,
+                unit="TeV",
+                ucd="phys.energy",
+            ),
+        ],
+    )
+
+
+def _audit(path, name, extension, **kwargs):
+    with open(path, "rb") as infile:
+        return audit_precision(infile, find_hdu(infile, name), extension, **kwargs)
+
+
+def test_event_columns(event_file_path):
+    audit = _audit(event_file_path, "EVENTS", _events_hdu(), chunk_rows=100)
+
+    assert audit["EVENT_ID"].stored == DataType.int64
+    assert audit["EVENT_ID"].maximum == 999
+    assert audit["EVENT_ID"].recommended == DataType.int16
+    assert audit["EVENT_ID"].action == "narrow"
+
+    # microseconds at ~2000 s after the reference need float64
+    assert audit["TIME"].resolution == pytest.approx(1e-6)
+    assert audit["TIME"].float32_error > 1e-6
+    assert audit["TIME"].action == "keep"
+
+    assert audit["ENERGY"].precision == pytest.approx(1e-6)
+    assert audit["ENERGY"].action == "keep"
+
+
+def test_coarser_resolution_allows_narrowing(event_file_path):
+    audit = _audit(event_file_path, "EVENTS", None, resolution={"TIME": 1e-3})
+    assert audit["TIME"].declared is None
+    assert audit["TIME"].recommended == DataType.float32
+
+
+def test_float32_time_interval(event_file_path):
+    audit = _audit(event_file_path, "SOI", soi_hdu)
+    assert audit["START"].stored == DataType.float32
+    assert audit["START"].action == "widen"
+    assert "IRF" not in audit
+
+    findings = precision_findings(audit, "SOI")
+    assert {f.element for f in findings} == {"START", "STOP"}
+    assert all(f.severity == Severity.error for f in findings)
+    assert "need float64" in findings[0].message
+
+
+def test_declared_type_too_narrow(event_file_path):
+    extension = _events_hdu(time_dtype=DataType.float32)
+    findings = precision_findings(_audit(event_file_path, "EVENTS", extension), "E")
+    by_column = {f.element: f for f in findings}
+
+    assert by_column["TIME"].severity == Severity.warning
+    assert "declared as float32" in by_column["TIME"].message
+    assert "could be stored as int16" in by_column["EVENT_ID"].message
+    assert "ENERGY" not in by_column
+
+
+def test_scaled_integer_columns(tmp_path):
+    path = generate_file(event_file, tmp_path / "events.fits", workers=1)
+    audit = _audit(path, "EVENTS", event_list_hdu)
+
+    # decoded from integer nanoseconds, up to about 1000 s
+    time = audit["TIME"]
+    assert time.encoding == (1e-9, 0.0)
+    assert time.stored == DataType.float64
+    assert 0 <= time.minimum < time.maximum < 2000
+    assert time.resolution == pytest.approx(1e-6)
+    assert time.recommended == DataType.float64
+
+    energy = audit["ENERGY"]
+    assert energy.encoding == (1e-6, 0.0)
+    assert energy.stored == DataType.float32
+    assert energy.maximum < 1e4
+    assert energy.action == "keep"
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+import vodftools.io.index
+from vodftools.io.index import IndexDatabase
+from vodftools.references import (
+    IRFCatalog,
+    check_irf_references,
+    irf_name,
+    read_irf_references,
+)
+
+
+def write_irf(path, extname="EFFECTIVE_AREA", copies=1):
+    hdus = [fits.PrimaryHDU()]
+    for _ in range(copies):
+        aeff = fits.BinTableHDU.from_columns(
+            [fits.Column("AEFF", "4D", array=np.ones((1, 4)))], name=extname
+        )
+        aeff.header["EXTVER"] = 1
+        aeff.header["HDUCLASS"] = "VODF"
+        aeff.header["HDUCLAS1"] = "EFF_AREA"
+        aeff.header["HDUCLAS2"] = "SPATIAL_NONE"
+        aeff.header["HDUCLAS3"] = "AEFF_2D"
+        hdus.append(aeff)
+    path.parent.mkdir(exist_ok=True)
+    fits.HDUList(hdus).writeto(path)
+    return path
+
+
+@pytest.fixture()
+def archive(tmp_path, make_event_file):
+    irfs = [
+        write_irf(tmp_path / "irfs" / "IRF_A.fits"),
+        write_irf(tmp_path / "irfs" / "IRF_B.fits"),
+        write_irf(tmp_path / "irfs" / "IRF_D.fits"),
+        write_irf(tmp_path / "old" / "IRF_D.fits"),
+        write_irf(tmp_path / "irfs" / "IRF_E.fits", extname="PSF"),
+        write_irf(tmp_path / "irfs" / "IRF_F.fits", copies=2),
+    ]
+    good = [make_event_file(f"run{ii}.fits", obs_id=ii) for ii in range(3)]
+    bad = make_event_file(
+        "bad.fits",
+        soi_intervals=[
+            (1000.0, 1100.0, "IRF_A"),
+            (1100.0, 1200.0, "IRF_C"),
+            (1200.0, 1300.0, "IRF_D"),
+            (1300.0, 1400.0, "IRF_E"),
+            (1400.0, 1500.0, "IRF_F.fits"),
+            (1500.0, 1600.0, "IRF_C"),
+        ],
+    )
+    return irfs, good, bad
+
+
+def test_irf_name():
+    assert irf_name("archive/IRF_A.fits.gz") == "IRF_A"
+    assert irf_name(" IRF_A ") == "IRF_A"
+    assert irf_name("https://example.com/irfs/IRF_A.fits") == "IRF_A"
+
+
+def test_check_irf_references(archive, monkeypatch):
+    irfs, good, bad = archive
+    scanned = []
+    build_index = vodftools.io.index.build_index
+
+    def counting_build_index(path, *args, **kwargs):
+        scanned.append(str(path))
+        return build_index(path, *args, **kwargs)
+
+    monkeypatch.setattr(vodftools.io.index, "build_index", counting_build_index)
+    catalog = IRFCatalog.build(irfs, workers=4)
+    assert len(catalog) == len(irfs)
+    assert sorted(scanned) == sorted(map(str, irfs))
+
+    reports = check_irf_references([*good, bad], catalog, workers=2)
+    assert all(report.ok for report in reports[:3])
+    messages = [finding.message for finding in reports[-1].findings]
+    assert len(messages) == 4
+    assert messages[0].startswith("dangling IRF reference 'IRF_C': no such file")
+    assert "(first in row 1)" in messages[0]
+    assert messages[1].startswith("ambiguous IRF reference 'IRF_D': 2 files")
+    assert "no HDU EFFECTIVE_AREA" in messages[2]
+    assert "2 HDUs EFFECTIVE_AREA" in messages[3]
+
+    assert catalog.resolve("IRF_A").path == str(irfs[0])
+    assert catalog.resolve("IRF_C").path is None
+
+
+def test_catalog_from_database(archive, tmp_path):
+    irfs, good, bad = archive
+    with IndexDatabase(tmp_path / "index.sqlite") as database:
+        database.add(irfs)
+        catalog = IRFCatalog.from_database(database)
+    # IRF_E has no HDU of the IRF schema
+    assert len(catalog) == len(irfs) - 1
+    assert catalog.resolve("IRF_B").ok
+    assert not catalog.resolve("IRF_E").ok
+    assert list(read_irf_references(good[0])) == ["IRF_A", "IRF_B"]
+
+
+def test_missing_soi(archive, tmp_path):
+    irfs, _, _ = archive
+    (report,) = check_irf_references([irfs[0]], IRFCatalog.build(irfs))
+    assert not report.ok
+    assert "SOI" in report.findings[0].message
+
+
+def test_unreadable_event_file(archive, tmp_path):
+    irfs, good, _ = archive
+    truncated = tmp_path / "truncated.fits"
+    truncated.write_bytes(good[0].read_bytes()[:3000])
+    paths = [tmp_path / "missing.fits", truncated, good[1]]
+    reports = check_irf_references(paths, IRFCatalog.build(irfs))
+
+    assert [report.ok for report in reports] == [False, False, True]
+    assert "cannot read the file" in reports[0].findings[0].message
+    assert reports[1].findings[0].message.startswith("cannot read the file")
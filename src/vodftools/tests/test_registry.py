@@ -0,0 +1,74 @@
+from astropy.io import fits
+
+from vodftools.models.level1 import (
+    eff_area_2d_hdu,
+    event_list_hdu,
+    pointing_hdu,
+    soi_hdu,
+)
+from vodftools.registry import SchemaRegistry, class_hierarchy, default_registry
+from vodftools.schema import TableExtension
+from vodftools.validation import validate_hdus
+
+
+def _header(*hierarchy, **extra):
+    header = fits.Header()
+    for ii, name in enumerate(hierarchy):
+        header["HDUCLASS" if ii == 0 else f"HDUCLAS{ii}"] = name
+    header.update(extra)
+    return header
+
+
+def test_class_hierarchy():
+    assert class_hierarchy(_header("VODF", "EFF_AREA", "SPATIAL_NONE")) == [
+        "VODF",
+        "EFF_AREA",
+        "SPATIAL_NONE",
+    ]
+    assert class_hierarchy(fits.Header()) == []
+
+
+def test_match_most_specific():
+    registry = default_registry()
+    assert len(registry) == 5
+
+    header = _header("VODF", "EFF_AREA", "SPATIAL_NONE", "AEFF_2D")
+    assert registry.match(header) is eff_area_2d_hdu
+    assert registry.match(_header("OGIP", "EVENTS")) is event_list_hdu
+    assert registry.match(_header("VODF", "SOI", "SOMETHING_NEW")) is soi_hdu
+    assert registry.match(_header("VODF", "MONITORING", "POINTING")) is pointing_hdu
+    assert registry.match(_header("VODF", "EFF_AREA")) is None
+    assert registry.match(_header("GADF", "EVENTS")) is None
+
+
+def test_disambiguate_by_name_and_version():
+    v2 = TableExtension(**eff_area_2d_hdu.model_dump(exclude={"version"}), version=2)
+    generic = TableExtension(
+        name="GENERIC",
+        description="parent class",
+        class_hierarchy=["VODF", "EFF_AREA"],
+        headers=[],
+        columns=[],
+    )
+    registry = SchemaRegistry([eff_area_2d_hdu, v2, generic])
+    header = _header("VODF", "EFF_AREA", "SPATIAL_NONE", "AEFF_2D")
+
+    assert registry.match(header) is eff_area_2d_hdu
+    header["EXTNAME"] = "EFFECTIVE_AREA"
+    header["EXTVER"] = 2
+    assert registry.match(header) is v2
+    assert registry.match(_header("VODF", "EFF_AREA", "SPATIAL_RADIAL")) is generic
+
+
+def test_validate_hdus(event_file_path):
+    report = validate_hdus(event_file_path)
+    assert report.ok, report.findings
+
+    with fits.open(event_file_path, mode="update") as hdul:
+        hdul["SOI"].header["HDUCLASS"] = "OTHER"
+    report = validate_hdus(event_file_path)
+    assert [(f.hdu, f.severity) for f in report.findings] == [("SOI", "warning")]
+
+    # an empty registry is used as given, not replaced by the default one
+    report = validate_hdus(event_file_path, SchemaRegistry())
+    assert [f.hdu for f in report.findings] == ["EVENTS", "SOI"]
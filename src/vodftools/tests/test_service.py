@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+from vodftools.service import ValidationService, send_request
+
+
+@pytest.fixture()
+def service():
+    service = ValidationService(workers=1)
+    yield service
+    service.close()
+
+
+async def _http(port, method, target, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_unix_socket(service, tmp_path, event_file_path):
+    socket_path = tmp_path / "vodf.sock"
+
+    async def run():
+        await service.start_unix(socket_path)
+        loop = asyncio.get_running_loop()
+
+        def client():
+            return [
+                send_request(dict(action="ping"), socket_path),
+                send_request(
+                    dict(
+                        action="validate",
+                        path=str(event_file_path),
+                        schema="event_file",
+                    ),
+                    socket_path,
+                ),
+                send_request(dict(action="template", schema="nope"), socket_path),
+            ]
+
+        return await loop.run_in_executor(None, client)
+
+    ping, report, error = asyncio.run(run())
+    assert ping == {"status": "ok"}
+    assert report["ok"], report
+    assert "unknown schema" in error["error"]
+
+
+def test_http(service, event_file_path):
+    async def run():
+        server = await service.start_http(port=0)
+        port = server.sockets[0].getsockname()[1]
+        return (
+            await _http(port, "GET", "/health"),
+            await _http(port, "GET", "/template/irf_file"),
+            await _http(
+                port,
+                "POST",
+                "/validate",
+                json.dumps(dict(path=str(event_file_path), schema="irf_file")).encode(),
+            ),
+            await _http(port, "GET", "/nothing"),
+        )
+
+    health, template, report, missing = asyncio.run(run())
+    assert health == (200, {"status": "ok"})
+    assert template[0] == 200
+    assert "EFFECTIVE_AREA" in template[1]["template"]
+    assert report[0] == 200
+    assert not report[1]["ok"]
+    assert missing[0] == 404
+
+
+async def _raw_http(port, request):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    writer.write_eof()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split()[1])
+
+
+def test_http_bad_requests(service):
+    async def run():
+        server = await service.start_http(port=0)
+        port = server.sockets[0].getsockname()[1]
+        head = b"POST /validate HTTP/1.1\r\nHost: localhost\r\n"
+        return [
+            await _raw_http(port, head + b"Content-Length: many\r\n\r\n"),
+            await _raw_http(port, head + b"Content-Length: -5\r\n\r\n"),
+            await _raw_http(port, head + b"Content-Length: 100\r\n\r\n{}"),
+            await _http(port, "POST", "/validate", b"[1, 2]"),
+        ]
+
+    bad_length, negative, short, not_object = asyncio.run(run())
+    assert bad_length == negative == short == 400
+    assert not_object == (400, {"error": "expected a JSON object"})
@@ -0,0 +1,100 @@
+import uuid
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from vodftools.models.level1 import event_file, irf_file
+from vodftools.schema import Column, DataType, FITSFile, TableExtension
+from vodftools.synthetic import column_dtype, generate_file, generate_rows
+from vodftools.validation import validate_file
+
+events_hdu = TableExtension(
+    name="EVENTS",
+    description="synthetic events",
+    class_hierarchy=["OGIP", "EVENTS"],
+    headers=[],
+    columns=[
+        Column(name="EVENT_ID", description="id", dtype=DataType.int64, ucd="meta.id"),
+        Column(
+            name="TIME",
+            description="time",
+            dtype=DataType.float64,
+            unit="s",
+            ucd="time.epoch",
+        ),
+        Column(
+            name="ENERGY",
+            description="energy",
+            dtype=DataType.float32,
+            unit="TeV",
+            ucd="phys.energy",
+        ),
+        Column(name="MULTIPLICITY", description="n", dtype=DataType.int16),
+    ],
+)
+
+
+@pytest.mark.parametrize("schema", [event_file, irf_file])
+def test_generated_files_are_valid(schema, tmp_path):
+    path = generate_file(schema, tmp_path / "synthetic.fits", num_rows=10, workers=1)
+    report = validate_file(path, schema)
+    assert report.ok, report.findings
+
+    with fits.open(path) as hdul:
+        if schema is irf_file:
+            table = hdul["EFFECTIVE_AREA"]
+            assert table.data["AEFF"].shape == (10, 10, 10)
+            assert table.columns["ENERGY_LO"].unit == "TeV"
+
+
+def test_parallel_generation_is_deterministic(tmp_path):
+    schema = FITSFile(name="test", description="test", extensions=[events_hdu])
+    serial = generate_file(
+        schema, tmp_path / "serial.fits", num_rows=1050, chunk_rows=100, workers=1
+    )
+    parallel = generate_file(
+        schema, tmp_path / "parallel.fits", num_rows=1050, chunk_rows=100, workers=3
+    )
+    assert serial.read_bytes() == parallel.read_bytes()
+
+    with fits.open(parallel) as hdul:
+        data = hdul["EVENTS"].data
+        assert len(data) == 1050
+        np.testing.assert_array_equal(data["EVENT_ID"], np.arange(1050))
+        assert np.all(np.diff(data["TIME"]) > -1)
+        assert data["ENERGY"].dtype == np.dtype(">f4")
+        assert np.all((data["ENERGY"] >= 0.1) & (data["ENERGY"] <= 100))
+
+
+def test_generate_rows_chunks_are_independent():
+    dtype = np.dtype(
+        [("EVENT_ID", "i8"), ("TIME", "f8"), ("ENERGY", "f4"), ("MULTIPLICITY", "i2")]
+    )
+    # rows across a block of random values
+    whole = generate_rows(events_hdu, dtype, 4000, 150, seed=3)
+    part = generate_rows(events_hdu, dtype, 4100, 50, seed=3)
+    np.testing.assert_array_equal(whole[100:], part)
+    other = generate_rows(events_hdu, dtype, 4100, 50, seed=4)
+    assert not np.array_equal(other["ENERGY"], part["ENERGY"])
+
+
+def test_string_columns():
+    strings = TableExtension(
+        name="STRINGS",
+        description="string columns",
+        class_hierarchy=["VODF", "STRINGS"],
+        headers=[],
+        columns=[
+            Column(name="DATE", description="date", dtype=DataType.isotime),
+            Column(name="ID", description="id", dtype=DataType.uuid),
+            Column(name="NOTHING", description="nothing", dtype=DataType.none),
+        ],
+    )
+    dtype = np.dtype([(col.name, column_dtype(col)) for col in strings.columns])
+    rows = generate_rows(strings, dtype, 0, 100, time_step=0.5)
+    dates = np.char.decode(rows["DATE"]).astype("datetime64[ms]")
+    assert np.all(np.diff(dates) == np.timedelta64(500, "ms"))
+    ids = [uuid.UUID(value.decode()) for value in rows["ID"]]
+    assert len(set(ids)) == 100
+    assert all(value.version == 4 for value in ids)
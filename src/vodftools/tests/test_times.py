@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+from astropy.time import Time
+
+from vodftools.models.level1 import event_list_hdu
+from vodftools.times import (
+    check_header_times,
+    isot_to_met,
+    parse_isot,
+    reference_keywords,
+)
+from vodftools.validation import Severity, validate_hdu_header
+
+
+def test_parse_isot():
+    parsed = parse_isot(
+        np.array([b"2024-01-01T00:00:00.5", b"2024-01-02 ", b"", b"junk"], "S23")
+    )
+    assert parsed.dtype == np.dtype("datetime64[ns]")
+    assert parsed[0] == np.datetime64("2024-01-01T00:00:00.5")
+    assert parsed[1] == np.datetime64("2024-01-02")
+    assert np.isnat(parsed[2:]).all()
+
+
+@pytest.mark.parametrize("scale", ["tt", "utc"])
+def test_isot_to_met_matches_astropy(scale):
+    reference = Time(51910, 7.428703703703703e-4, format="mjd", scale=scale)
+    times = Time(
+        ["2001-06-30T12:00:00", "2016-12-31T23:59:59", "2024-03-01"], scale=scale
+    )
+    expected = (times - reference).to_value("s")
+
+    met = isot_to_met(times.isot, 51910, 7.428703703703703e-4, scale.upper())
+    np.testing.assert_allclose(met, expected, atol=1e-5)
+
+
+def test_reference_keywords():
+    assert reference_keywords({"MJDREF": 51910.5, "TIMESYS": "UTC"}) == (
+        51910,
+        0.5,
+        "UTC",
+    )
+    assert reference_keywords({"MJDREFI": 51910}) == (51910, 0.0, "TT")
+
+
+def test_check_header_times(event_file_path):
+    good = fits.getheader(event_file_path, "EVENTS")
+    shifted = good.copy()
+    shifted["TSTART"] += 10
+    invalid = good.copy()
+    invalid["DATE-END"] = "not a date"
+
+    problems = check_header_times([good, shifted, {"TSTART": 0.0}, invalid])
+    assert [problem[:2] for problem in problems] == [
+        (1, "DATE-BEG"),
+        (3, "DATE-END"),
+    ]
+    assert "-10.000 s" in problems[0][2]
+    assert "not valid" in problems[1][2]
+
+    findings = validate_hdu_header(shifted, event_list_hdu)
+    [finding] = [f for f in findings if f.element == "DATE-BEG"]
+    assert finding.severity == Severity.warning
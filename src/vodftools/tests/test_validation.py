@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+from astropy.io import fits
+from pydantic import ValidationError
+
+from vodftools.models.level1 import event_file, event_list_hdu, soi_hdu
+from vodftools.schema import DataType, Header
+from vodftools.validation import (
+    Severity,
+    check_header_value,
+    header_model,
+    validate_file,
+    validate_hdu_header,
+)
+
+
+def test_check_header_value():
+    fixed = Header(name="unit", fits_key="TIMEUNIT", description="", value="s")
+    assert check_header_value("s", fixed) is None
+    assert "should be" in check_header_value("d", fixed)
+
+    choice = Header(
+        name="frame", fits_key="RADECSYS", description="", allowed_values=["ICRS"]
+    )
+    assert check_header_value("FK4", choice) is not None
+
+    typed = Header(name="t", fits_key="TSTART", description="", dtype=DataType.float64)
+    assert check_header_value(1.5, typed) is None
+    assert check_header_value("soon", typed) is not None
+
+    iso = Header(name="d", fits_key="DATE-BEG", description="", dtype=DataType.isotime)
+    assert check_header_value("2024-01-01T00:00:00.5", iso) is None
+    assert check_header_value("yesterday", iso) is not None
+
+
+def test_validate_valid_file(event_file_path):
+    report = validate_file(event_file_path, event_file)
+    assert report.ok, report.findings
+    assert report.to_dict()["ok"]
+
+
+def test_validate_invalid_file(event_file_path):
+    with fits.open(event_file_path, mode="update") as hdul:
+        del hdul["EVENTS"].header["OBS_ID"]
+        hdul["EVENTS"].header["RADECSYS"] = "GALACTIC"
+        hdul["SOI"].columns.change_unit("START", "m")
+
+    report = validate_file(event_file_path, event_file)
+    assert not report.ok
+    problems = {(f.hdu, f.element) for f in report.findings}
+    assert ("EVENTS", "OBS_ID") in problems
+    assert ("EVENTS", "RADECSYS") in problems
+    assert ("SOI", "START") in problems
+
+
+def test_missing_hdu_and_columns(event_file_path):
+    with fits.open(event_file_path) as hdul:
+        header = hdul["SOI"].header.copy()
+    del header["TTYPE3"]
+    header["HDUCLAS1"] = "GTI"
+
+    findings = validate_hdu_header(header, soi_hdu)
+    assert {f.element for f in findings} == {"IRF", "HDUCLAS1"}
+    assert [f.severity for f in findings if f.element == "HDUCLAS1"] == [
+        Severity.warning
+    ]
+
+    fits.HDUList([fits.PrimaryHDU()]).writeto(event_file_path, overwrite=True)
+    report = validate_file(event_file_path, event_file)
+    assert {f.hdu for f in report.findings} == {"EVENTS", "SOI"}
+
+
+def test_header_model(event_file_path):
+    with fits.open(event_file_path) as hdul:
+        header = dict(hdul["EVENTS"].header)
+
+    model = header_model(event_list_hdu)
+    assert header_model(event_list_hdu.model_copy(deep=True)) is model
+
+    values = model.model_validate(header)
+    assert values.model_dump(by_alias=True)["OBS_ID"] == 1
+    assert isinstance(values.model_dump(by_alias=True)["DATAID"], uuid.UUID)
+
+    for key, value in [("RADECSYS", "GALACTIC"), ("TSTART", "soon"), ("MJDREFI", 1.5)]:
+        with pytest.raises(ValidationError, match=key):
+            model.model_validate({**header, key: value})
+    header.pop("TSTOP")
+    with pytest.raises(ValidationError, match="TSTOP"):
+        model.model_validate(header)
+    # optional keywords may be missing
+    header["TSTOP"] = 2800.0
+    header.pop("PROP_ID", None)
+    model.model_validate(header)
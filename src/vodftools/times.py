@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+"""
+Helpers for the time representation of VODF files.
+
+Times in VODF files are given in seconds relative to a reference time, defined
+by the MJDREFI/MJDREFF (or MJDREF) and TIMESYS headers (see `time_headers`).
+
+Creating `~astropy.time.Time` objects is slow compared to the checks done on a
+header, so ISO times (``isotime`` headers and columns) are also handled in bulk
+with NumPy `~numpy.datetime64`: `parse_isot` parses arrays of strings, and
+`isot_to_met` converts them to seconds since the reference time. Both work in
+the time scale of the strings, which is uniform for TT, TAI and TDB; for UTC,
+leap seconds are added from the ERFA table.
+"""
+
+import warnings
+from collections.abc import Mapping, Sequence
+
+import erfa
+import numpy as np
+from astropy.time import Time, TimeDelta
+
+__all__ = [
+    "reference_keywords",
+    "reference_time",
+    "met_to_time",
+    "met_to_isot",
+    "reference_offset",
+    "parse_isot",
+    "isot_to_met",
+    "check_header_times",
+]
+
+_MJD_EPOCH = np.datetime64("1858-11-17", "ns")
+_NS_PER_DAY = 86400 * 10**9
+
+
+def reference_keywords(header: Mapping) -> tuple[int, float, str]:
+    """Return the integer and fractional MJD of the reference time, and TIMESYS.
+
+    MJDREF is used if MJDREFI is not given.
+    """
+    if "MJDREFI" in header:
+        mjd, fraction = int(header["MJDREFI"]), float(header.get("MJDREFF", 0.0))
+    else:
+        mjdref = float(header.get("MJDREF", 0.0))
+        mjd, fraction = int(mjdref), mjdref % 1
+    scale = header.get("TIMESYS", "TT")
+    scale = scale.strip() if isinstance(scale, str) else "TT"
+    return mjd, fraction, scale
+
+
+def reference_time(header: Mapping) -> Time:
+    """Return the reference time (MJDREF) defined in a header."""
+    mjd, fraction, scale = reference_keywords(header)
+    return Time(mjd, fraction, format="mjd", scale=scale.lower())
+
+
+def met_to_time(met, header: Mapping) -> Time:
+    """Convert times relative to the reference time of a header to `Time`."""
+    return reference_time(header) + TimeDelta(np.asanyarray(met), format="sec")
+
+
+def met_to_isot(met, header: Mapping) -> str:
+    """Convert a time relative to the reference time of a header to ISO format."""
+    return met_to_time(met, header).isot
+
+
+def reference_offset(header: Mapping, target: Mapping) -> float:
+    """Return the number of seconds to add to times of header to refer to target.
+
+    This is zero if both headers use the same reference time.
+    """
+    return (reference_time(header) - reference_time(target)).to_value("s")
+
+
+def parse_isot(values) -> np.ndarray:
+    """Parse an array of ISO 8601 strings (str or bytes) to datetime64[ns].
+
+    Empty and invalid strings are returned as NaT.
+    """
+    strings = np.asarray(values)
+    if strings.dtype.kind == "S":
+        strings = np.char.decode(strings, "ascii")
+    strings = np.char.strip(strings.astype(str))
+    # a trailing Z only marks UTC, which the time scale headers give anyway
+    strings = np.char.rstrip(strings, "Z")
+    try:
+        return strings.astype("datetime64[ns]")
+    except ValueError:
+        pass
+
+    # only if some strings are invalid, find them one by one
+    parsed = np.full(strings.shape, np.datetime64("NaT"), dtype="datetime64[ns]")
+    for index, string in np.ndenumerate(strings):
+        try:
+            parsed[index] = np.datetime64(string, "ns")
+        except ValueError:
+            continue
+    return parsed
+
+
+def _mjd_to_datetime64(mjd, fraction=0.0) -> np.ndarray:
+    days = np.asarray(mjd, dtype=np.int64) * _NS_PER_DAY
+    nanoseconds = np.round(np.asarray(fraction, dtype=np.float64) * _NS_PER_DAY)
+    return _MJD_EPOCH + (days + nanoseconds.astype(np.int64)).astype("m8[ns]")
+
+
+def _tai_minus_utc(times: np.ndarray) -> np.ndarray:
+    """Return TAI-UTC in seconds for each datetime64 (NaN for NaT)."""
+    result = np.full(times.shape, np.nan)
+    valid = ~np.isnat(times)
+    dates = times[valid]
+    months = dates.astype("M8[M]")
+    year = dates.astype("M8[Y]").astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (dates.astype("M8[D]") - months.astype("M8[D]")).astype(np.int64) + 1
+    fraction = (dates - dates.astype("M8[D]")).astype(np.int64) / _NS_PER_DAY
+    with warnings.catch_warnings():
+        # erfa warns about dates before 1960 or after the end of its table
+        warnings.simplefilter("ignore", erfa.ErfaWarning)
+        result[valid] = erfa.dat(year, month, day, fraction)
+    return result
+
+
+def isot_to_met(values, mjdrefi, mjdreff=0.0, timesys="TT") -> np.ndarray:
+    """Convert ISO strings to seconds since a reference time.
+
+    The reference time and time scale may be scalars, or arrays with one value
+    per string, e.g. to convert the DATE-BEG of thousands of headers at once
+    (see `reference_keywords`). Invalid strings give NaN.
+
+    .. code-block:: python
+
+        met = isot_to_met(events["DATE"], *reference_keywords(header))
+    """
+    times = parse_isot(values)
+    reference = _mjd_to_datetime64(mjdrefi, mjdreff)
+    met = (times - reference).astype(np.int64) / 1e9
+    met = np.where(np.isnat(times), np.nan, met)
+
+    utc = np.broadcast_to(
+        np.char.lower(np.asarray(timesys, dtype=str)) == "utc", met.shape
+    )
+    if utc.any():
+        reference = np.broadcast_to(reference, met.shape)
+        leap = _tai_minus_utc(times) - _tai_minus_utc(reference)
+        met = np.where(utc, met + leap, met)
+    return met
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, int | float | np.number) and not isinstance(value, bool)
+
+
+def check_header_times(
+    headers: Sequence[Mapping], tolerance: float = 1.0
+) -> list[tuple[int, str, str]]:
+    """Check DATE-BEG and DATE-END against TSTART and TSTOP in many headers.
+
+    All headers are converted at once, which is much faster than using
+    `~astropy.time.Time` for each of them. Headers without the keywords to
+    compare, or with a non-numeric TSTART or TSTOP, are skipped.
+
+    Parameters
+    ----------
+    headers: Sequence[Mapping]
+        headers to check, e.g. of all files of a dataset
+    tolerance: float
+        maximum allowed difference in seconds
+
+    Returns
+    -------
+    list[tuple[int, str, str]]:
+        for each problem, the index of the header, the ISO keyword it refers
+        to, and a description
+    """
+    problems = []
+    for iso_key, met_key in [("DATE-BEG", "TSTART"), ("DATE-END", "TSTOP")]:
+        indices = [
+            index
+            for index, header in enumerate(headers)
+            if iso_key in header and _is_number(header.get(met_key))
+        ]
+        if not indices:
+            continue
+        selected = [headers[index] for index in indices]
+        mjdrefi, mjdreff, timesys = zip(*map(reference_keywords, selected))
+        met = isot_to_met(
+            [str(header[iso_key]) for header in selected], mjdrefi, mjdreff, timesys
+        )
+        expected = np.array([float(header[met_key]) for header in selected])
+        difference = met - expected
+
+        for index, header, diff in zip(indices, selected, difference):
+            if np.isnan(diff):
+                problems.append((index, iso_key, f"'{header[iso_key]}' is not valid"))
+            elif abs(diff) > tolerance:
+                message = (
+                    f"'{header[iso_key]}' is {diff:+.3f} s from "
+                    f"{met_key} = {header[met_key]}"
+                )
+                problems.append((index, iso_key, message))
+    return sorted(problems, key=lambda problem: problem[0])
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+
+"""
+Validation of FITS files against a schema.
+
+The checks in this module only need the FITS headers of each HDU, so they are
+cheap compared to reading the data, which is skipped: files can even be
+checked directly on an HTTP server or object storage (see
+`vodftools.io.remote`), transferring only their header blocks. Each problem
+that is found is reported as a `Finding`, and all findings for a file are
+collected in a `ValidationReport`.
+"""
+
+import uuid
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from enum import StrEnum, auto
+from pathlib import Path
+from typing import Annotated, Any, Literal
+
+from astropy import units as u
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    Field,
+    StrictFloat,
+    StrictInt,
+    StrictStr,
+    ValidationError,
+    create_model,
+)
+
+from .fits_template import _TYPE_TO_FITS
+from .io.bintable import read_hdu, scan_hdus
+from .io.compressed import is_compressed
+from .io.index import FileIndex, read_sidecar
+from .io.remote import open_file
+from .io.units import conversion_factor
+from .registry import SchemaRegistry, default_registry
+from .schema import (
+    DataType,
+    Extension,
+    FITSFile,
+    Header,
+    TableExtension,
+    fingerprint,
+    iter_columns,
+    iter_headers,
+)
+from .times import check_header_times
+
+__all__ = [
+    "Severity",
+    "Finding",
+    "ValidationReport",
+    "check_header_value",
+    "header_model",
+    "validate_header",
+    "validate_columns",
+    "validate_hdu_header",
+    "find_extension",
+    "validate_file",
+    "validate_hdus",
+]
+
+
+class Severity(StrEnum):
+    """How serious a finding is."""
+
+    error = auto()
+    warning = auto()
+
+
+@dataclass
+class Finding:
+    """A single problem found during validation."""
+
+    hdu: str  #: EXTNAME of the HDU where the problem was found
+    element: str  #: FITS keyword or column name the problem refers to
+    message: str
+    severity: Severity = Severity.error
+
+
+@dataclass
+class ValidationReport:
+    """All findings of validating one file."""
+
+    path: str
+    schema: str
+    findings: list[Finding] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """True if there are no errors (warnings are allowed)."""
+        return not any(f.severity == Severity.error for f in self.findings)
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serializable representation."""
+        return dict(
+            path=self.path,
+            schema=self.schema,
+            ok=self.ok,
+            findings=[asdict(f) for f in self.findings],
+        )
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_float(value):
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _is_isotime(value):
+    try:
+        datetime.fromisoformat(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+_DTYPE_CHECKS = {
+    DataType.float64: _is_float,
+    DataType.float32: _is_float,
+    DataType.int64: _is_int,
+    DataType.int32: _is_int,
+    DataType.int16: _is_int,
+    DataType.uint32: lambda value: _is_int(value) and value >= 0,
+    DataType.char: lambda value: isinstance(value, str),
+    DataType.isotime: _is_isotime,
+    DataType.uuid: _is_uuid,
+}
+
+
+def check_header_value(value, header: Header) -> str | None:
+    """Check a single header value against its definition.
+
+    Returns
+    -------
+    str | None:
+        a description of the problem, or None if the value is valid.
+    """
+    if header.value is not None and str(value) != header.value:
+        return f"value '{value}' should be '{header.value}'"
+    if header.allowed_values and str(value) not in header.allowed_values:
+        return f"value '{value}' is not one of {header.allowed_values}"
+    check = _DTYPE_CHECKS.get(header.dtype)
+    if check is not None and not check(value):
+        return f"value '{value}' is not of type {header.dtype.name}"
+    return None
+
+
+def _check(check, message):
+    def validate(value):
+        if not check(value):
+            raise ValueError(message)
+        return value
+
+    return validate
+
+
+# pydantic types checking the same as _DTYPE_CHECKS, and coercing the values
+_DTYPE_TYPES = {
+    DataType.float64: Annotated[StrictInt | StrictFloat, AfterValidator(float)],
+    DataType.float32: Annotated[StrictInt | StrictFloat, AfterValidator(float)],
+    DataType.int64: StrictInt,
+    DataType.int32: StrictInt,
+    DataType.int16: StrictInt,
+    DataType.uint32: Annotated[StrictInt, Field(ge=0)],
+    DataType.char: StrictStr,
+    DataType.isotime: Annotated[Any, AfterValidator(_check(_is_isotime, "isotime"))],
+    DataType.uuid: Annotated[Any, BeforeValidator(str), AfterValidator(uuid.UUID)],
+}
+
+
+def _field_type(header: Header):
+    choices = [header.value] if header.value is not None else header.allowed_values
+    if not choices:
+        return _DTYPE_TYPES.get(header.dtype, Any)
+    # values are compared as strings, after checking the type of the original
+    validators = [BeforeValidator(str)]
+    if header.dtype in _DTYPE_CHECKS:
+        check = _DTYPE_CHECKS[header.dtype]
+        validators.append(BeforeValidator(_check(check, header.dtype.name)))
+    return Annotated[(Literal[tuple(choices)], *validators)]
+
+
+# compiled header models, by fingerprint of their Extension
+_HEADER_MODELS: dict[str, type[BaseModel]] = {}
+
+
+def header_model(extension: Extension) -> type[BaseModel]:
+    """Return a pydantic model validating the header keywords of an Extension.
+
+    Each keyword is a field of the model, aliased to its FITS key: required
+    keywords are required fields, fixed values and allowed values are
+    literals, and values are coerced to their data type (e.g. floats and
+    UUIDs). Other keywords are ignored. Models are compiled once per
+    distinct Extension.
+
+    .. code-block:: python
+
+        model = header_model(event_list_hdu)
+        values = model.model_validate(dict(header))  # raises ValidationError
+    """
+    key = fingerprint(extension)
+    if key not in _HEADER_MODELS:
+        fields = {}
+        for definition in iter_headers(extension):
+            fits_key = definition.fits_key.upper()
+            if fits_key in fields:
+                continue
+            field_type = _field_type(definition)
+            if definition.required:
+                fields[fits_key] = (field_type, Field(alias=fits_key))
+            else:
+                fields[fits_key] = (field_type | None, Field(None, alias=fits_key))
+        _HEADER_MODELS[key] = create_model(
+            f"{extension.name}Header",
+            __config__=ConfigDict(extra="ignore"),
+            **{f"key_{ii}": item for ii, item in enumerate(fields.values())},
+        )
+    return _HEADER_MODELS[key]
+
+
+def validate_header(header: Mapping, extension: Extension) -> list[Finding]:
+    """Check the keywords of a FITS header against an Extension definition.
+
+    The header is validated in one call with the `header_model` of the
+    extension; findings are only described keyword by keyword if it fails.
+    """
+    model = header_model(extension)
+    values = {}
+    for field_info in model.model_fields.values():
+        if field_info.alias in header:
+            values[field_info.alias] = header[field_info.alias]
+    try:
+        model.model_validate(values)
+    except ValidationError as error:
+        failed = {str(details["loc"][0]) for details in error.errors()}
+    else:
+        return []
+
+    findings = []
+    for definition in iter_headers(extension):
+        key = definition.fits_key.upper()
+        if key not in failed:
+            continue
+        failed.discard(key)
+        if key not in header:
+            findings.append(Finding(extension.name, key, "required keyword is missing"))
+            continue
+        problem = check_header_value(header[key], definition)
+        if problem:
+            findings.append(Finding(extension.name, key, problem))
+    return findings
+
+
+def _column_cards(header: Mapping) -> dict[str, int]:
+    """Return a mapping of column name to column index (1-based)."""
+    num_fields = int(header.get("TFIELDS", 0))
+    return {
+        str(header[f"TTYPE{ii}"]).strip(): ii
+        for ii in range(1, num_fields + 1)
+        if f"TTYPE{ii}" in header
+    }
+
+
+def validate_columns(header: Mapping, extension: TableExtension) -> list[Finding]:
+    """Check the column definitions (TTYPEn, TFORMn, TUNITn) in a FITS header."""
+    findings = []
+    columns = _column_cards(header)
+
+    for column in iter_columns(extension):
+        index = columns.get(column.name)
+        if index is None:
+            if column.required:
+                findings.append(
+                    Finding(extension.name, column.name, "required column is missing")
+                )
+            continue
+
+        tform = str(header.get(f"TFORM{index}", "")).strip().lstrip("0123456789")
+        expected = _TYPE_TO_FITS.get(column.dtype)
+        # a column with a storage encoding may also be stored unencoded
+        encoded = (
+            column.encoding and tform[:1] == _TYPE_TO_FITS[column.encoding.storage]
+        )
+        if expected and tform[:1] != expected and not encoded:
+            findings.append(
+                Finding(
+                    extension.name,
+                    column.name,
+                    f"TFORM '{tform}' should be '{expected}' ({column.dtype.name})",
+                )
+            )
+
+        if column.unit:
+            tunit = header.get(f"TUNIT{index}")
+            if not tunit:
+                findings.append(
+                    Finding(
+                        extension.name,
+                        column.name,
+                        f"no unit given, expected '{column.unit}'",
+                        Severity.warning,
+                    )
+                )
+                continue
+            try:
+                conversion_factor(tunit, column.unit)
+            except (ValueError, u.UnitsError):
+                findings.append(
+                    Finding(
+                        extension.name,
+                        column.name,
+                        f"unit '{tunit}' is not convertible to '{column.unit}'",
+                    )
+                )
+    return findings
+
+
+def validate_hdu_header(header: Mapping, extension: Extension) -> list[Finding]:
+    """Run all header-only checks of one HDU against its Extension definition."""
+    findings = validate_header(header, extension)
+
+    class_keys = ["HDUCLASS"] + [
+        f"HDUCLAS{ii}" for ii in range(1, len(extension.class_hierarchy))
+    ]
+    for key, expected in zip(class_keys, extension.class_hierarchy):
+        if header.get(key) != expected:
+            findings.append(
+                Finding(
+                    extension.name,
+                    key,
+                    f"'{header.get(key)}' should be '{expected}'",
+                    Severity.warning,
+                )
+            )
+
+    for _, key, message in check_header_times([header]):
+        findings.append(Finding(extension.name, key, message, Severity.warning))
+
+    if isinstance(extension, TableExtension):
+        findings.extend(validate_columns(header, extension))
+    return findings
+
+
+def _extension_matches(
+    extension: Extension,
+    name: str | None,
+    version: int,
+    hduclass: tuple[str, ...] | None = None,
+) -> bool:
+    """Return True if an HDU is described by extension.
+
+    HDUs are matched on EXTNAME, on EXTVER if the Extension has a non-zero
+    version, and, if hduclass is given, on the class hierarchy of the
+    Extension being a prefix of it.
+    """
+    if name != extension.name:
+        return False
+    if extension.version and version != extension.version:
+        return False
+    if hduclass is None:
+        return True
+    hierarchy = tuple(extension.class_hierarchy)
+    return tuple(hduclass[: len(hierarchy)]) == hierarchy
+
+
+def find_extension(schema: FITSFile, header: Mapping) -> Extension | None:
+    """Return the Extension of a schema that describes an HDU with this header.
+
+    HDUs are matched on EXTNAME, and on EXTVER if the Extension has a non-zero
+    version.
+    """
+    name, version = header.get("EXTNAME"), header.get("EXTVER", 1)
+    for extension in schema.extensions:
+        if _extension_matches(extension, name, version):
+            return extension
+    return None
+
+
+def _schema_hdus(fileobj, schema: FITSFile, index: FileIndex | None):
+    """Yield the HDUs of a file described by the schema, with their Extension."""
+    if index is None:
+        found = set()
+        names = {extension.name for extension in schema.extensions}
+        for hdu in scan_hdus(fileobj):
+            if hdu.index == 0:
+                continue
+            extension = find_extension(schema, hdu.header)
+            if extension is not None:
+                found.add(extension.name)
+                yield hdu, extension
+            # reaching the next header of a compressed file means decompressing
+            # all data in between, so stop as soon as all HDUs were checked
+            if is_compressed(fileobj) and found == names:
+                return
+        return
+
+    # only read the headers of the HDUs in the schema, at their known offsets
+    for entry in index.hdus[1:]:
+        extension = find_extension(
+            schema, {"EXTNAME": entry.name, "EXTVER": entry.version}
+        )
+        if extension is not None:
+            yield read_hdu(fileobj, entry.header_offset, entry.index), extension
+
+
+def validate_file(
+    path: str | Path, schema: FITSFile, index: FileIndex | None = None
+) -> ValidationReport:
+    """Validate the headers of all HDUs of a FITS file against a schema.
+
+    Parameters
+    ----------
+    path: str | Path
+        FITS file or URL to check
+    schema: FITSFile
+        schema the file should follow
+    index: FileIndex | None
+        HDU index of the file, by default its sidecar if there is a current
+        one (see `vodftools.io.index`)
+
+    Returns
+    -------
+    ValidationReport:
+        the findings for this file
+    """
+    report = ValidationReport(path=str(path), schema=schema.name)
+    found = set()
+    index = index or read_sidecar(path)
+
+    with open_file(path) as fileobj:
+        for hdu, extension in _schema_hdus(fileobj, schema, index):
+            found.add(extension.name)
+            report.findings.extend(validate_hdu_header(hdu.header, extension))
+
+    for extension in schema.extensions:
+        if extension.required and extension.name not in found:
+            report.findings.append(
+                Finding(extension.name, "EXTNAME", "required HDU is missing")
+            )
+    return report
+
+
+def validate_hdus(
+    path: str | Path, registry: SchemaRegistry | None = None
+) -> ValidationReport:
+    """Validate every HDU of a file against the schema matching its HDUCLASn.
+
+    This is useful for files mixing many HDU types, where the schema of each
+    HDU is looked up in the registry rather than given upfront. HDUs for which
+    no schema is found are reported as warnings.
+
+    Parameters
+    ----------
+    path: str | Path
+        FITS file or URL to check
+    registry: SchemaRegistry | None
+        schemas to choose from, by default all VODF level-1 extensions
+    """
+    if registry is None:
+        registry = default_registry()
+    report = ValidationReport(path=str(path), schema="registry")
+
+    with open_file(path) as fileobj:
+        for hdu in scan_hdus(fileobj):
+            if hdu.index == 0:
+                continue
+            extension = registry.match(hdu.header)
+            if extension is None:
+                report.findings.append(
+                    Finding(hdu.name, "HDUCLASS", "no schema found", Severity.warning)
+                )
+                continue
+            report.findings.extend(validate_hdu_header(hdu.header, extension))
+    return report
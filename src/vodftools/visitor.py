@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """Defines Visitor design pattern."""
 
+from collections import OrderedDict
+
 
 def get_class_hierarchy(cls: type):
     """Return a list of parent classes in parent to child order."""
@@ -13,18 +15,49 @@ def get_class_hierarchy(cls: type):
 class Visitor:
     """Simple visitor wrapper for separating data structure from output."""
 
+    #: maximum number of outputs kept by cached generators
+    cache_size = 4096
+
     def __init__(self, f):
         self.f = f
         self.generators = {}
+        self._cache = OrderedDict()
+
+    def generator(self, cls: type, key=None):
+        """Define the generator.
 
-    def generator(self, cls: type):
-        """Define the generator."""
+        If key is given, the output of the generator is cached by key(obj)
+        and the options, and replayed for objects with the same key, e.g. a
+        fragment shared by many parts of a schema.
+        """
 
         def call(fun):
-            self.generators[cls] = fun
+            self.generators[cls] = fun if key is None else self._cached(fun, key)
 
         return call
 
+    def _cached(self, fun, key):
+        def cached(obj, opts):
+            try:
+                cache_key = (fun, key(obj), frozenset((opts or {}).items()))
+                hash(cache_key)
+            except TypeError:  # unhashable options
+                yield from fun(obj, opts)
+                return
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+            else:
+                self._cache[cache_key] = tuple(fun(obj, opts))
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            yield from self._cache[cache_key]
+
+        return cached
+
+    def clear_cache(self):
+        """Forget the outputs of cached generators."""
+        self._cache.clear()
+
     def __call__(self, obj, opts=None):
         """Visit the thing."""
         classes = list(get_class_hierarchy(type(obj)))